@@ -4,10 +4,12 @@ from config.config import settings
 from services import AllergenService
 from queries import AllergenQueries
 from schemas import AllergenRead, AllergenCreate
+from observability import TimedRoute
 
 router = APIRouter(
     tags=["Allergen"],
     prefix=settings.url.allergens,
+    route_class=TimedRoute,
 )
 
 
@@ -4,10 +4,12 @@ from config.config import settings
 from services import CuisineService
 from queries import CuisineQueries
 from schemas import CuisineRead, CuisineCreate
+from observability import TimedRoute
 
 router = APIRouter(
     tags=["Cuisine"],
     prefix=settings.url.cuisines,
+    route_class=TimedRoute,
 )
 
 
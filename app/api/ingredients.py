@@ -1,3 +1,4 @@
+import logging
 from typing import Annotated, Optional
 from fastapi import APIRouter, Depends, status, Query, HTTPException
 from .include import parse_select_fields, parse_include
@@ -5,12 +6,16 @@ from config.config import settings
 from services import IngredientService
 from queries import IngredientQueries
 from schemas import IngredientRead, IngredientCreate
+from observability import TimedRoute
 
 router = APIRouter(
     tags=["Ingredient"],
     prefix=settings.url.ingredients,
+    route_class=TimedRoute,
 )
 
+log = logging.getLogger(__name__)
+
 
 @router.get("", response_model=list[IngredientRead])
 async def index(
@@ -66,21 +71,9 @@ async def recipes_by_ingredient(
     ),
     queries: Annotated[IngredientQueries, Depends(IngredientQueries)] = None,
 ):
-    try:
-        print(f"[DEBUG] ingredient_id={ingredient_id}, include={include}, select_fields={select_fields}")
-
-        select_set = parse_select_fields(select_fields)
-        print(f"[DEBUG] select_set={select_set}")
-
-        include_set = parse_include(include)
-        print(f"[DEBUG] include_set={include_set}")
-
-        result = await queries.get_recipes_by_ingredient(ingredient_id, include_set, select_set)
-        print(f"[DEBUG] result={result}")
-
-        return result
-    except Exception as e:
-        print(f"[ERROR] Exception in recipes_by_ingredient: {e}")
-        import traceback
-        traceback.print_exc()
-        raise
\ No newline at end of file
+    select_set = parse_select_fields(select_fields)
+    include_set = parse_include(include)
+    log.debug(
+        "Recipes of ingredient %s: include=%s select=%s", ingredient_id, include_set, select_set
+    )
+    return await queries.get_recipes_by_ingredient(ingredient_id, include_set, select_set)
\ No newline at end of file
@@ -0,0 +1,49 @@
+from pathlib import Path
+
+from fastapi import APIRouter, HTTPException, Response, status
+
+from config.config import settings
+from storage import storage_backend
+from storage.delivery import (
+    FileDescriptorCache,
+    MediaFileResponse,
+    accel_redirect_response,
+    content_hash,
+)
+from observability import TimedRoute
+
+media_root = Path(settings.storage.root)
+media_fd_cache = FileDescriptorCache(settings.storage.fd_cache_size)
+
+
+router = APIRouter(
+    tags=["Media"],
+    prefix="/media",
+    route_class=TimedRoute,
+)
+
+
+def resolve_media_path(path: str) -> Path:
+    """File under the media root for a URL path; 404 for anything that escapes it."""
+    parts = path.split("/")
+    # Lexical check instead of resolve(): no syscalls on the hot path, and
+    # storage never creates symlinks. Dot-files are upload temporaries.
+    if any(not part or part.startswith(".") or "\\" in part for part in parts):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
+    file_path = media_root.joinpath(*parts)
+
+    metadata_dir = getattr(storage_backend, "metadata_dir", None)
+    if metadata_dir is not None and file_path.is_relative_to(metadata_dir):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
+    return file_path
+
+
+@router.api_route("/{path:path}", methods=["GET", "HEAD"], include_in_schema=False)
+async def get_media(path: str) -> Response:
+    file_path = resolve_media_path(path)
+    sha256 = content_hash(path)
+
+    accel_prefix = settings.storage.accel_redirect_prefix
+    if accel_prefix:
+        return accel_redirect_response(f"{accel_prefix.rstrip('/')}/{path}", sha256)
+    return MediaFileResponse(file_path, media_fd_cache, sha256=sha256)
@@ -0,0 +1,74 @@
+"""
+Prometheus endpoint of the API process.
+
+Besides the metrics recorded while handling requests and running
+in-process tasks, a scrape reads the render queue depth, the state of the
+connection pool and the password hasher, and adds the snapshots of taskiq
+workers (see observability.task_metrics).
+"""
+
+import asyncio
+from pathlib import Path
+
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from authentication.password import password_hasher
+from config.config import settings
+from models import db_helper
+from observability.metrics import read_snapshots, registry
+from video.scheduling import queue_depth
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+router = APIRouter(tags=["Metrics"])
+
+
+async def _queue_depth():
+    async with db_helper.session_factory() as session:
+        depth = await queue_depth(session)
+    return [({"lane": lane, "status": status}, count) for (lane, status), count in depth.items()]
+
+
+def _pool_state():
+    pool = db_helper.engine.sync_engine.pool
+    # SQLite file databases may use a pool without these counters
+    for state in ("size", "checkedout", "overflow"):
+        if hasattr(pool, state):
+            yield {"state": state}, getattr(pool, state)()
+
+
+def _password_hasher_state():
+    yield {"state": "running"}, password_hasher.stats.running
+    yield {"state": "waiting"}, password_hasher.stats.waiting
+
+
+registry.collector(
+    "video_queue_depth",
+    "Video projects waiting or rendering, by lane.",
+    ("lane", "status"),
+    _queue_depth,
+)
+registry.collector(
+    "db_pool_connections",
+    "Connections of the database pool: size, checked out, overflow.",
+    ("state",),
+    _pool_state,
+)
+registry.collector(
+    "password_hasher_tasks",
+    "Password hashes running in the executor or waiting for it.",
+    ("state",),
+    _password_hasher_state,
+)
+
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics() -> PlainTextResponse:
+    await registry.collect()
+    snapshots = await asyncio.to_thread(
+        read_snapshots,
+        Path(settings.observability.metrics_dir),
+        settings.observability.metrics_max_age,
+    )
+    return PlainTextResponse(registry.render(snapshots), media_type=CONTENT_TYPE)
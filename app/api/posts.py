@@ -4,10 +4,12 @@ from config.config import settings
 from services import PostService
 from queries import PostQueries
 from schemas import PostRead, PostCreate
+from observability import TimedRoute
 
 router = APIRouter(
     tags=["Posts"],
     prefix=settings.url.posts,
+    route_class=TimedRoute,
 )
 
 
@@ -1,20 +1,23 @@
-from typing import Annotated, Optional, List
+from typing import Annotated, Any, Optional, List
 from pydantic import model_validator
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Depends, Response, status
 from models import Recipe, RecipeIngredient, User
 from config.config import settings
 from sqlalchemy import select, exists
-from fastapi_pagination import Page
+from fastapi_pagination import Page, set_page
 from fastapi_filter import FilterDepends
 from fastapi_filter.contrib.sqlalchemy import Filter
 from authentication.fastapi_users import fastapi_users
 from services import RecipeService, RecipeIngredientData
 from queries import RecipeQueries
 from schemas import RecipeRead, RecipeCreate
+from observability import TimedRoute
+from utils import page_to_json, recipes_to_read_dicts
 
 router = APIRouter(
     tags=["Receipts"],
     prefix=settings.url.receipts,
+    route_class=TimedRoute,
 )
 
 current_active_user = fastapi_users.current_user(active=True)
@@ -64,7 +67,14 @@ async def index(
     recipe_filter: RecipeFilter = FilterDepends(RecipeFilter),
     queries: Annotated[RecipeQueries, Depends(RecipeQueries)] = None,
 ):
-    return await queries.get_all_paginated(recipe_filter)
+    if not settings.api.fast_serialization:
+        return await queries.get_all_paginated(recipe_filter)
+
+    # Items stay plain dicts: Page[Any] does not validate them into RecipeRead,
+    # and returning a Response skips the response_model (kept for the docs)
+    with set_page(Page[Any]):
+        page = await queries.get_all_paginated(recipe_filter, transformer=recipes_to_read_dicts)
+    return Response(page_to_json(page), media_type="application/json")
 
 
 @router.get("/{id}", response_model=RecipeRead)
@@ -16,10 +16,12 @@ from pydantic import BaseModel, Field
 from fastapi.staticfiles import StaticFiles
 from pathlib import Path
 import shutil
+from observability import TimedRoute
 
 router = APIRouter(
     tags=["Test"],
     prefix=settings.url.test,
+    route_class=TimedRoute,
 )
 
 class RecipeCreate(BaseModel):
@@ -0,0 +1,161 @@
+from email.utils import format_datetime
+from typing import Annotated
+from fastapi import APIRouter, Depends, Header, Request, Response, status, HTTPException
+
+from models import db_helper
+from schemas import (
+    ResumableUploadCreate,
+    ResumableUploadRead,
+    UploadPartRead,
+    VideoProjectUploadResponse,
+)
+from services import VideoProjectService
+from outbox import outbox_relay
+from video import OUTPUT_FORMATS, TRANSITIONS
+from video.uploads import append_chunks, received_bytes, resumable_part_path, upload_expires_at
+from observability import TimedRoute
+from .videos import project_owner
+
+TUS_VERSION = "1.0.0"
+
+
+router = APIRouter(
+    tags=["Videos"],
+    prefix="/videos/uploads",
+    route_class=TimedRoute,
+)
+
+
+def _upload_read(video_project, parts) -> ResumableUploadRead:
+    return ResumableUploadRead(
+        id=video_project.id,
+        status=video_project.status,
+        expires_at=upload_expires_at(video_project.created_at),
+        parts=[
+            UploadPartRead(
+                order_index=part.order_index,
+                filename=part.filename,
+                size=part.size_bytes,
+                offset=received_bytes(resumable_part_path(video_project.id, part.order_index)),
+            )
+            for part in parts
+        ],
+    )
+
+
+@router.post("", response_model=ResumableUploadRead, status_code=status.HTTP_201_CREATED)
+async def create_upload(
+    upload_create: ResumableUploadCreate,
+    service: Annotated[VideoProjectService, Depends(VideoProjectService)],
+    owner: Annotated[str, Depends(project_owner)],
+):
+    """
+    Start a resumable upload: declare the files, then send each of them with
+    PATCH requests and finish with POST /complete.
+    """
+    if upload_create.transition not in TRANSITIONS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid transition: {upload_create.transition}. Allowed: {', '.join(TRANSITIONS)}"
+        )
+    if upload_create.output_format not in OUTPUT_FORMATS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid output format: {upload_create.output_format}. Allowed: {', '.join(OUTPUT_FORMATS)}"
+        )
+
+    video_project, parts = await service.start_resumable(
+        upload_create.transition,
+        [(file.filename, file.size) for file in upload_create.files],
+        upload_create.output_format,
+        owner,
+    )
+    return _upload_read(video_project, parts)
+
+
+@router.get("/{project_id}", response_model=ResumableUploadRead)
+async def get_upload(
+    project_id: int,
+    service: Annotated[VideoProjectService, Depends(VideoProjectService)],
+    owner: Annotated[str, Depends(project_owner)],
+):
+    """
+    Get received offsets of all files of an upload.
+    """
+    video_project, parts = await service.get_resumable(project_id, owner)
+    return _upload_read(video_project, parts)
+
+
+@router.head("/{project_id}/parts/{order_index}")
+async def get_part_offset(
+    project_id: int,
+    order_index: int,
+    service: Annotated[VideoProjectService, Depends(VideoProjectService)],
+    owner: Annotated[str, Depends(project_owner)],
+):
+    """
+    Get the offset to resume a file from (Upload-Offset header).
+    """
+    video_project, _ = await service.get_resumable(project_id, owner)
+    part = await service.get_upload_part(project_id, order_index)
+    return Response(
+        headers={
+            "Upload-Offset": str(received_bytes(resumable_part_path(project_id, order_index))),
+            "Upload-Length": str(part.size_bytes),
+            "Upload-Expires": format_datetime(upload_expires_at(video_project.created_at), usegmt=True),
+            "Tus-Resumable": TUS_VERSION,
+            "Cache-Control": "no-store",
+        }
+    )
+
+
+@router.patch("/{project_id}/parts/{order_index}", status_code=status.HTTP_204_NO_CONTENT)
+async def upload_part_chunk(
+    project_id: int,
+    order_index: int,
+    request: Request,
+    upload_offset: Annotated[int, Header(alias="Upload-Offset", ge=0)],
+    owner: Annotated[str, Depends(project_owner)],
+):
+    """
+    Append the request body to a file starting at Upload-Offset.
+    """
+    # The body may take minutes on a slow network: do not hold a DB connection meanwhile
+    async with db_helper.session_factory() as session:
+        service = VideoProjectService(session)
+        # Completed or cancelled uploads, and uploads of other owners, take no data
+        await service.get_resumable(project_id, owner)
+        part = await service.get_upload_part(project_id, order_index)
+
+    offset = await append_chunks(
+        resumable_part_path(project_id, order_index),
+        request.stream(),
+        upload_offset,
+        part.size_bytes,
+        part.filename,
+    )
+    return Response(
+        status_code=status.HTTP_204_NO_CONTENT,
+        headers={"Upload-Offset": str(offset), "Tus-Resumable": TUS_VERSION},
+    )
+
+
+@router.post("/{project_id}/complete", response_model=VideoProjectUploadResponse)
+async def complete_upload(
+    project_id: int,
+    service: Annotated[VideoProjectService, Depends(VideoProjectService)],
+    owner: Annotated[str, Depends(project_owner)],
+):
+    """
+    Finalize an upload once every file is fully received and start video generation.
+    """
+    video_project = await service.complete_resumable(project_id, owner)
+
+    # The render message was committed with the project; publish it now
+    outbox_relay.notify()
+
+    return VideoProjectUploadResponse(
+        id=video_project.id,
+        status=video_project.status,
+        message="Images uploaded successfully. Video generation started."
+    )
@@ -1,80 +1,133 @@
-from typing import Annotated
-from pathlib import Path
-from fastapi import APIRouter, Depends, status, UploadFile, File, HTTPException, Request
-from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-from sqlalchemy.orm import selectinload
-
-from config.config import settings
-from models import db_helper, VideoProject, Image
+import asyncio
+from datetime import datetime
+from typing import Annotated, Any, AsyncIterator, Optional
+from fastapi import APIRouter, Depends, status, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+
+from authentication.fastapi_users import current_optional_user
+from models import db_helper, User, VideoProject
 from models.video_project import VideoStatus
-from schemas import VideoProjectRead, VideoProjectUploadResponse, ImageSchema
-from tasks.video_tasks import generate_video_task
+from queries import VideoProjectQueries
+from services import VideoProjectService
+from schemas import (
+    VideoProjectRead,
+    VideoProjectUploadResponse,
+    VideoProjectPage,
+    VideoProjectStatusRead,
+    VideoProjectStatusEvent,
+)
+from outbox import outbox_relay
+from video import OUTPUT_FORMATS, TRANSITIONS
+from video.scheduling import owner_key
+from video.uploads import UploadStaging
+from video.progress import project_event
+from video.status_bus import status_hub, TERMINAL_STATUSES
+from utils import media_url, video_project_to_dict
+from observability import TimedRoute, tracer
+
+MAX_PAGE_SIZE = 100
+MAX_STATUS_IDS = 100
+
+# Comment lines keep idle SSE connections open through proxies
+SSE_KEEPALIVE_SECONDS = 15
 
 
 router = APIRouter(
     tags=["Videos"],
     prefix="/videos",
+    route_class=TimedRoute,
 )
 
 
-@router.post("", response_model=VideoProjectUploadResponse, status_code=status.HTTP_201_CREATED)
+async def project_owner(
+    request: Request,
+    user: Annotated[Optional[User], Depends(current_optional_user)],
+) -> str:
+    """Owner key of the caller: its user, or the client address when anonymous."""
+    return owner_key(user.id if user else None, request.client.host if request.client else None)
+
+
+# The body is parsed by UploadStaging, not by File()/Form() parameters, so the
+# request schema is declared here for the docs
+UPLOAD_REQUEST_BODY = {
+    "required": True,
+    "content": {
+        "multipart/form-data": {
+            "schema": {
+                "type": "object",
+                "required": ["images"],
+                "properties": {
+                    "images": {
+                        "type": "array",
+                        "items": {"type": "string", "format": "binary"},
+                    },
+                    "transition": {
+                        "type": "string",
+                        "default": "none",
+                        "enum": list(TRANSITIONS),
+                    },
+                    "output_format": {
+                        "type": "string",
+                        "default": "mp4",
+                        "enum": list(OUTPUT_FORMATS),
+                    },
+                },
+            }
+        }
+    },
+}
+
+
+@router.post(
+    "",
+    response_model=VideoProjectUploadResponse,
+    status_code=status.HTTP_201_CREATED,
+    openapi_extra={"requestBody": UPLOAD_REQUEST_BODY},
+)
 async def upload_images(
-    images: list[UploadFile] = File(...),
-    session: AsyncSession = Depends(db_helper.session_getter),
+    request: Request,
+    service: Annotated[VideoProjectService, Depends(VideoProjectService)],
+    owner: Annotated[str, Depends(project_owner)],
 ):
     """
     Upload images and create video project.
     Images will be processed in background to generate video.
     """
-    if not images:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="No images provided"
-        )
+    async with UploadStaging() as staging:
+        # Every file is streamed and validated while the body arrives,
+        # before anything is stored permanently
+        with tracer.span("upload.receive"):
+            staged, fields = await staging.receive_multipart(request)
 
-    # Validate image files
-    allowed_extensions = {".jpg", ".jpeg", ".png", ".webp"}
-    for img in images:
-        file_ext = Path(img.filename).suffix.lower()
-        if file_ext not in allowed_extensions:
+        if not staged:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Invalid file type: {img.filename}. Allowed: {allowed_extensions}"
+                detail="No images provided"
             )
 
-    # Create video project
-    video_project = VideoProject(status=VideoStatus.PENDING)
-    session.add(video_project)
-    await session.commit()
-    await session.refresh(video_project)
-
-    # Save images
-    images_dir = Path("media/images")
-    images_dir.mkdir(parents=True, exist_ok=True)
-
-    for idx, img_file in enumerate(images):
-        # Save file
-        file_ext = Path(img_file.filename).suffix
-        filename = f"project_{video_project.id}_img_{idx}{file_ext}"
-        file_path = images_dir / filename
-
-        content = await img_file.read()
-        with open(file_path, "wb") as f:
-            f.write(content)
-
-        # Create database record
-        image = Image(
-            video_project_id=video_project.id,
-            image_path=str(file_path),
-            order_index=idx
-        )
-        session.add(image)
+        transition = fields.get("transition") or "none"
+        if transition not in TRANSITIONS:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Invalid transition: {transition}. Allowed: {', '.join(TRANSITIONS)}"
+            )
 
-    await session.commit()
+        output_format = fields.get("output_format") or "mp4"
+        if output_format not in OUTPUT_FORMATS:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Invalid output format: {output_format}. Allowed: {', '.join(OUTPUT_FORMATS)}"
+            )
 
-    # Kick off video generation task
-    await generate_video_task.kiq(video_project.id)
+        with tracer.span("upload.store", images=len(staged)) as span:
+            video_project = await service.create_from_staged(
+                transition, staged, output_format, owner
+            )
+            if span is not None:
+                span.set_attribute("video_project.id", video_project.id)
+
+    # The render message was committed with the project; publish it now
+    outbox_relay.notify()
 
     return VideoProjectUploadResponse(
         id=video_project.id,
@@ -83,96 +136,183 @@ async def upload_images(
     )
 
 
-@router.get("", response_model=list[VideoProjectRead])
+@router.get("", response_model=VideoProjectPage)
 async def get_all_projects(
     request: Request,
-    session: AsyncSession = Depends(db_helper.session_getter),
+    queries: Annotated[VideoProjectQueries, Depends(VideoProjectQueries)],
+    limit: int = Query(20, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    status_filter: Optional[VideoStatus] = Query(None, alias="status"),
+    created_from: Optional[datetime] = Query(None),
+    created_to: Optional[datetime] = Query(None),
 ):
     """
-    Get all video projects with their images and videos.
+    Get video projects, newest first, one page at a time.
     """
-    result = await session.execute(
-        select(VideoProject).options(selectinload(VideoProject.images))
+    projects, next_cursor = await queries.get_page(
+        limit=limit,
+        cursor=cursor,
+        status_filter=status_filter.value if status_filter else None,
+        created_from=created_from,
+        created_to=created_to,
     )
-    projects = result.scalars().all()
-
-    # Convert to response schema with URLs
-    response = []
     base_url = str(request.base_url).rstrip("/")
 
-    for project in projects:
-        images_data = [
-            ImageSchema(
-                id=img.id,
-                image_url=f"{base_url}/media/images/{Path(img.image_path).name}",
-                order_index=img.order_index
-            )
-            for img in sorted(project.images, key=lambda x: x.order_index)
-        ]
-
-        video_url = None
-        if project.video_path:
-            video_url = f"{base_url}/media/videos/{Path(project.video_path).name}"
-
-        response.append(
-            VideoProjectRead(
-                id=project.id,
-                status=project.status,
-                video_url=video_url,
-                error_message=project.error_message,
-                created_at=project.created_at,
-                updated_at=project.updated_at,
-                images=images_data
-            )
+    return {
+        "items": [video_project_to_dict(project, base_url) for project in projects],
+        "next_cursor": next_cursor,
+    }
+
+
+@router.get("/status", response_model=list[VideoProjectStatusRead])
+async def get_projects_status(
+    request: Request,
+    queries: Annotated[VideoProjectQueries, Depends(VideoProjectQueries)],
+    ids: str = Query(..., description="comma-separated project ids"),
+):
+    """
+    Get status and video URL of several projects in one cheap query.
+    """
+    try:
+        id_list = sorted({int(part) for part in ids.split(",") if part.strip()})
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="ids must be a comma-separated list of integers"
+        )
+    if not id_list or len(id_list) > MAX_STATUS_IDS:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Provide from 1 to {MAX_STATUS_IDS} ids"
         )
 
-    return response
+    base_url = str(request.base_url).rstrip("/")
+    rows = await queries.get_statuses(id_list)
+
+    return [
+        {
+            "id": row.id,
+            "status": row.status,
+            "video_url": media_url(base_url, row.video_path),
+        }
+        for row in rows
+    ]
 
 
 @router.get("/{project_id}", response_model=VideoProjectRead)
 async def get_project(
     project_id: int,
     request: Request,
-    session: AsyncSession = Depends(db_helper.session_getter),
+    queries: Annotated[VideoProjectQueries, Depends(VideoProjectQueries)],
 ):
     """
     Get a single video project by ID.
     """
-    result = await session.execute(
-        select(VideoProject)
-        .where(VideoProject.id == project_id)
-        .options(selectinload(VideoProject.images))
-    )
-    project = result.scalar_one_or_none()
+    project = await queries.get_by_id(project_id)
+    base_url = str(request.base_url).rstrip("/")
+    return video_project_to_dict(project, base_url)
+
+
+@router.post("/{project_id}/cancel", response_model=VideoProjectStatusRead)
+async def cancel_project(
+    project_id: int,
+    request: Request,
+    service: Annotated[VideoProjectService, Depends(VideoProjectService)],
+    owner: Annotated[str, Depends(project_owner)],
+):
+    """
+    Cancel a project that is uploading, queued or rendering.
+    A running render is stopped and its partial output discarded.
+    Only the owner of the project can cancel it.
+    """
+    project = await service.cancel(project_id, owner)
+    base_url = str(request.base_url).rstrip("/")
+    return {
+        "id": project.id,
+        "status": project.status,
+        "video_url": media_url(base_url, project.video_path),
+    }
+
+
+@router.delete("/{project_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_project(
+    project_id: int,
+    service: Annotated[VideoProjectService, Depends(VideoProjectService)],
+    owner: Annotated[str, Depends(project_owner)],
+):
+    """
+    Delete a project and its files, stopping its render if one is running.
+    Only the owner of the project can delete it.
+    """
+    await service.delete(project_id, owner)
+
+
+@router.get("/{project_id}/events")
+async def stream_project_events(
+    project_id: int,
+    request: Request,
+):
+    """
+    Stream status and progress of a video project as Server-Sent Events.
+    The stream ends once the project reaches success, failed or cancelled.
+    """
+    # Subscribe before reading the snapshot so no event is lost in between
+    queue = status_hub.subscribe(project_id)
+
+    # A short-lived session: the stream itself must not hold a DB connection
+    async with db_helper.session_factory() as session:
+        project = await session.get(VideoProject, project_id)
 
     if not project:
+        status_hub.unsubscribe(project_id, queue)
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Video project {project_id} not found"
         )
 
-    # Convert to response schema with URLs
     base_url = str(request.base_url).rstrip("/")
 
-    images_data = [
-        ImageSchema(
-            id=img.id,
-            image_url=f"{base_url}/media/images/{Path(img.image_path).name}",
-            order_index=img.order_index
-        )
-        for img in sorted(project.images, key=lambda x: x.order_index)
-    ]
+    return StreamingResponse(
+        _event_stream(request, project_id, queue, project_event(project), base_url),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+async def _event_stream(
+    request: Request,
+    project_id: int,
+    queue: asyncio.Queue,
+    snapshot: dict[str, Any],
+    base_url: str,
+) -> AsyncIterator[str]:
+    try:
+        event = snapshot
+        while True:
+            yield _format_event(event, base_url)
+            if event["status"] in TERMINAL_STATUSES:
+                return
+
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), SSE_KEEPALIVE_SECONDS)
+                    break
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        return
+                    yield ": keepalive\n\n"
+    finally:
+        status_hub.unsubscribe(project_id, queue)
+
 
-    video_url = None
-    if project.video_path:
-        video_url = f"{base_url}/media/videos/{Path(project.video_path).name}"
-
-    return VideoProjectRead(
-        id=project.id,
-        status=project.status,
-        video_url=video_url,
-        error_message=project.error_message,
-        created_at=project.created_at,
-        updated_at=project.updated_at,
-        images=images_data
+def _format_event(event: dict[str, Any], base_url: str) -> str:
+    payload = VideoProjectStatusEvent(
+        id=event["id"],
+        status=event["status"],
+        stage=event["stage"],
+        progress=event["progress"],
+        eta_seconds=event["eta_seconds"],
+        error_message=event["error_message"],
+        video_url=media_url(base_url, event.get("video_path")),
     )
+    return f"event: status\ndata: {payload.model_dump_json()}\n\n"
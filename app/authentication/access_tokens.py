@@ -0,0 +1,135 @@
+"""
+Access tokens of the database strategy.
+
+CachedAccessTokenDatabase answers most token lookups from memory: known
+tokens for a short TTL (the time a revocation in another process may go
+unnoticed), unknown and revoked tokens for longer, since a random token
+that is not in the table never appears there later. Expiry is checked
+against the cached creation time, so an expired token is rejected even
+while cached.
+
+purge_expired_tokens deletes expired rows in bounded batches, so the table
+only holds live tokens.
+"""
+
+from datetime import datetime, timedelta, timezone
+from typing import Any, Optional
+
+from fastapi_users.authentication.strategy.db import AccessTokenDatabase
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import make_transient_to_detached
+
+from config import settings
+from models import AccessToken
+
+from .ttl_cache import TTLCache
+
+# Cached for tokens that are not in the table
+_REVOKED = object()
+
+
+class AccessTokenCache:
+    def __init__(self, ttl_seconds: float, negative_ttl_seconds: float, max_size: int):
+        self.negative_ttl_seconds = negative_ttl_seconds
+        self._entries = TTLCache(ttl_seconds, max_size)
+
+    def get(self, token: str) -> Optional[Any]:
+        """(user_id, created_at), _REVOKED, or None if unknown."""
+        return self._entries.get(token)
+
+    def put(self, access_token: AccessToken) -> None:
+        self._entries.put(access_token.token, (access_token.user_id, access_token.created_at))
+
+    def revoke(self, token: str) -> None:
+        self._entries.put(token, _REVOKED, self.negative_ttl_seconds)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class CachedAccessTokenDatabase(AccessTokenDatabase[AccessToken]):
+    """AccessTokenDatabase reading through an AccessTokenCache."""
+
+    def __init__(self, database: AccessTokenDatabase[AccessToken], cache: AccessTokenCache):
+        self.database = database
+        self.cache = cache
+
+    async def get_by_token(
+        self, token: str, max_age: Optional[datetime] = None
+    ) -> Optional[AccessToken]:
+        entry = self.cache.get(token)
+        if entry is _REVOKED:
+            return None
+        if entry is not None:
+            user_id, created_at = entry
+            access_token = AccessToken(token=token, user_id=user_id, created_at=created_at)
+            make_transient_to_detached(access_token)
+        else:
+            # Loaded regardless of max_age: an expired token is cached as well
+            access_token = await self.database.get_by_token(token)
+            if access_token is None:
+                self.cache.revoke(token)
+                return None
+            self.cache.put(access_token)
+
+        if max_age is not None and access_token.created_at < max_age:
+            return None
+        return access_token
+
+    async def create(self, create_dict: dict[str, Any]) -> AccessToken:
+        access_token = await self.database.create(create_dict)
+        self.cache.put(access_token)
+        return access_token
+
+    async def update(self, access_token: AccessToken, update_dict: dict[str, Any]) -> AccessToken:
+        access_token = await self.database.update(access_token, update_dict)
+        self.cache.put(access_token)
+        return access_token
+
+    async def delete(self, access_token: AccessToken) -> None:
+        self.cache.revoke(access_token.token)
+        # By key, so a cached (detached) token or one already purged is fine
+        session: AsyncSession = self.database.session
+        await session.execute(delete(AccessToken).where(AccessToken.token == access_token.token))
+        await session.commit()
+
+
+async def purge_expired_tokens(
+    session: AsyncSession, lifetime_seconds: int, batch_size: int, max_batches: int
+) -> int:
+    """
+    Delete tokens older than lifetime_seconds, batch_size rows per transaction.
+
+    Short transactions keep locks and WAL small; max_batches bounds one run,
+    the next run continues. Returns how many tokens were deleted.
+    """
+    created_before = datetime.now(timezone.utc) - timedelta(seconds=lifetime_seconds)
+    purged = 0
+    for _ in range(max_batches):
+        tokens = (
+            await session.scalars(
+                select(AccessToken.token)
+                .where(AccessToken.created_at < created_before)
+                .order_by(AccessToken.created_at)
+                .limit(batch_size)
+            )
+        ).all()
+        if not tokens:
+            break
+        await session.execute(delete(AccessToken).where(AccessToken.token.in_(tokens)))
+        await session.commit()
+        purged += len(tokens)
+        if len(tokens) < batch_size:
+            break
+    return purged
+
+
+access_token_cache = AccessTokenCache(
+    ttl_seconds=settings.access_token.cache_ttl_seconds,
+    negative_ttl_seconds=settings.access_token.negative_cache_ttl_seconds,
+    max_size=settings.access_token.cache_max_size,
+)
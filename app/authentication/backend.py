@@ -1,5 +1,7 @@
 from fastapi_users.authentication import AuthenticationBackend
 
+from config import settings
+
 from .strategy import get_database_strategy,get_jwt_strategy
 from .transport import bearer_transport
 
@@ -7,6 +9,9 @@ authentication_backend = AuthenticationBackend(
     name="access-tokens-db",
     # transport=cookie_transport,
     transport=bearer_transport,
-    get_strategy=get_jwt_strategy,
-    # get_strategy=get_database_strategy,
+    get_strategy=(
+        get_database_strategy
+        if settings.access_token.strategy == "database"
+        else get_jwt_strategy
+    ),
 )
@@ -11,4 +11,6 @@ fastapi_users = FastAPIUsers[User, int](
 )
 
 current_active_user = fastapi_users.current_user(active=True)
+# None for anonymous requests, e.g. to tag video uploads with their owner
+current_optional_user = fastapi_users.current_user(active=True, optional=True)
 current_active_superuser = fastapi_users.current_user(active=True, superuser=True)
@@ -0,0 +1,168 @@
+"""
+Password hashing off the event loop.
+
+Argon2 and bcrypt take tens of milliseconds of CPU per call, so hashing
+inside a request handler stalls every other request of the process.
+PasswordHasherPool runs them in a thread or process pool with at most
+max_workers calls at once. Callers beyond that wait their turn, and once
+max_waiting callers wait, new ones get 503 right away instead of piling up.
+"""
+
+import asyncio
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Optional
+
+from fastapi import HTTPException, status
+from fastapi_users.password import PasswordHelper
+from pwdlib import PasswordHash
+from pwdlib.hashers.argon2 import Argon2Hasher
+from pwdlib.hashers.bcrypt import BcryptHasher
+
+from config import settings
+from config.config import PasswordConfig
+
+EXECUTORS = ("thread", "process")
+
+
+@dataclass(frozen=True)
+class HashParams:
+    argon2_time_cost: int
+    argon2_memory_cost: int
+    argon2_parallelism: int
+    bcrypt_rounds: int
+
+    @classmethod
+    def from_config(cls, config: PasswordConfig) -> "HashParams":
+        return cls(
+            argon2_time_cost=config.argon2_time_cost,
+            argon2_memory_cost=config.argon2_memory_cost,
+            argon2_parallelism=config.argon2_parallelism,
+            bcrypt_rounds=config.bcrypt_rounds,
+        )
+
+
+@lru_cache(maxsize=None)
+def build_password_hash(params: HashParams) -> PasswordHash:
+    """
+    Argon2 for new hashes; bcrypt hashes are still verified.
+
+    verify_and_update returns a new hash when the stored one was made by
+    bcrypt or with other Argon2 parameters, so changing the parameters
+    rehashes passwords as their users log in.
+    """
+    return PasswordHash(
+        (
+            Argon2Hasher(
+                time_cost=params.argon2_time_cost,
+                memory_cost=params.argon2_memory_cost,
+                parallelism=params.argon2_parallelism,
+            ),
+            BcryptHasher(rounds=params.bcrypt_rounds),
+        )
+    )
+
+
+# Module-level so a process pool can pickle them
+def _hash(params: HashParams, password: str) -> str:
+    return build_password_hash(params).hash(password)
+
+
+def _verify_and_update(
+    params: HashParams, password: str, hashed_password: str
+) -> tuple[bool, Optional[str]]:
+    return build_password_hash(params).verify_and_update(password, hashed_password)
+
+
+@dataclass
+class HasherStats:
+    calls: int = 0
+    rejected: int = 0
+    running: int = 0
+    waiting: int = 0
+    queue_seconds_total: float = 0.0
+    queue_seconds_max: float = 0.0
+
+
+class PasswordHasherPool:
+    """Async password hashing in an executor with a concurrency cap and load shedding."""
+
+    def __init__(self, params: HashParams, executor: str, max_workers: int, max_waiting: int):
+        if executor not in EXECUTORS:
+            raise ValueError(f"Unknown password executor {executor!r}, expected one of {EXECUTORS}")
+        self.params = params
+        self.executor_kind = executor
+        self.max_workers = max_workers
+        self.max_waiting = max_waiting
+        self.stats = HasherStats()
+        self._executor: Optional[Executor] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+
+    @property
+    def helper(self) -> PasswordHelper:
+        """Synchronous helper with the same parameters, for the rare paths left inline."""
+        return PasswordHelper(build_password_hash(self.params))
+
+    async def hash(self, password: str) -> str:
+        return await self._run(_hash, self.params, password)
+
+    async def verify_and_update(
+        self, password: str, hashed_password: str
+    ) -> tuple[bool, Optional[str]]:
+        return await self._run(_verify_and_update, self.params, password, hashed_password)
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def _run(self, func, *args):
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_workers)
+        if self._slots.locked() and self.stats.waiting >= self.max_waiting:
+            self.stats.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Too many sign-ins at once, try again shortly",
+                headers={"Retry-After": "1"},
+            )
+
+        queued_at = time.perf_counter()
+        self.stats.waiting += 1
+        try:
+            await self._slots.acquire()
+        finally:
+            self.stats.waiting -= 1
+        queue_seconds = time.perf_counter() - queued_at
+        self.stats.calls += 1
+        self.stats.queue_seconds_total += queue_seconds
+        self.stats.queue_seconds_max = max(self.stats.queue_seconds_max, queue_seconds)
+
+        self.stats.running += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(
+                self._get_executor(), func, *args
+            )
+        finally:
+            self.stats.running -= 1
+            self._slots.release()
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.executor_kind == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="password"
+                )
+        return self._executor
+
+
+password_hasher = PasswordHasherPool(
+    HashParams.from_config(settings.password),
+    executor=settings.password.executor,
+    max_workers=settings.password.max_workers,
+    max_waiting=settings.password.max_waiting,
+)
@@ -1,15 +1,21 @@
-from typing import TYPE_CHECKING, Annotated
+from typing import TYPE_CHECKING, Annotated, Optional
 
+import jwt
 from fastapi import Depends
+from fastapi_users import BaseUserManager, exceptions
 from fastapi_users.authentication.strategy.db import (
     AccessTokenDatabase,
     DatabaseStrategy,
 )
 from fastapi_users.authentication import JWTStrategy
+from fastapi_users.jwt import decode_jwt, generate_jwt
 
 from config import settings
+from models import User
 
+from .access_tokens import CachedAccessTokenDatabase, access_token_cache
 from .helper.access_tokens import get_access_tokens_db
+from .user_cache import UserCache, token_version, user_cache
 
 
 if TYPE_CHECKING:
@@ -24,11 +30,64 @@ def get_database_strategy(
     ],
 ) -> DatabaseStrategy:
     return DatabaseStrategy(
-        database=access_tokens_db,
+        database=CachedAccessTokenDatabase(access_tokens_db, access_token_cache),
         lifetime_seconds=settings.access_token.lifetime_seconds,
     )
 
 
+class CachedJWTStrategy(JWTStrategy[User, int]):
+    """
+    JWTStrategy that loads users through a UserCache.
+
+    Tokens carry the token version of the user ("ver"); a token of an older
+    version, e.g. issued before a password change, is rejected.
+    """
+
+    def __init__(self, cache: UserCache, **kwargs):
+        super().__init__(**kwargs)
+        self.cache = cache
+
+    async def read_token(
+        self, token: Optional[str], user_manager: BaseUserManager[User, int]
+    ) -> Optional[User]:
+        if token is None:
+            return None
+
+        try:
+            data = decode_jwt(
+                token, self.decode_key, self.token_audience, algorithms=[self.algorithm]
+            )
+            user_id = data.get("sub")
+            if user_id is None:
+                return None
+            parsed_id = user_manager.parse_id(user_id)
+        except (jwt.PyJWTError, exceptions.InvalidID):
+            return None
+
+        version = data.get("ver")
+        if version is not None:
+            user = self.cache.get(parsed_id, version)
+            if user is not None:
+                return user
+
+        try:
+            user = await user_manager.get(parsed_id)
+        except exceptions.UserNotExists:
+            return None
+        if version is not None and version != token_version(user):
+            return None
+        self.cache.put(user)
+        return user
+
+    async def write_token(self, user: User) -> str:
+        data = {"sub": str(user.id), "ver": token_version(user), "aud": self.token_audience}
+        return generate_jwt(
+            data, self.encode_key, self.lifetime_seconds, algorithm=self.algorithm
+        )
+
+
 SECRET = "SECRET"
 def get_jwt_strategy() -> JWTStrategy:
-    return JWTStrategy(secret=SECRET, lifetime_seconds=3600)
+    return CachedJWTStrategy(
+        user_cache, secret=SECRET, lifetime_seconds=settings.access_token.lifetime_seconds
+    )
@@ -0,0 +1,67 @@
+from typing import Any, Optional
+
+from sqlalchemy import inspect
+from sqlalchemy.orm import make_transient_to_detached
+
+from config import settings
+from models import User
+
+from .ttl_cache import TTLCache
+
+
+def token_version(user: User) -> int:
+    """
+    Version of the tokens issued to a user.
+
+    A counter bumped by UserManager when the password is changed or reset,
+    which invalidates the tokens written before. Not derived from the password
+    hash: rehashing it with new parameters at login keeps the tokens valid.
+    """
+    return user.token_version
+
+
+class UserCache:
+    """
+    Users of authenticated requests, by (user id, token version).
+
+    Bounded LRU with a short TTL. Entries are invalidated by UserManager
+    hooks in this process; the TTL bounds how long other processes may
+    serve a stale user.
+    """
+
+    def __init__(self, ttl_seconds: float, max_size: int):
+        self._entries = TTLCache(ttl_seconds, max_size)
+
+    def get(self, user_id: Any, version: str) -> Optional[User]:
+        values = self._entries.get((user_id, version))
+        return None if values is None else self._restore(values)
+
+    def put(self, user: User) -> None:
+        values = {attr.key: getattr(user, attr.key) for attr in inspect(User).column_attrs}
+        self._entries.put((user.id, token_version(user)), values)
+
+    def invalidate(self, user_id: Any) -> None:
+        """Drop every cached version of a user."""
+        for key in self._entries.keys():
+            if key[0] == user_id:
+                self._entries.pop(key)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def _restore(values: dict[str, Any]) -> User:
+        # A new detached instance per request: sessions of concurrent requests
+        # never share it, and the user manager can still add it to update
+        user = User(**values)
+        make_transient_to_detached(user)
+        return user
+
+
+user_cache = UserCache(
+    ttl_seconds=settings.auth.user_cache_ttl_seconds,
+    max_size=settings.auth.user_cache_max_size,
+)
@@ -1,24 +1,94 @@
 import logging
-from typing import Optional, TYPE_CHECKING
+from typing import Any, Optional, TYPE_CHECKING
 
 from fastapi_users import (
     BaseUserManager,
     IntegerIDMixin,
+    exceptions,
+    schemas,
 )
 
 from config import settings
 from models import User
 
+from .password import PasswordHasherPool, password_hasher
+from .user_cache import token_version, user_cache
+
 if TYPE_CHECKING:
     from fastapi import Request
+    from fastapi.security import OAuth2PasswordRequestForm
 
 log = logging.getLogger(__name__)
 
 
 class UserManager(IntegerIDMixin, BaseUserManager[User, int]):
+    """
+    Hashes and verifies passwords of sign-up, login and password change in
+    the PasswordHasherPool instead of on the event loop.
+    """
+
     reset_password_token_secret = settings.access_token.reset_password_token_secret
     verification_token_secret = settings.access_token.verification_token_secret
 
+    def __init__(self, user_db, hasher: PasswordHasherPool = password_hasher):
+        super().__init__(user_db, password_helper=hasher.helper)
+        self.hasher = hasher
+
+    async def create(
+        self,
+        user_create: schemas.UC,
+        safe: bool = False,
+        request: Optional["Request"] = None,
+    ) -> User:
+        await self.validate_password(user_create.password, user_create)
+
+        existing_user = await self.user_db.get_by_email(user_create.email)
+        if existing_user is not None:
+            raise exceptions.UserAlreadyExists()
+
+        user_dict = (
+            user_create.create_update_dict()
+            if safe
+            else user_create.create_update_dict_superuser()
+        )
+        password = user_dict.pop("password")
+        user_dict["hashed_password"] = await self.hasher.hash(password)
+
+        created_user = await self.user_db.create(user_dict)
+        await self.on_after_register(created_user, request)
+        return created_user
+
+    async def authenticate(
+        self, credentials: "OAuth2PasswordRequestForm"
+    ) -> Optional[User]:
+        try:
+            user = await self.get_by_email(credentials.username)
+        except exceptions.UserNotExists:
+            # Hash anyway, so unknown emails take as long as wrong passwords
+            await self.hasher.hash(credentials.password)
+            return None
+
+        verified, updated_password_hash = await self.hasher.verify_and_update(
+            credentials.password, user.hashed_password
+        )
+        if not verified:
+            return None
+        # Made by bcrypt or with old parameters: store a hash with the current ones.
+        # The token version stays, so the other sessions of the user remain signed in
+        if updated_password_hash is not None:
+            await self.user_db.update(user, {"hashed_password": updated_password_hash})
+        return user
+
+    async def _update(self, user: User, update_dict: dict[str, Any]) -> User:
+        password = update_dict.get("password")
+        if password is not None:
+            await self.validate_password(password, user)
+            update_dict = {key: value for key, value in update_dict.items() if key != "password"}
+            update_dict["hashed_password"] = await self.hasher.hash(password)
+            # Change and reset both land here: sign out the tokens issued before
+            update_dict["token_version"] = token_version(user) + 1
+        return await super()._update(user, update_dict)
+
     async def on_after_register(
         self,
         user: User,
@@ -29,6 +99,36 @@ class UserManager(IntegerIDMixin, BaseUserManager[User, int]):
             user.id,
         )
 
+    async def on_after_update(
+        self,
+        user: User,
+        update_dict: dict[str, Any],
+        request: Optional["Request"] = None,
+    ):
+        # Covers deactivation and password change through update
+        user_cache.invalidate(user.id)
+
+    async def on_after_verify(
+        self,
+        user: User,
+        request: Optional["Request"] = None,
+    ):
+        user_cache.invalidate(user.id)
+
+    async def on_after_reset_password(
+        self,
+        user: User,
+        request: Optional["Request"] = None,
+    ):
+        user_cache.invalidate(user.id)
+
+    async def on_after_delete(
+        self,
+        user: User,
+        request: Optional["Request"] = None,
+    ):
+        user_cache.invalidate(user.id)
+
     async def on_after_request_verify(
         self,
         user: User,
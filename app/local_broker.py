@@ -0,0 +1,126 @@
+"""
+Brokers that need no RabbitMQ (see taskiq_broker for the modes).
+
+InProcessBroker runs tasks in the process that sends them, with bounded
+concurrency.
+
+SpoolBroker is a single-host stand-in for RabbitMQ. Messages are files in a spool directory shared by the API and the
+`taskiq worker` processes: kick writes a file atomically into queue/, and a
+worker claims it by renaming it into claimed/, which only one process can
+win. The file name starts with the enqueue time, so messages are consumed in
+FIFO order.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from pathlib import Path
+from typing import AsyncGenerator, Optional
+
+from taskiq import AckableMessage, AsyncBroker, BrokerMessage, InMemoryBroker
+from taskiq.exceptions import UnknownTaskError
+
+log = logging.getLogger(__name__)
+
+
+class InProcessBroker(InMemoryBroker):
+    """
+    InMemoryBroker running at most max_running tasks at once.
+
+    InMemoryBroker starts every kicked task right away; here the others wait
+    for a slot in FIFO order, like messages in a queue.
+    """
+
+    def __init__(self, max_running: int):
+        super().__init__()
+        self._slots = asyncio.Semaphore(max_running)
+        self._tasks: set[asyncio.Task] = set()
+
+    async def kick(self, message: BrokerMessage) -> None:
+        if self.find_task(message.task_name) is None:
+            raise UnknownTaskError(task_name=message.task_name)
+        task = asyncio.create_task(self._run(message.message))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, data: bytes) -> None:
+        async with self._slots:
+            await self.receiver.callback(message=data)
+
+    async def wait_all(self) -> None:
+        while self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+
+class SpoolBroker(AsyncBroker):
+    """Broker keeping messages as files in directory."""
+
+    def __init__(
+        self,
+        directory: str,
+        poll_interval: float = 0.2,
+        stale_after: float = 300.0,
+    ):
+        super().__init__()
+        self.queue_dir = Path(directory) / "queue"
+        self.claimed_dir = Path(directory) / "claimed"
+        self.poll_interval = poll_interval
+        # Claimed but never acknowledged (the worker died): put back on startup
+        self.stale_after = stale_after
+
+    async def startup(self) -> None:
+        await super().startup()
+        self.queue_dir.mkdir(parents=True, exist_ok=True)
+        self.claimed_dir.mkdir(parents=True, exist_ok=True)
+
+    async def kick(self, message: BrokerMessage) -> None:
+        name = f"{time.time_ns():020d}-{message.task_id}.msg"
+        await asyncio.to_thread(self._write, name, message.message)
+
+    def _write(self, name: str, data: bytes) -> None:
+        # Written under a dot name first, so workers never see a partial file
+        tmp_path = self.queue_dir / f".{name}"
+        tmp_path.write_bytes(data)
+        os.replace(tmp_path, self.queue_dir / name)
+
+    async def listen(self) -> AsyncGenerator[AckableMessage, None]:
+        await asyncio.to_thread(self._requeue_stale)
+        while True:
+            claimed = await asyncio.to_thread(self._claim_next)
+            if claimed is None:
+                await asyncio.sleep(self.poll_interval)
+                continue
+            path, data = claimed
+            yield AckableMessage(data=data, ack=self._acker(path))
+
+    def _claim_next(self) -> Optional[tuple[Path, bytes]]:
+        for name in sorted(os.listdir(self.queue_dir)):
+            if name.startswith("."):
+                continue
+            path = self.claimed_dir / name
+            try:
+                os.rename(self.queue_dir / name, path)
+            except FileNotFoundError:
+                continue  # claimed by another worker
+            # The claim time, not the enqueue time, decides when it is stale
+            os.utime(path)
+            return path, path.read_bytes()
+        return None
+
+    @staticmethod
+    def _acker(path: Path):
+        async def ack() -> None:
+            await asyncio.to_thread(path.unlink, True)
+
+        return ack
+
+    def _requeue_stale(self) -> None:
+        deadline = time.time() - self.stale_after
+        for path in self.claimed_dir.iterdir():
+            try:
+                if path.stat().st_mtime < deadline:
+                    os.rename(path, self.queue_dir / path.name)
+                    log.warning("Requeued unacknowledged message %s", path.name)
+            except FileNotFoundError:
+                continue
@@ -1,17 +1,23 @@
 import uvicorn
 from pathlib import Path
 from fastapi import FastAPI
-from fastapi.staticfiles import StaticFiles
 from config.config import settings
 from contextlib import asynccontextmanager
 from fastapi_pagination import add_pagination
 from models import db_helper, Base
+from models.schema_upgrade import upgrade_schema
 from api import router as api_router
+from api.media import router as media_router, media_fd_cache
+from api.metrics import router as metrics_router
 from fastapi.security import OAuth2PasswordBearer
 from taskiq_broker import broker
 import taskiq_fastapi
 from tasks import generate_video_task  # noqa: F401
+from outbox import outbox_relay
+from authentication.password import password_hasher
 from exceptions import setup_exception_handlers
+from video.status_bus import status_bus, status_hub
+from observability import RequestTimingMiddleware, TracingMiddleware, instrument_engine, tracer
 
 
 @asynccontextmanager
@@ -19,21 +25,33 @@ async def lifespan(app: FastAPI):
     # startup
     async with db_helper.engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+        # create_all skips existing tables; add columns introduced since
+        await conn.run_sync(upgrade_schema)
 
     # Create media directories if they don't exist
     Path("media/images").mkdir(parents=True, exist_ok=True)
     Path("media/videos").mkdir(parents=True, exist_ok=True)
+    Path(settings.upload.staging_dir).mkdir(parents=True, exist_ok=True)
 
     # Start broker if not in worker process
     if not broker.is_worker_process:
         await broker.startup()
+        # One status subscription per process, fanned out to SSE clients
+        await status_bus.consume(status_hub)
+        # Publishes task messages committed by requests
+        outbox_relay.start()
 
     yield
     # shutdown
+    await outbox_relay.stop()
+    password_hasher.shutdown()
+    tracer.flush()
     await db_helper.dispose()
+    media_fd_cache.close()
 
     # Shutdown broker if not in worker process
     if not broker.is_worker_process:
+        await status_bus.close()
         await broker.shutdown()
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
@@ -42,6 +60,17 @@ app = FastAPI(
     lifespan=lifespan,
 )
 
+# Query count, DB time, pool wait and serialization time per request
+instrument_engine(db_helper.engine)
+app.add_middleware(
+    RequestTimingMiddleware,
+    server_timing=settings.observability.server_timing,
+    log_requests=settings.observability.request_log,
+    record_metrics=settings.observability.metrics,
+)
+# A span per request, the root of the traces of uploads (see observability.tracing)
+app.add_middleware(TracingMiddleware, tracer=tracer)
+
 # Initialize taskiq-fastapi integration
 taskiq_fastapi.init(broker, "app.main:app")
 
@@ -50,8 +79,12 @@ app.include_router(
 )
 add_pagination(app)
 
-# Mount static files for media
-app.mount("/media", StaticFiles(directory="media"), name="media")
+# Media files: byte ranges, cache headers, zero-copy sends
+app.include_router(media_router)
+
+# Prometheus scrape target: API process and taskiq workers
+if settings.observability.metrics:
+    app.include_router(metrics_router)
 #setup_exception_handlers(main_app)
 
 if __name__ == "__main__":
@@ -7,6 +7,9 @@ __all__ = (
     "AccessToken",
     "VideoProject",
     "Image",
+    "UploadPart",
+    "StoredBlob",
+    "OutboxMessage",
 )
 
 from .db_helper import db_helper
@@ -15,5 +18,8 @@ from .post import Post
 from .recipe import Recipe,Allergen,Cuisine, RecipeAllergen, Ingredient, RecipeIngredient
 from .users import User
 from .access_token import AccessToken
-from .video_project import VideoProject, VideoStatus
+from .video_project import VideoProject, VideoStatus, VideoStage
 from .image import Image
+from .upload_part import UploadPart
+from .stored_blob import StoredBlob
+from .outbox_message import OutboxMessage
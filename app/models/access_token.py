@@ -2,6 +2,7 @@ from fastapi_users_db_sqlalchemy.access_token import (
     SQLAlchemyBaseAccessTokenTable,
 )
 from sqlalchemy import (
+    Index,
     Integer,
     ForeignKey,
 )
@@ -11,6 +12,17 @@ from .base import Base
 
 
 class AccessToken(SQLAlchemyBaseAccessTokenTable[int], Base):
+    __table_args__ = (
+        # Token lookup with the max-age check answered from the index on PostgreSQL
+        Index(
+            "ix_accesstoken_token_created_at",
+            "token",
+            "created_at",
+            postgresql_include=["user_id"],
+        ),
+        # Tokens of a user, e.g. for the cascade when the user is deleted
+        Index("ix_accesstoken_user_id", "user_id"),
+    )
 
     @declared_attr
     def user_id(cls) -> Mapped[int]:
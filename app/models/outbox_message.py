@@ -0,0 +1,30 @@
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import JSON, String, DateTime, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base import Base
+
+
+class OutboxMessage(Base):
+    """
+    A task message committed together with the change that requires it.
+
+    Rows are published to the broker and deleted by the outbox relay.
+    """
+
+    __tablename__ = "outbox_messages"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    task_name: Mapped[str] = mapped_column(String(200))
+    args: Mapped[list] = mapped_column(JSON, default=list)
+    # Trace of the request that added the message (see observability.tracing)
+    trace_parent: Mapped[Optional[str]] = mapped_column(String(55))
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now()
+    )
+
+    def __repr__(self):
+        return f"OutboxMessage(id={self.id}, task={self.task_name})"
@@ -0,0 +1,49 @@
+"""
+In-place schema upgrade for existing databases.
+
+The schema is created with Base.metadata.create_all, which skips tables that
+already exist, so columns and indexes added to a model later never reach an
+old database. upgrade_schema adds them. It only ever adds: no drops, renames
+or type changes. NOT NULL columns therefore need a server_default.
+"""
+
+import logging
+
+from sqlalchemy import Connection, inspect
+from sqlalchemy.schema import CreateColumn
+
+from .base import Base
+
+log = logging.getLogger(__name__)
+
+
+def upgrade_schema(conn: Connection) -> list[str]:
+    """Add missing columns and indexes to existing tables; returns what was added."""
+    inspector = inspect(conn)
+    existing_tables = set(inspector.get_table_names())
+    preparer = conn.dialect.identifier_preparer
+    added = []
+
+    for table in Base.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+
+        existing_columns = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing_columns:
+                continue
+            column_ddl = CreateColumn(column).compile(dialect=conn.dialect)
+            conn.exec_driver_sql(
+                f"ALTER TABLE {preparer.format_table(table)} ADD COLUMN {column_ddl}"
+            )
+            added.append(f"{table.name}.{column.name}")
+
+        existing_indexes = {index["name"] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing_indexes:
+                index.create(conn)
+                added.append(index.name)
+
+    if added:
+        log.info("Schema upgraded: %s", ", ".join(added))
+    return added
@@ -0,0 +1,25 @@
+from datetime import datetime
+
+from sqlalchemy import String, Integer, BigInteger, DateTime, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base import Base
+
+
+class StoredBlob(Base):
+    """A content-addressed file in storage and the number of rows referencing it."""
+
+    __tablename__ = "stored_blobs"
+
+    key: Mapped[str] = mapped_column(String(200), primary_key=True)
+    sha256: Mapped[str] = mapped_column(String(64))
+    size_bytes: Mapped[int] = mapped_column(BigInteger)
+    # Zero means unreferenced: the blob is removed by ContentStore.collect_garbage
+    refcount: Mapped[int] = mapped_column(Integer, default=1, index=True)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now()
+    )
+
+    def __repr__(self):
+        return f"StoredBlob(key={self.key}, refcount={self.refcount})"
@@ -0,0 +1,25 @@
+from sqlalchemy import String, Integer, BigInteger, ForeignKey, UniqueConstraint
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base import Base
+
+
+class UploadPart(Base):
+    """A file of a resumable upload that has not been finalized yet."""
+
+    __tablename__ = "upload_parts"
+    __table_args__ = (
+        UniqueConstraint("video_project_id", "order_index", name="uq_upload_parts_project_order"),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    video_project_id: Mapped[int] = mapped_column(
+        ForeignKey("video_projects.id", ondelete="CASCADE")
+    )
+    order_index: Mapped[int] = mapped_column(Integer)
+    filename: Mapped[str] = mapped_column(String(255))
+    # Declared length; the received offset is the size of the staging file
+    size_bytes: Mapped[int] = mapped_column(BigInteger)
+
+    def __repr__(self):
+        return f"UploadPart(project={self.video_project_id}, order={self.order_index})"
@@ -8,4 +8,7 @@ class User(SQLAlchemyBaseUserTable[int],Base):
     __tablename__ = "user"
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     first_name: Mapped[str | None] = mapped_column(String(100))
-    last_name: Mapped[str | None] = mapped_column(String(100))
\ No newline at end of file
+    last_name: Mapped[str | None] = mapped_column(String(100))
+    # Version of the issued tokens (see authentication.user_cache.token_version),
+    # bumped when the password is changed or reset
+    token_version: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
\ No newline at end of file
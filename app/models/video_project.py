@@ -1,6 +1,6 @@
 from datetime import datetime
 from enum import Enum
-from sqlalchemy import String, DateTime, func
+from sqlalchemy import JSON, String, DateTime, Float, Integer, Index, func
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from typing import Optional
 
@@ -8,22 +8,74 @@ from .base import Base
 
 
 class VideoStatus(str, Enum):
+    UPLOADING = "uploading"
     PENDING = "pending"
     PROCESSING = "processing"
     SUCCESS = "success"
     FAILED = "failed"
+    CANCELLED = "cancelled"
+
+
+class VideoStage(str, Enum):
+    QUEUED = "queued"
+    NORMALIZING = "normalizing"
+    ENCODING = "encoding"
+    DONE = "done"
 
 
 class VideoProject(Base):
     __tablename__ = "video_projects"
+    __table_args__ = (
+        # Listing: keyset pagination by id, optionally filtered by status or date
+        Index("ix_video_projects_status_id", "status", "id"),
+        Index("ix_video_projects_created_at", "created_at"),
+        # Lets the batch status endpoint answer from the index alone on PostgreSQL
+        Index(
+            "ix_video_projects_id_status",
+            "id",
+            "status",
+            postgresql_include=["video_path"],
+        ),
+        # Sweeper of stuck jobs: processing projects by lease expiry
+        Index("ix_video_projects_status_lease", "status", "lease_expires_at"),
+        # Render scheduler: next pending project of a lane, recent renders per owner
+        Index("ix_video_projects_status_lane_queued", "status", "lane", "queued_at"),
+        Index("ix_video_projects_heartbeat_at", "heartbeat_at"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
     status: Mapped[VideoStatus] = mapped_column(
         String(20),
         default=VideoStatus.PENDING
     )
+    stage: Mapped[VideoStage] = mapped_column(
+        String(20),
+        default=VideoStage.QUEUED,
+        # Server defaults let upgrade_schema add the columns to filled tables
+        server_default=VideoStage.QUEUED.value,
+    )
+    progress: Mapped[float] = mapped_column(Float, default=0.0, server_default="0")
+    eta_seconds: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    transition: Mapped[str] = mapped_column(String(20), default="none", server_default="none")
+    # "mp4" or "hls"; for HLS video_path is the master playlist
+    output_format: Mapped[str] = mapped_column(String(10), default="mp4", server_default="mp4")
     video_path: Mapped[Optional[str]] = mapped_column(String(500), nullable=True)
+    poster_path: Mapped[Optional[str]] = mapped_column(String(500), nullable=True)
+    # Other stored files of the output (HLS variant playlists and segments)
+    media_keys: Mapped[Optional[list[str]]] = mapped_column(JSON, nullable=True)
     error_message: Mapped[Optional[str]] = mapped_column(String(1000), nullable=True)
+    # Worker lease (see video.lease): owner, expiry extended by heartbeats, claims so far
+    lease_owner: Mapped[Optional[str]] = mapped_column(String(100), nullable=True)
+    lease_expires_at: Mapped[Optional[datetime]] = mapped_column(
+        DateTime(timezone=True), nullable=True
+    )
+    heartbeat_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+    attempts: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    # Scheduling (see video.scheduling): fair-share owner, estimated cost and lane
+    owner_key: Mapped[Optional[str]] = mapped_column(String(100), nullable=True)
+    render_cost: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+    lane: Mapped[str] = mapped_column(String(10), default="small", server_default="small")
+    queued_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True),
         server_default=func.now()
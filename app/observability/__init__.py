@@ -0,0 +1,42 @@
+"""
+Request and worker instrumentation.
+"""
+
+from .metrics import MetricsRegistry, registry
+from .query_budget import QueryBudgetExceeded, QueryLog, query_budget
+from .timing import (
+    RequestTimingMiddleware,
+    RequestTimings,
+    TimedRoute,
+    current_timings,
+    instrument_engine,
+)
+from .tracing import (
+    Span,
+    TaskTracingMiddleware,
+    Tracer,
+    TracingMiddleware,
+    current_span,
+    current_traceparent,
+    tracer,
+)
+
+__all__ = [
+    "MetricsRegistry",
+    "registry",
+    "QueryBudgetExceeded",
+    "QueryLog",
+    "query_budget",
+    "RequestTimingMiddleware",
+    "RequestTimings",
+    "TimedRoute",
+    "current_timings",
+    "instrument_engine",
+    "Span",
+    "TaskTracingMiddleware",
+    "Tracer",
+    "TracingMiddleware",
+    "current_span",
+    "current_traceparent",
+    "tracer",
+]
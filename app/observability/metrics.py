@@ -0,0 +1,315 @@
+"""
+In-process metrics in the Prometheus text exposition format.
+
+Counters, gauges and histograms live in a MetricsRegistry. Recording is
+a dictionary lookup and an addition, without locks: metrics are recorded
+from the event loop thread. Values computed on demand (queue depth, pool
+state) are registered as collectors and evaluated when /metrics is
+scraped.
+
+Every taskiq worker process has its own registry. Workers write it to
+metrics_dir every few seconds (see write_snapshot). /metrics in the API
+process adds the snapshots of live workers to its own values: counters
+and histograms are summed over the processes, like Prometheus'
+multiprocess mode.
+"""
+
+import asyncio
+import bisect
+import json
+import math
+import os
+import time
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Iterable, Sequence, Union
+
+LabelValues = tuple[str, ...]
+# (labels, value) of one sample a collector returns
+Sample = tuple[dict[str, str], float]
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+RENDER_BUCKETS = (0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0)
+
+
+class Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: dict[LabelValues, Any] = {}
+
+    def _key(self, labels: tuple) -> LabelValues:
+        if len(labels) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {labels}")
+        return tuple(str(value) for value in labels)
+
+    def state(self) -> dict[LabelValues, Any]:
+        return self._values
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, *labels: Any, amount: float = 1.0) -> None:
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0.0) + amount
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def set(self, value: float, *labels: Any) -> None:
+        self._values[self._key(labels)] = float(value)
+
+    def inc(self, *labels: Any, amount: float = 1.0) -> None:
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, *labels: Any, amount: float = 1.0) -> None:
+        self.inc(*labels, amount=-amount)
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, *labels: Any) -> None:
+        key = self._key(labels)
+        # [count per bucket..., +Inf count, sum]
+        state = self._values.get(key)
+        if state is None:
+            state = self._values[key] = [0] * (len(self.buckets) + 1) + [0.0]
+        state[bisect.bisect_left(self.buckets, value)] += 1
+        state[-1] += value
+
+    def time(self, *labels: Any) -> "_Timer":
+        """Context manager observing the duration of its block, unless it raised."""
+        return _Timer(self, labels)
+
+
+class _Timer:
+    def __init__(self, histogram: Histogram, labels: tuple):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self) -> "_Timer":
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback) -> None:
+        if exc_type is None:
+            self.histogram.observe(time.perf_counter() - self.started, *self.labels)
+
+
+Collector = Callable[[], Union[Iterable[Sample], Awaitable[Iterable[Sample]]]]
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: dict[str, Metric] = {}
+        self._collectors: list[tuple[Gauge, Collector]] = []
+
+    def _register(self, metric: Metric) -> Any:
+        existing = self._metrics.get(metric.name)
+        if existing is not None:
+            # Module reloads and tests register the same metric again
+            if type(existing) is not type(metric) or existing.labelnames != metric.labelnames:
+                raise ValueError(f"Metric {metric.name} already registered differently")
+            return existing
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def collector(
+        self, name: str, documentation: str, labelnames: Sequence[str], collect: Collector
+    ) -> None:
+        """Gauge whose samples collect returns at scrape time; collect may be async."""
+        self._collectors.append((self.gauge(name, documentation, labelnames), collect))
+
+    async def collect(self) -> None:
+        """Refresh collector gauges."""
+        for gauge, collect in self._collectors:
+            samples = collect()
+            if asyncio.iscoroutine(samples):
+                samples = await samples
+            gauge.state().clear()
+            for labels, value in samples:
+                gauge.set(value, *(labels[name] for name in gauge.labelnames))
+
+    def snapshot(self) -> dict[str, Any]:
+        """JSON-serializable state of the counters and histograms."""
+        return {
+            name: [[list(key), value] for key, value in metric.state().items()]
+            for name, metric in self._metrics.items()
+            if metric.kind != "gauge"
+        }
+
+    def render(self, snapshots: Iterable[dict[str, Any]] = ()) -> str:
+        """Text exposition of this registry plus snapshots of other processes."""
+        merged = {name: dict(metric.state()) for name, metric in self._metrics.items()}
+        for snapshot in snapshots:
+            for name, entries in snapshot.items():
+                metric = self._metrics.get(name)
+                if metric is None:
+                    continue
+                values = merged[name]
+                for key, value in entries:
+                    key = tuple(key)
+                    if metric.kind == "histogram":
+                        if key in values:
+                            value = [mine + theirs for mine, theirs in zip(values[key], value)]
+                        values[key] = value
+                    else:
+                        values[key] = values.get(key, 0.0) + value
+
+        lines = []
+        for name, metric in sorted(self._metrics.items()):
+            lines.append(f"# HELP {name} {_escape_help(metric.documentation)}")
+            lines.append(f"# TYPE {name} {metric.kind}")
+            for key, value in sorted(merged[name].items()):
+                labels = dict(zip(metric.labelnames, key))
+                if metric.kind == "histogram":
+                    lines.extend(_histogram_lines(name, metric.buckets, labels, value))
+                else:
+                    lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+def _histogram_lines(
+    name: str, buckets: tuple[float, ...], labels: dict[str, str], state: list
+) -> list[str]:
+    lines = []
+    cumulative = 0
+    for bound, count in zip((*buckets, math.inf), state):
+        cumulative += count
+        bucket_labels = {**labels, "le": _format_value(bound)}
+        lines.append(f"{name}_bucket{_format_labels(bucket_labels)} {cumulative}")
+    lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(state[-1])}")
+    lines.append(f"{name}_count{_format_labels(labels)} {cumulative}")
+    return lines
+
+
+def _format_labels(labels: dict[str, str]) -> str:
+    if not labels:
+        return ""
+    pairs = ",".join(f'{key}="{_escape_label(value)}"' for key, value in labels.items())
+    return "{" + pairs + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape_help(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("\n", "\\n")
+
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def write_snapshot(registry: MetricsRegistry, directory: Path) -> None:
+    """Write the registry of this process to directory/<pid>.json atomically."""
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / f"{os.getpid()}.json"
+    tmp_path = directory / f".{os.getpid()}.json"
+    tmp_path.write_text(json.dumps(registry.snapshot()))
+    os.replace(tmp_path, path)
+
+
+def read_snapshots(directory: Path, max_age: float) -> list[dict[str, Any]]:
+    """Snapshots of other processes written within max_age seconds."""
+    if not directory.is_dir():
+        return []
+    snapshots = []
+    deadline = time.time() - max_age
+    for path in directory.glob("*.json"):
+        if path.stem == str(os.getpid()):
+            continue
+        try:
+            if path.stat().st_mtime < deadline:
+                continue
+            snapshots.append(json.loads(path.read_text()))
+        except (OSError, ValueError):
+            continue  # replaced or removed meanwhile
+    return snapshots
+
+
+def remove_snapshot(directory: Path) -> None:
+    (directory / f"{os.getpid()}.json").unlink(missing_ok=True)
+
+
+registry = MetricsRegistry()
+
+# Metrics of the application; workers and the API process share the names
+
+HTTP_REQUEST_SECONDS = registry.histogram(
+    "http_request_duration_seconds",
+    "Time to handle an HTTP request, by route template.",
+    ("method", "route", "status"),
+)
+DB_POOL_CHECKOUT_SECONDS = registry.histogram(
+    "db_pool_checkout_seconds",
+    "Time to obtain a database connection from the pool.",
+)
+BROKER_PUBLISH_SECONDS = registry.histogram(
+    "broker_publish_duration_seconds",
+    "Time until the broker accepted a task message.",
+    ("task",),
+)
+BROKER_PUBLISHED = registry.counter(
+    "broker_messages_published_total",
+    "Task messages published from the outbox, by result.",
+    ("task", "result"),
+)
+TASK_SECONDS = registry.histogram(
+    "taskiq_task_duration_seconds",
+    "Time a task ran.",
+    ("task",),
+    buckets=RENDER_BUCKETS,
+)
+TASKS = registry.counter(
+    "taskiq_tasks_total",
+    "Tasks executed, by result.",
+    ("task", "result"),
+)
+RENDER_STAGE_SECONDS = registry.histogram(
+    "video_render_stage_duration_seconds",
+    "Time of a render stage (normalize, encode, store).",
+    ("stage", "profile"),
+    buckets=RENDER_BUCKETS,
+)
+RENDERS = registry.counter(
+    "video_renders_total",
+    "Finished renders, by result.",
+    ("profile", "result"),
+)
@@ -0,0 +1,67 @@
+"""
+Query budgets: the most SQL statements a block of code may execute.
+
+A missing eager-load option does not fail, it only adds one statement per
+row. query_budget makes that a test failure:
+
+    with query_budget(3):
+        await client.get("/api/receipts/1")
+
+Statements are counted per context, so only those executed by the block
+itself count, including code it awaits, but not other tasks sharing the
+engine. Counting is installed on first use and covers every engine.
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Iterator
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+@dataclass
+class QueryLog:
+    statements: list[str] = field(default_factory=list)
+
+    def __len__(self) -> int:
+        return len(self.statements)
+
+
+# Budgets of the current context, innermost last
+_active: ContextVar[tuple[QueryLog, ...]] = ContextVar("query_budgets", default=())
+_installed = False
+
+
+def _record(conn, cursor, statement, parameters, context, executemany) -> None:
+    for log in _active.get():
+        log.statements.append(statement)
+
+
+def _install() -> None:
+    global _installed
+    if not _installed:
+        event.listen(Engine, "before_cursor_execute", _record)
+        _installed = True
+
+
+@contextmanager
+def query_budget(max_queries: int) -> Iterator[QueryLog]:
+    """Fail with QueryBudgetExceeded if the block executes more than max_queries statements."""
+    _install()
+    log = QueryLog()
+    token = _active.set((*_active.get(), log))
+    try:
+        yield log
+    finally:
+        _active.reset(token)
+    if len(log) > max_queries:
+        listing = "\n".join(f"{idx}. {statement}" for idx, statement in enumerate(log.statements, 1))
+        raise QueryBudgetExceeded(
+            f"{len(log)} statements executed, the budget is {max_queries}:\n{listing}"
+        )
@@ -0,0 +1,25 @@
+"""
+Route labels for metrics and spans.
+"""
+
+import re
+
+from starlette.types import Scope
+
+
+def route_template(scope: Scope) -> str:
+    """
+    Path template of the matched route, e.g. /api/videos/{project_id}.
+
+    Rebuilt from the path and the path parameters, since the route of an
+    included router does not carry the prefix in every FastAPI version.
+    Unmatched paths share one label, so scanners cannot add label values.
+    """
+    if scope.get("route") is None:
+        return "unmatched"
+    path = scope["path"]
+    # Longer values first: a value may contain a shorter one
+    params = sorted(scope.get("path_params", {}).items(), key=lambda item: -len(str(item[1])))
+    for name, value in params:
+        path = re.sub(rf"/{re.escape(str(value))}(?=/|$)", f"/{{{name}}}", path, count=1)
+    return path
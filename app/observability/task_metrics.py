@@ -0,0 +1,67 @@
+"""
+Metrics of taskiq workers.
+
+TaskMetricsMiddleware times every task a worker executes. In a worker
+process it also writes the registry to the metrics directory every
+dump_interval seconds, so /metrics of the API process includes it. With
+the in-process broker tasks run in the API process and no snapshot is
+needed.
+"""
+
+import asyncio
+import logging
+import time
+from pathlib import Path
+from typing import Any, Optional
+
+from taskiq import TaskiqMessage, TaskiqMiddleware, TaskiqResult
+
+from .metrics import TASK_SECONDS, TASKS, registry, write_snapshot
+
+log = logging.getLogger(__name__)
+
+
+class TaskMetricsMiddleware(TaskiqMiddleware):
+    def __init__(self, metrics_dir: str, dump_interval: float):
+        super().__init__()
+        self.metrics_dir = Path(metrics_dir)
+        self.dump_interval = dump_interval
+        self._started: dict[str, float] = {}
+        self._dumper: Optional[asyncio.Task] = None
+
+    def pre_execute(self, message: TaskiqMessage) -> TaskiqMessage:
+        self._started[message.task_id] = time.perf_counter()
+        return message
+
+    def post_execute(self, message: TaskiqMessage, result: TaskiqResult[Any]) -> None:
+        started = self._started.pop(message.task_id, None)
+        if started is not None:
+            TASK_SECONDS.observe(time.perf_counter() - started, message.task_name)
+        TASKS.inc(message.task_name, "error" if result.is_err else "success")
+
+    async def startup(self) -> None:
+        if self.broker.is_worker_process:
+            self._dumper = asyncio.create_task(self._dump_periodically())
+
+    async def shutdown(self) -> None:
+        if self._dumper is None:
+            return
+        self._dumper.cancel()
+        try:
+            await self._dumper
+        except asyncio.CancelledError:
+            pass
+        self._dumper = None
+        # The last values stay visible until the snapshot ages out
+        self._dump()
+
+    async def _dump_periodically(self) -> None:
+        while True:
+            self._dump()
+            await asyncio.sleep(self.dump_interval)
+
+    def _dump(self) -> None:
+        try:
+            write_snapshot(registry, self.metrics_dir)
+        except OSError:
+            log.exception("Failed to write metrics snapshot")
@@ -0,0 +1,217 @@
+"""
+Per-request timing of the database and of response serialization.
+
+RequestTimingMiddleware keeps a RequestTimings object in a context variable
+for the duration of a request. SQLAlchemy cursor events of an instrumented
+engine add every statement of the request to it, and timing how long
+obtaining a connection took gives the pool wait. Endpoints of routers
+created with route_class=TimedRoute mark when they returned, so the time
+until the response starts is validation and serialization of the result.
+
+The numbers go into a Server-Timing header (shown by browser dev tools)
+and one log line per request. Request durations and pool checkouts are
+also recorded in the metrics registry (see observability.metrics).
+"""
+
+import functools
+import inspect
+import logging
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, Callable, Optional
+
+from fastapi.routing import APIRoute
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from .metrics import DB_POOL_CHECKOUT_SECONDS, HTTP_REQUEST_SECONDS
+from .routes import route_template
+from .tracing import current_span
+
+log = logging.getLogger(__name__)
+
+_QUERY_STARTS = "request_timing.query_starts"
+
+
+@dataclass
+class RequestTimings:
+    started: float
+    queries: int = 0
+    db_seconds: float = 0.0
+    pool_wait_seconds: float = 0.0
+    endpoint_done: Optional[float] = None
+    serialize_seconds: float = 0.0
+
+    def server_timing(self, now: float) -> str:
+        """Server-Timing header value; durations in milliseconds."""
+        metrics = [
+            f'db;dur={self.db_seconds * 1000:.1f};desc="{self.queries} queries"',
+            f"pool;dur={self.pool_wait_seconds * 1000:.1f}",
+        ]
+        if self.endpoint_done is not None:
+            metrics.append(f"ser;dur={self.serialize_seconds * 1000:.1f}")
+        metrics.append(f"total;dur={(now - self.started) * 1000:.1f}")
+        return ", ".join(metrics)
+
+
+_current: ContextVar[Optional[RequestTimings]] = ContextVar("request_timings", default=None)
+
+
+def current_timings() -> Optional[RequestTimings]:
+    """Timings of the request being handled; None outside requests, e.g. in workers."""
+    return _current.get()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    conn.info.setdefault(_QUERY_STARTS, []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    elapsed = time.perf_counter() - conn.info[_QUERY_STARTS].pop()
+    timings = _current.get()
+    if timings is not None:
+        timings.queries += 1
+        timings.db_seconds += elapsed
+    span = current_span()
+    if span is not None:
+        span.db_queries += 1
+        span.db_seconds += elapsed
+
+
+def _handle_error(exception_context) -> None:
+    # after_cursor_execute is not called for a failed statement
+    connection = exception_context.connection
+    if connection is not None and connection.info.get(_QUERY_STARTS):
+        connection.info[_QUERY_STARTS].pop()
+
+
+def instrument_engine(engine: AsyncEngine) -> None:
+    """Count statements and time statements and connection checkouts of engine."""
+    sync_engine = engine.sync_engine
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(sync_engine, "handle_error", _handle_error)
+
+    # The pool has no event before a checkout, so the checkout itself is timed;
+    # it includes opening a connection when the pool has no idle one
+    raw_connection = sync_engine.raw_connection
+
+    @functools.wraps(raw_connection)
+    def timed_raw_connection(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return raw_connection(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - started
+            DB_POOL_CHECKOUT_SECONDS.observe(elapsed)
+            timings = _current.get()
+            if timings is not None:
+                timings.pool_wait_seconds += elapsed
+
+    sync_engine.raw_connection = timed_raw_connection
+
+
+def _mark_endpoint_done(call: Callable[..., Any]) -> Callable[..., Any]:
+    if inspect.iscoroutinefunction(call):
+
+        @functools.wraps(call)
+        async def endpoint(*args, **kwargs):
+            try:
+                return await call(*args, **kwargs)
+            finally:
+                timings = _current.get()
+                if timings is not None:
+                    timings.endpoint_done = time.perf_counter()
+
+    else:
+
+        @functools.wraps(call)
+        def endpoint(*args, **kwargs):
+            try:
+                return call(*args, **kwargs)
+            finally:
+                timings = _current.get()
+                if timings is not None:
+                    timings.endpoint_done = time.perf_counter()
+
+    return endpoint
+
+
+class TimedRoute(APIRoute):
+    """APIRoute whose endpoint records when it returned, for the serialization time."""
+
+    def __init__(self, path: str, endpoint: Callable[..., Any], **kwargs: Any):
+        super().__init__(path, _mark_endpoint_done(endpoint), **kwargs)
+
+
+class RequestTimingMiddleware:
+    """ASGI middleware adding Server-Timing and logging the timings of every request."""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        server_timing: bool = True,
+        log_requests: bool = True,
+        record_metrics: bool = True,
+    ):
+        self.app = app
+        self.server_timing = server_timing
+        self.log_requests = log_requests
+        self.record_metrics = record_metrics
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings = RequestTimings(started=time.perf_counter())
+        token = _current.set(timings)
+        status_code = 500
+
+        async def send_with_timing(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                now = time.perf_counter()
+                if timings.endpoint_done is not None:
+                    timings.serialize_seconds = now - timings.endpoint_done
+                if self.server_timing:
+                    MutableHeaders(scope=message).append(
+                        "Server-Timing", timings.server_timing(now)
+                    )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
+            if self.record_metrics:
+                HTTP_REQUEST_SECONDS.observe(
+                    time.perf_counter() - timings.started,
+                    scope["method"],
+                    route_template(scope),
+                    status_code,
+                )
+            if self.log_requests:
+                self._log(scope, status_code, timings)
+
+    @staticmethod
+    def _log(scope: Scope, status_code: int, timings: RequestTimings) -> None:
+        fields = {
+            "method": scope["method"],
+            "path": scope["path"],
+            "status": status_code,
+            "duration_ms": round((time.perf_counter() - timings.started) * 1000, 1),
+            "queries": timings.queries,
+            "db_ms": round(timings.db_seconds * 1000, 1),
+            "pool_wait_ms": round(timings.pool_wait_seconds * 1000, 1),
+            "serialize_ms": round(timings.serialize_seconds * 1000, 1),
+        }
+        # key=value for plain logs; the dict for JSON formatters
+        log.info(
+            " ".join(f"{key}={value}" for key, value in fields.items()),
+            extra={"request_timing": fields},
+        )
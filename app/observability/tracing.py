@@ -0,0 +1,387 @@
+"""
+Tracing of a video from the upload request to the rendered result.
+
+A span is a named, timed piece of work. The current span lives in a
+context variable, so spans opened inside it become its children without
+passing anything around. The context crosses process boundaries as a W3C
+traceparent string: the HTTP header of incoming requests, the outbox row
+of a task message, and the taskiq message labels (TaskTracingMiddleware).
+
+Finished spans are queued and exported by a background thread, either
+appended to a JSON lines file or posted to an OTLP/HTTP collector. Both
+use the OTLP JSON span format. Without an exporter span() does nothing.
+"""
+
+import atexit
+import json
+import logging
+import os
+import random
+import re
+import threading
+import time
+import urllib.request
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Iterator, Optional
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from taskiq import TaskiqMessage, TaskiqMiddleware, TaskiqResult
+
+from config import settings
+from config.config import ObservabilityConfig
+
+from .routes import route_template
+
+log = logging.getLogger(__name__)
+
+TRACE_EXPORTERS = ("none", "jsonl", "otlp")
+TRACEPARENT_LABEL = "traceparent"
+
+_TRACEPARENT = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-[0-9a-f]{2}$")
+
+
+@dataclass
+class Span:
+    name: str
+    trace_id: str
+    span_id: str
+    parent_id: Optional[str]
+    start_ns: int
+    end_ns: Optional[int] = None
+    attributes: dict[str, Any] = field(default_factory=dict)
+    error: Optional[str] = None
+    # Statements executed while this span was the current one
+    db_queries: int = 0
+    db_seconds: float = 0.0
+
+    @property
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-01"
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def to_otlp(self) -> dict[str, Any]:
+        attributes = dict(self.attributes)
+        if self.db_queries:
+            attributes["db.queries"] = self.db_queries
+            attributes["db.seconds"] = round(self.db_seconds, 6)
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": _otlp_attributes(attributes),
+            # 1 = OK, 2 = ERROR
+            "status": {"code": 2, "message": self.error} if self.error else {"code": 1},
+        }
+        if self.parent_id:
+            span["parentSpanId"] = self.parent_id
+        return span
+
+
+def _otlp_attributes(attributes: dict[str, Any]) -> list[dict[str, Any]]:
+    result = []
+    for key, value in attributes.items():
+        if isinstance(value, bool):
+            typed = {"boolValue": value}
+        elif isinstance(value, int):
+            typed = {"intValue": str(value)}
+        elif isinstance(value, float):
+            typed = {"doubleValue": value}
+        else:
+            typed = {"stringValue": str(value)}
+        result.append({"key": key, "value": typed})
+    return result
+
+
+def parse_traceparent(value: Optional[str]) -> Optional[tuple[str, str]]:
+    """(trace_id, parent span_id) of a traceparent string; None if malformed."""
+    if not value:
+        return None
+    match = _TRACEPARENT.match(value.strip().lower())
+    return (match.group(1), match.group(2)) if match else None
+
+
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+def current_traceparent() -> Optional[str]:
+    """traceparent of the current span, to continue the trace elsewhere."""
+    span = _current_span.get()
+    return span.traceparent if span is not None else None
+
+
+class SpanExporter:
+    def export(self, spans: list[Span]) -> None:
+        raise NotImplementedError
+
+
+class JsonlSpanExporter(SpanExporter):
+    """Appends one OTLP JSON span per line; processes may share the file."""
+
+    def __init__(self, path: str, service_name: str):
+        self.path = Path(path)
+        self.service_name = service_name
+
+    def export(self, spans: list[Span]) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        lines = "".join(
+            json.dumps({"service": self.service_name, "pid": os.getpid(), **span.to_otlp()}) + "\n"
+            for span in spans
+        )
+        # A single append write per batch keeps lines of processes apart
+        fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, lines.encode())
+        finally:
+            os.close(fd)
+
+
+class OtlpHttpSpanExporter(SpanExporter):
+    """Posts spans to an OTLP/HTTP collector (JSON encoding)."""
+
+    def __init__(self, endpoint: str, service_name: str, timeout: float = 5.0):
+        self.endpoint = endpoint
+        self.service_name = service_name
+        self.timeout = timeout
+
+    def payload(self, spans: list[Span]) -> dict[str, Any]:
+        resource = {"service.name": self.service_name, "process.pid": os.getpid()}
+        return {
+            "resourceSpans": [
+                {
+                    "resource": {"attributes": _otlp_attributes(resource)},
+                    "scopeSpans": [
+                        {"scope": {"name": __name__}, "spans": [s.to_otlp() for s in spans]}
+                    ],
+                }
+            ]
+        }
+
+    def export(self, spans: list[Span]) -> None:
+        request = urllib.request.Request(
+            self.endpoint,
+            data=json.dumps(self.payload(spans)).encode(),
+            headers={"Content-Type": "application/json"},
+            method="POST",
+        )
+        with urllib.request.urlopen(request, timeout=self.timeout):
+            pass
+
+
+def build_exporter(config: ObservabilityConfig) -> Optional[SpanExporter]:
+    if config.trace_exporter == "none":
+        return None
+    if config.trace_exporter == "jsonl":
+        return JsonlSpanExporter(config.trace_file, config.trace_service_name)
+    if config.trace_exporter == "otlp":
+        return OtlpHttpSpanExporter(config.trace_otlp_endpoint, config.trace_service_name)
+    raise ValueError(
+        f"Unknown trace exporter: {config.trace_exporter}. Allowed: {', '.join(TRACE_EXPORTERS)}"
+    )
+
+
+class Tracer:
+    def __init__(
+        self,
+        exporter: Optional[SpanExporter],
+        flush_interval: float = 2.0,
+        max_queue: int = 10000,
+        batch_size: int = 512,
+    ):
+        self.exporter = exporter
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        # deque appends and pops are thread-safe; a full queue drops the oldest
+        self._queue: deque[Span] = deque(maxlen=max_queue)
+        self._wakeup = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._export_lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.exporter is not None
+
+    def start_span(
+        self, name: str, parent: Optional[str] = None, **attributes: Any
+    ) -> tuple[Span, Token]:
+        """
+        Open a span and make it the current one.
+
+        parent is a traceparent string continuing a trace from another
+        process; by default the current span is the parent.
+        """
+        remote = parse_traceparent(parent)
+        current = _current_span.get()
+        if remote is not None:
+            trace_id, parent_id = remote
+        elif current is not None:
+            trace_id, parent_id = current.trace_id, current.span_id
+        else:
+            trace_id, parent_id = f"{random.getrandbits(128):032x}", None
+        span = Span(
+            name=name,
+            trace_id=trace_id,
+            span_id=f"{random.getrandbits(64):016x}",
+            parent_id=parent_id,
+            start_ns=time.time_ns(),
+            attributes=attributes,
+        )
+        return span, _current_span.set(span)
+
+    def end_span(self, span: Span, token: Token, error: Optional[BaseException] = None) -> None:
+        """Close span, queue it for export and restore the previous current span."""
+        span.end_ns = time.time_ns()
+        if error is not None:
+            span.error = f"{type(error).__name__}: {error}"
+        self._queue.append(span)
+        if self._thread is None:
+            self._start_thread()
+        elif len(self._queue) >= self.batch_size:
+            self._wakeup.set()
+        _current_span.reset(token)
+
+    @contextmanager
+    def span(
+        self, name: str, parent: Optional[str] = None, **attributes: Any
+    ) -> Iterator[Optional[Span]]:
+        """Context manager around start_span and end_span; yields None when disabled."""
+        if self.exporter is None:
+            yield None
+            return
+        span, token = self.start_span(name, parent, **attributes)
+        try:
+            yield span
+        except BaseException as exc:
+            self.end_span(span, token, exc)
+            raise
+        self.end_span(span, token)
+
+    def _start_thread(self) -> None:
+        with self._start_lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name="span-exporter", daemon=True)
+            self._thread.start()
+            atexit.register(self.flush)
+
+    def _run(self) -> None:
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+
+    def flush(self) -> None:
+        """Export queued spans now, in batches."""
+        if self.exporter is None:
+            return
+        with self._export_lock:
+            while self._queue:
+                batch = []
+                while self._queue and len(batch) < self.batch_size:
+                    batch.append(self._queue.popleft())
+                try:
+                    self.exporter.export(batch)
+                except Exception as exc:
+                    # A missing collector must not break requests; the spans are lost
+                    log.warning("Failed to export %s spans: %r", len(batch), exc)
+
+
+class TracingMiddleware:
+    """ASGI middleware opening a span per HTTP request, continuing a traceparent header."""
+
+    def __init__(self, app: ASGIApp, tracer: "Tracer"):
+        self.app = app
+        self.tracer = tracer
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not self.tracer.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope["headers"])
+        traceparent = headers.get(b"traceparent", b"").decode("latin-1")
+        span, token = self.tracer.start_span(
+            f"{scope['method']} {scope['path']}",
+            traceparent,
+            **{"http.method": scope["method"], "http.target": scope["path"]},
+        )
+
+        async def send_with_status(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                span.set_attribute("http.status_code", message["status"])
+            await send(message)
+
+        error = None
+        try:
+            await self.app(scope, receive, send_with_status)
+        except BaseException as exc:
+            error = exc
+            raise
+        finally:
+            # Known once routed: spans of one endpoint share a name
+            route = route_template(scope)
+            span.name = f"{scope['method']} {route}"
+            span.set_attribute("http.route", route)
+            self.tracer.end_span(span, token, error)
+
+
+class TaskTracingMiddleware(TaskiqMiddleware):
+    """
+    Carries the trace through taskiq messages.
+
+    Sending adds the current traceparent to the message labels; executing
+    opens a span for the task under it.
+    """
+
+    def __init__(self, tracer: Tracer):
+        super().__init__()
+        self.tracer = tracer
+        self._spans: dict[str, tuple[Span, Token]] = {}
+
+    def pre_send(self, message: TaskiqMessage) -> TaskiqMessage:
+        traceparent = current_traceparent()
+        if traceparent is not None and TRACEPARENT_LABEL not in message.labels:
+            message.labels[TRACEPARENT_LABEL] = traceparent
+        return message
+
+    def pre_execute(self, message: TaskiqMessage) -> TaskiqMessage:
+        if self.tracer.enabled:
+            self._spans[message.task_id] = self.tracer.start_span(
+                f"task {message.task_name}",
+                message.labels.get(TRACEPARENT_LABEL),
+                **{"task.id": message.task_id, "task.args": json.dumps(message.args, default=str)},
+            )
+        return message
+
+    def post_execute(self, message: TaskiqMessage, result: TaskiqResult[Any]) -> None:
+        entry = self._spans.pop(message.task_id, None)
+        if entry is None:
+            return
+        span, token = entry
+        try:
+            self.tracer.end_span(span, token, result.error if result.is_err else None)
+        except ValueError:
+            # Executed in another context than pre_execute; the span is queued anyway
+            pass
+
+    def shutdown(self) -> None:
+        self.tracer.flush()
+
+
+tracer = Tracer(
+    build_exporter(settings.observability),
+    flush_interval=settings.observability.trace_flush_interval,
+    max_queue=settings.observability.trace_max_queue,
+)
@@ -0,0 +1,152 @@
+"""
+Transactional outbox for task messages.
+
+add_message writes the message into the caller's transaction, so it is stored
+if and only if the change that needs it is committed, and the request does not
+wait for the broker. OutboxRelay, running in the API process, publishes the
+rows in batches and deletes them once the broker confirmed them: the
+AioPikaBroker publishes on a channel with publisher confirms, so kiq returns
+only after RabbitMQ accepted the message.
+
+Delivery is at least once: a crash between publishing and deleting publishes
+the row again, which the tasks tolerate (see video.lease).
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Optional
+
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from taskiq import AsyncBroker
+
+from config.config import settings
+from models import OutboxMessage, db_helper
+from observability.metrics import BROKER_PUBLISH_SECONDS, BROKER_PUBLISHED
+from observability.tracing import current_traceparent, tracer
+from taskiq_broker import broker
+
+log = logging.getLogger(__name__)
+
+
+class UnknownTask(Exception):
+    pass
+
+
+def add_message(session: AsyncSession, task_name: str, *args: Any) -> None:
+    """Add a message for task_name to the current transaction of session."""
+    session.add(
+        OutboxMessage(task_name=task_name, args=list(args), trace_parent=current_traceparent())
+    )
+
+
+class OutboxRelay:
+    """Background task publishing outbox rows to the broker."""
+
+    def __init__(
+        self,
+        broker: AsyncBroker,
+        session_factory: async_sessionmaker[AsyncSession],
+        batch_size: int,
+        poll_interval: float,
+    ):
+        self.broker = broker
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    def notify(self) -> None:
+        """Publish without waiting for the next poll; call after committing messages."""
+        self._wakeup.set()
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            self._wakeup.clear()
+            try:
+                published = await self.publish_pending()
+            except Exception:
+                log.exception("Outbox relay failed")
+                published = 0
+            if published >= self.batch_size:
+                # A full batch: more rows are probably waiting
+                continue
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+            except TimeoutError:
+                pass
+
+    async def publish_pending(self) -> int:
+        """Publish one batch of outbox rows; returns how many were published."""
+        async with self.session_factory() as session:
+            # SKIP LOCKED lets relays of several API processes share the table
+            messages = (
+                await session.scalars(
+                    select(OutboxMessage)
+                    .order_by(OutboxMessage.id)
+                    .limit(self.batch_size)
+                    .with_for_update(skip_locked=True)
+                )
+            ).all()
+            if not messages:
+                return 0
+
+            # Publishing concurrently pipelines the confirms of the whole batch
+            results = await asyncio.gather(
+                *(self._publish(message) for message in messages),
+                return_exceptions=True,
+            )
+            done = []
+            for message, result in zip(messages, results):
+                if isinstance(result, UnknownTask):
+                    # Retrying cannot help a message nobody can handle
+                    log.error("Dropping outbox message %s: %s", message.id, result)
+                    done.append(message.id)
+                elif isinstance(result, BaseException):
+                    log.warning("Outbox message %s not published: %r", message.id, result)
+                else:
+                    done.append(message.id)
+
+            if done:
+                await session.execute(delete(OutboxMessage).where(OutboxMessage.id.in_(done)))
+            await session.commit()
+            return len(done)
+
+    async def _publish(self, message: OutboxMessage) -> None:
+        task = self.broker.find_task(message.task_name)
+        if task is None:
+            BROKER_PUBLISHED.inc(message.task_name, "unknown_task")
+            raise UnknownTask(f"Unknown task {message.task_name}")
+        started = time.perf_counter()
+        try:
+            # Continues the trace of the request; the span goes into the message labels
+            with tracer.span("outbox.publish", message.trace_parent, task=message.task_name):
+                await task.kiq(*message.args)
+        except Exception:
+            BROKER_PUBLISHED.inc(message.task_name, "failed")
+            raise
+        BROKER_PUBLISH_SECONDS.observe(time.perf_counter() - started, message.task_name)
+        BROKER_PUBLISHED.inc(message.task_name, "published")
+
+
+outbox_relay = OutboxRelay(
+    broker,
+    db_helper.session_factory,
+    batch_size=settings.broker.outbox_batch_size,
+    poll_interval=settings.broker.outbox_poll_interval,
+)
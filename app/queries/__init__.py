@@ -3,6 +3,7 @@ from .allergen_queries import AllergenQueries
 from .ingredient_queries import IngredientQueries
 from .cuisine_queries import CuisineQueries
 from .recipe_queries import RecipeQueries
+from .video_project_queries import VideoProjectQueries
 
 __all__ = [
     "PostQueries",
@@ -10,4 +11,5 @@ __all__ = [
     "IngredientQueries",
     "CuisineQueries",
     "RecipeQueries",
+    "VideoProjectQueries",
 ]
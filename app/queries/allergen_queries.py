@@ -3,6 +3,7 @@ from fastapi import Depends, HTTPException, status
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from models import db_helper, Allergen
+from .loading import strict_loading
 
 
 class AllergenQueries:
@@ -14,13 +15,13 @@ class AllergenQueries:
 
     async def get_all(self) -> list[Allergen]:
         """Get all allergens ordered by ID."""
-        stmt = select(Allergen).order_by(Allergen.id)
+        stmt = select(Allergen).options(*strict_loading()).order_by(Allergen.id)
         result = await self.session.scalars(stmt)
         return result.all()
 
     async def get_by_id(self, allergen_id: int) -> Allergen:
         """Get a single allergen by ID."""
-        allergen = await self.session.get(Allergen, allergen_id)
+        allergen = await self.session.get(Allergen, allergen_id, options=strict_loading())
         if not allergen:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
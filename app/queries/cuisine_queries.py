@@ -3,6 +3,7 @@ from fastapi import Depends, HTTPException, status
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from models import db_helper, Cuisine
+from .loading import strict_loading
 
 
 class CuisineQueries:
@@ -14,13 +15,13 @@ class CuisineQueries:
 
     async def get_all(self) -> list[Cuisine]:
         """Get all cuisines ordered by ID."""
-        stmt = select(Cuisine).order_by(Cuisine.id)
+        stmt = select(Cuisine).options(*strict_loading()).order_by(Cuisine.id)
         result = await self.session.scalars(stmt)
         return result.all()
 
     async def get_by_id(self, cuisine_id: int) -> Cuisine:
         """Get a single cuisine by ID."""
-        cuisine = await self.session.get(Cuisine, cuisine_id)
+        cuisine = await self.session.get(Cuisine, cuisine_id, options=strict_loading())
         if not cuisine:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
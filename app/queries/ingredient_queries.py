@@ -1,3 +1,4 @@
+import logging
 from typing import Set, Dict, Any, List
 from fastapi import Depends, HTTPException, status
 from sqlalchemy import select
@@ -5,7 +6,10 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 from sqlalchemy.orm import contains_eager
 from models import db_helper, Ingredient, Recipe, RecipeIngredient
-from utils import recipe_to_dict, build_recipe_response
+from utils import compile_recipe_shaper
+from .loading import strict_loading
+
+log = logging.getLogger(__name__)
 
 
 class IngredientQueries:
@@ -23,6 +27,7 @@ class IngredientQueries:
             selectinload(Recipe.cuisine),
             selectinload(Recipe.allergens),
             selectinload(Recipe.ingredients),  # ← только до RecipeIngredient
+            *strict_loading(),
         ]
 
         # Только если нужно показывать ингредиенты — догружаем ingredient
@@ -42,18 +47,10 @@ class IngredientQueries:
         result = await self.session.scalars(stmt)
         recipes = result.all()  # уже без дубликатов
 
-        # Теперь recipe_to_dict можно оставить как есть — он безопасен
-        shaped = []
-        for recipe in recipes:
-            try:
-                print(f"[DEBUG] Processing recipe {recipe.id}, include_set={include_set}")
-                data = recipe_to_dict(recipe, include_set)  # ← передаем include_set
-                print(f"[DEBUG] recipe_to_dict succeeded, data keys: {data.keys()}")
-                shaped.append(build_recipe_response(data, select_set, include_set))
-            except Exception as e:
-                print(f"[ERROR] Failed processing recipe {recipe.id}: {e}")
-                import traceback
-                traceback.print_exc()
-                raise
-
-        return shaped
+        # Одна специализированная функция на весь ответ вместо проверок select/include в каждой строке
+        shape = compile_recipe_shaper(select_set, include_set)
+        try:
+            return [shape(recipe) for recipe in recipes]
+        except Exception:
+            log.exception("Failed to shape recipes of ingredient %s", ingredient_id)
+            raise
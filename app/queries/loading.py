@@ -0,0 +1,20 @@
+"""
+Loader options shared by the read paths.
+
+With settings.db.raise_on_lazy_load every statement of the queries package
+gets raiseload("*"): touching a relationship that was not loaded by an
+explicit option raises instead of silently issuing a query per row. The
+wildcard reaches relationships of eagerly loaded objects too.
+"""
+
+from sqlalchemy.orm import raiseload
+from sqlalchemy.orm.interfaces import LoaderOption
+
+from config.config import settings
+
+
+def strict_loading() -> list[LoaderOption]:
+    """Options to add to a read statement; empty unless the debug mode is on."""
+    if settings.db.raise_on_lazy_load:
+        return [raiseload("*")]
+    return []
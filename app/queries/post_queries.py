@@ -3,6 +3,7 @@ from fastapi import Depends, HTTPException, status
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from models import db_helper, Post
+from .loading import strict_loading
 
 
 class PostQueries:
@@ -14,13 +15,13 @@ class PostQueries:
 
     async def get_all(self) -> list[Post]:
         """Get all posts ordered by ID."""
-        stmt = select(Post).order_by(Post.id)
+        stmt = select(Post).options(*strict_loading()).order_by(Post.id)
         result = await self.session.scalars(stmt)
         return result.all()
 
     async def get_by_id(self, post_id: int) -> Post:
         """Get a single post by ID."""
-        post = await self.session.get(Post, post_id)
+        post = await self.session.get(Post, post_id, options=strict_loading())
         if not post:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -6,6 +6,7 @@ from sqlalchemy.orm import selectinload
 from fastapi_pagination import Page
 from fastapi_pagination.ext.sqlalchemy import apaginate
 from models import db_helper, Recipe, RecipeIngredient
+from .loading import strict_loading
 
 
 class RecipeQueries:
@@ -22,10 +23,11 @@ class RecipeQueries:
             selectinload(Recipe.allergens),
             selectinload(Recipe.ingredients).selectinload(RecipeIngredient.ingredient),
             selectinload(Recipe.author),
+            *strict_loading(),
         )
 
-    async def get_all_paginated(self, recipe_filter) -> Page[Recipe]:
-        """Get all recipes with filtering and pagination."""
+    async def get_all_paginated(self, recipe_filter, transformer=None) -> Page[Recipe]:
+        """Get all recipes with filtering and pagination; transformer maps the page's recipes."""
         stmt = select(Recipe)
         stmt = recipe_filter.apply_filter(stmt)
         stmt = stmt.options(
@@ -33,9 +35,10 @@ class RecipeQueries:
             selectinload(Recipe.allergens),
             selectinload(Recipe.ingredients).selectinload(RecipeIngredient.ingredient),
             selectinload(Recipe.author),
+            *strict_loading(),
         )
         stmt = recipe_filter.sort(stmt)
-        return await apaginate(self.session, stmt)
+        return await apaginate(self.session, stmt, transformer=transformer)
 
     async def get_by_id(self, recipe_id: int) -> Recipe:
         """Get a single recipe by ID with all relationships."""
@@ -46,6 +49,7 @@ class RecipeQueries:
                 selectinload(Recipe.allergens),
                 selectinload(Recipe.ingredients).selectinload(RecipeIngredient.ingredient),
                 selectinload(Recipe.author),
+                *strict_loading(),
             )
             .where(Recipe.id == recipe_id)
         )
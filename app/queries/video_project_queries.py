@@ -0,0 +1,104 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Annotated, Optional, Sequence
+from fastapi import Depends, HTTPException, status
+from sqlalchemy import Row, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from models import db_helper, VideoProject
+from .loading import strict_loading
+
+
+def encode_cursor(project_id: int) -> str:
+    """Opaque keyset cursor pointing after the project with the given id."""
+    raw = json.dumps({"i": project_id})
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> int:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded))
+        return int(data["i"])
+    except (binascii.Error, ValueError, KeyError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+
+class VideoProjectQueries:
+    def __init__(
+        self,
+        session: Annotated[AsyncSession, Depends(db_helper.session_getter)],
+    ):
+        self.session = session
+
+    async def get_page(
+        self,
+        limit: int,
+        cursor: Optional[str] = None,
+        status_filter: Optional[str] = None,
+        created_from: Optional[datetime] = None,
+        created_to: Optional[datetime] = None,
+    ) -> tuple[list[VideoProject], Optional[str]]:
+        """
+        Get one page of projects, newest first, using keyset pagination.
+
+        Ids grow with creation time, so the key is the primary key alone: it is
+        unique, indexed and compares the same way on every backend.
+
+        Returns:
+            Projects of the page and the cursor of the next page (None on the last one)
+        """
+        stmt = select(VideoProject).options(selectinload(VideoProject.images), *strict_loading())
+
+        if status_filter is not None:
+            stmt = stmt.where(VideoProject.status == status_filter)
+        if created_from is not None:
+            stmt = stmt.where(VideoProject.created_at >= created_from)
+        if created_to is not None:
+            stmt = stmt.where(VideoProject.created_at < created_to)
+        if cursor is not None:
+            stmt = stmt.where(VideoProject.id < decode_cursor(cursor))
+
+        # One extra row tells whether there is a next page without a COUNT query
+        stmt = stmt.order_by(VideoProject.id.desc()).limit(limit + 1)
+
+        result = await self.session.scalars(stmt)
+        projects = result.all()
+
+        next_cursor = None
+        if len(projects) > limit:
+            projects = projects[:limit]
+            next_cursor = encode_cursor(projects[-1].id)
+        return projects, next_cursor
+
+    async def get_by_id(self, project_id: int) -> VideoProject:
+        """Get a single project by ID with its images."""
+        stmt = (
+            select(VideoProject)
+            .where(VideoProject.id == project_id)
+            .options(selectinload(VideoProject.images), *strict_loading())
+        )
+        project = await self.session.scalar(stmt)
+        if not project:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Video project {project_id} not found"
+            )
+        return project
+
+    async def get_statuses(
+        self, ids: list[int]
+    ) -> Sequence[Row[tuple[int, str, Optional[str]]]]:
+        """Get id, status and video_path of several projects, without loading entities."""
+        stmt = (
+            select(VideoProject.id, VideoProject.status, VideoProject.video_path)
+            .where(VideoProject.id.in_(ids))
+            .order_by(VideoProject.id)
+        )
+        result = await self.session.execute(stmt)
+        return result.all()
@@ -4,6 +4,7 @@ from .allergen_repository import AllergenRepository
 from .ingredient_repository import IngredientRepository
 from .cuisine_repository import CuisineRepository
 from .recipe_repository import RecipeRepository
+from .video_project_repository import VideoProjectRepository
 
 __all__ = [
     "BaseRepository",
@@ -12,4 +13,5 @@ __all__ = [
     "IngredientRepository",
     "CuisineRepository",
     "RecipeRepository",
+    "VideoProjectRepository",
 ]
@@ -0,0 +1,57 @@
+from datetime import datetime
+from typing import List, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+from sqlalchemy.orm import selectinload
+from models import VideoProject, UploadPart
+from models.video_project import VideoStatus
+from .base import BaseRepository
+
+
+class VideoProjectRepository(BaseRepository[VideoProject]):
+    """Repository for VideoProject database operations."""
+
+    def __init__(self, session: AsyncSession):
+        super().__init__(VideoProject, session)
+
+    async def get_with_images(self, project_id: int) -> Optional[VideoProject]:
+        """Get a project with its images loaded."""
+        stmt = (
+            select(VideoProject)
+            .options(selectinload(VideoProject.images))
+            .where(VideoProject.id == project_id)
+        )
+        return await self.session.scalar(stmt)
+
+    async def get_upload_parts(self, project_id: int) -> List[UploadPart]:
+        """Get pending resumable upload parts of a project in order."""
+        stmt = (
+            select(UploadPart)
+            .where(UploadPart.video_project_id == project_id)
+            .order_by(UploadPart.order_index)
+        )
+        result = await self.session.scalars(stmt)
+        return result.all()
+
+    async def get_upload_part(self, project_id: int, order_index: int) -> Optional[UploadPart]:
+        """Get a single resumable upload part."""
+        stmt = select(UploadPart).where(
+            UploadPart.video_project_id == project_id,
+            UploadPart.order_index == order_index,
+        )
+        return await self.session.scalar(stmt)
+
+    async def get_expired_uploads(self, created_before: datetime, limit: int) -> List[VideoProject]:
+        """Get resumable uploads that were started before created_before and never completed."""
+        stmt = (
+            select(VideoProject)
+            .options(selectinload(VideoProject.images))
+            .where(
+                VideoProject.status == VideoStatus.UPLOADING,
+                VideoProject.created_at < created_before,
+            )
+            .order_by(VideoProject.id)
+            .limit(limit)
+        )
+        result = await self.session.scalars(stmt)
+        return result.all()
@@ -15,7 +15,14 @@ from .video_project_schema import (
     VideoProjectRead,
     VideoProjectCreate,
     VideoProjectUploadResponse,
+    VideoProjectPage,
+    VideoProjectStatusRead,
+    VideoProjectStatusEvent,
     ImageSchema,
+    UploadFileDeclaration,
+    ResumableUploadCreate,
+    UploadPartRead,
+    ResumableUploadRead,
 )
 
 __all__ = [
@@ -37,5 +44,12 @@ __all__ = [
     "VideoProjectRead",
     "VideoProjectCreate",
     "VideoProjectUploadResponse",
+    "VideoProjectPage",
+    "VideoProjectStatusRead",
+    "VideoProjectStatusEvent",
     "ImageSchema",
+    "UploadFileDeclaration",
+    "ResumableUploadCreate",
+    "UploadPartRead",
+    "ResumableUploadRead",
 ]
@@ -2,12 +2,14 @@ from datetime import datetime
 from pydantic import BaseModel, Field
 from typing import Optional
 
-from models.video_project import VideoStatus
+from models.video_project import VideoStatus, VideoStage
 
 
 class ImageSchema(BaseModel):
     id: int
     image_url: str
+    # Small WebP preview, set once the video has been rendered
+    thumbnail_url: Optional[str] = None
     order_index: int
 
     model_config = {"from_attributes": True}
@@ -16,7 +18,14 @@ class ImageSchema(BaseModel):
 class VideoProjectRead(BaseModel):
     id: int
     status: VideoStatus
+    stage: VideoStage = VideoStage.QUEUED
+    progress: float = 0.0
+    eta_seconds: Optional[int] = None
+    transition: str = "none"
+    output_format: str = "mp4"
+    # MP4 file, or the HLS master playlist
     video_url: Optional[str] = None
+    poster_url: Optional[str] = None
     error_message: Optional[str] = None
     created_at: datetime
     updated_at: datetime
@@ -25,6 +34,53 @@ class VideoProjectRead(BaseModel):
     model_config = {"from_attributes": True}
 
 
+class VideoProjectPage(BaseModel):
+    items: list[VideoProjectRead]
+    next_cursor: Optional[str] = None
+
+
+class VideoProjectStatusRead(BaseModel):
+    id: int
+    status: VideoStatus
+    video_url: Optional[str] = None
+
+
+class VideoProjectStatusEvent(BaseModel):
+    id: int
+    status: VideoStatus
+    stage: VideoStage
+    progress: float
+    eta_seconds: Optional[int] = None
+    error_message: Optional[str] = None
+    video_url: Optional[str] = None
+
+
+class UploadFileDeclaration(BaseModel):
+    filename: str = Field(max_length=255)
+    size: int = Field(gt=0)
+
+
+class ResumableUploadCreate(BaseModel):
+    transition: str = "none"
+    output_format: str = "mp4"
+    files: list[UploadFileDeclaration] = Field(min_length=1)
+
+
+class UploadPartRead(BaseModel):
+    order_index: int
+    filename: str
+    size: int
+    offset: int
+
+
+class ResumableUploadRead(BaseModel):
+    id: int
+    status: VideoStatus
+    # Unfinished uploads are deleted after this moment
+    expires_at: datetime
+    parts: list[UploadPartRead]
+
+
 class VideoProjectCreate(BaseModel):
     pass
 
@@ -3,6 +3,7 @@ from .allergen_service import AllergenService
 from .ingredient_service import IngredientService
 from .cuisine_service import CuisineService
 from .recipe_service import RecipeService, RecipeIngredientData
+from .video_project_service import VideoProjectService
 
 __all__ = [
     "PostService",
@@ -11,4 +12,5 @@ __all__ = [
     "CuisineService",
     "RecipeService",
     "RecipeIngredientData",
+    "VideoProjectService",
 ]
@@ -0,0 +1,323 @@
+import asyncio
+import shutil
+from datetime import datetime, timedelta, timezone
+from typing import Annotated, List, Optional
+from fastapi import Depends, HTTPException, status
+from sqlalchemy import delete, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from config.config import settings
+from repositories import VideoProjectRepository
+from models import VideoProject, Image, UploadPart, db_helper
+from models.video_project import VideoStatus
+from models.unit_of_work import UnitOfWork
+from storage import content_store
+from video.progress import publish_project
+from video.scheduling import enqueue_render, schedule_render
+from video.uploads import StagedImage, finalize_part, received_bytes, resumable_part_path
+
+
+class VideoProjectService:
+    """Service for VideoProject business logic."""
+
+    def __init__(
+        self,
+        session: Annotated[AsyncSession, Depends(db_helper.session_getter)],
+    ):
+        self.uow = UnitOfWork(session)
+        self.repository = VideoProjectRepository(session)
+
+    async def create_from_staged(
+        self,
+        transition: str,
+        staged: List[StagedImage],
+        output_format: str = "mp4",
+        owner_key: Optional[str] = None,
+    ) -> VideoProject:
+        """Create a project from validated images waiting in the staging directory."""
+        video_project = VideoProject(
+            status=VideoStatus.PENDING,
+            transition=transition,
+            output_format=output_format,
+            owner_key=owner_key,
+        )
+        self.repository.save(video_project)
+        await self.uow.flush()
+
+        await self._store_images(video_project, staged)
+        self._schedule(video_project, staged)
+        await self.uow.commit()
+        return video_project
+
+    async def start_resumable(
+        self,
+        transition: str,
+        files: List[tuple[str, int]],
+        output_format: str = "mp4",
+        owner_key: Optional[str] = None,
+    ) -> tuple[VideoProject, List[UploadPart]]:
+        """Create a project waiting for its files to be uploaded in chunks."""
+        limits = settings.upload
+        if len(files) > limits.max_files:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Too many images. Limit: {limits.max_files}"
+            )
+        if any(size > limits.max_file_bytes for _, size in files):
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"File too large. Limit: {limits.max_file_bytes} bytes"
+            )
+        if sum(size for _, size in files) > limits.max_request_bytes:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"Upload too large. Limit: {limits.max_request_bytes} bytes"
+            )
+
+        video_project = VideoProject(
+            status=VideoStatus.UPLOADING,
+            transition=transition,
+            output_format=output_format,
+            owner_key=owner_key,
+        )
+        self.repository.save(video_project)
+        await self.uow.flush()
+
+        parts = [
+            UploadPart(
+                video_project_id=video_project.id,
+                order_index=idx,
+                filename=filename,
+                size_bytes=size,
+            )
+            for idx, (filename, size) in enumerate(files)
+        ]
+        self.repository.session.add_all(parts)
+        await self.uow.commit()
+        # created_at is set by the database and needed for the expiry time
+        await self.repository.session.refresh(video_project)
+        return video_project, parts
+
+    async def get_resumable(
+        self, project_id: int, owner_key: Optional[str] = None
+    ) -> tuple[VideoProject, List[UploadPart]]:
+        """Get a project that is still being uploaded, with its parts."""
+        video_project = await self.repository.get_one(project_id)
+        if not self._owned(video_project, owner_key) or video_project.status != VideoStatus.UPLOADING:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Upload {project_id} not found"
+            )
+        return video_project, await self.repository.get_upload_parts(project_id)
+
+    async def get_upload_part(self, project_id: int, order_index: int) -> UploadPart:
+        part = await self.repository.get_upload_part(project_id, order_index)
+        if not part:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Upload part {order_index} of upload {project_id} not found"
+            )
+        return part
+
+    async def complete_resumable(self, project_id: int, owner_key: Optional[str] = None) -> VideoProject:
+        """Validate all received files and turn the upload into a pending project."""
+        # Claim the upload first: of concurrent completes (a client retrying after
+        # a timeout) only one gets the row, the others wait for its transaction
+        # and then find it no longer uploading. A failed check rolls the claim back
+        stmt = (
+            update(VideoProject)
+            .where(VideoProject.id == project_id, VideoProject.status == VideoStatus.UPLOADING)
+            .values(status=VideoStatus.PENDING)
+            .returning(VideoProject.id)
+        )
+        if owner_key is not None:
+            stmt = stmt.where(VideoProject.owner_key == owner_key)
+        claimed = await self.repository.session.execute(stmt)
+        if claimed.scalar_one_or_none() is None:
+            await self.uow.rollback()
+            video_project = await self.repository.get_one(project_id)
+            if not self._owned(video_project, owner_key):
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail=f"Upload {project_id} not found"
+                )
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=f"Upload {project_id} is already {VideoStatus(video_project.status).value}"
+            )
+
+        try:
+            return await self._complete_claimed(project_id)
+        except BaseException:
+            await self.uow.rollback()
+            raise
+
+    async def _complete_claimed(self, project_id: int) -> VideoProject:
+        video_project = await self.repository.get_one(project_id)
+        parts = await self.repository.get_upload_parts(project_id)
+
+        incomplete = [
+            part.order_index
+            for part in parts
+            if received_bytes(resumable_part_path(project_id, part.order_index)) != part.size_bytes
+        ]
+        if incomplete:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=f"Parts not fully uploaded: {', '.join(map(str, incomplete))}"
+            )
+
+        staged = []
+        for part in parts:
+            part_path = resumable_part_path(project_id, part.order_index)
+            try:
+                staged.append(await finalize_part(part_path, part.filename))
+            except HTTPException as exc:
+                # The offset already equals the size, so a broken file could never
+                # be fixed by PATCH: reset it to let the client upload it again
+                await asyncio.to_thread(part_path.unlink, True)
+                raise HTTPException(
+                    status_code=exc.status_code,
+                    detail=f"{exc.detail}. Part {part.order_index} was reset, upload it again from offset 0",
+                )
+        await self._store_images(video_project, staged)
+
+        for part in parts:
+            await self.repository.session.delete(part)
+        self._schedule(video_project, staged)
+        await self.uow.commit()
+
+        staging_dir = resumable_part_path(project_id, 0).parent
+        await asyncio.to_thread(shutil.rmtree, staging_dir, True)
+        return video_project
+
+    async def expire_resumable(self, limit: int = 100) -> int:
+        """Delete resumable uploads older than the upload TTL with their staging files."""
+        created_before = datetime.now(timezone.utc) - timedelta(
+            seconds=settings.upload.resumable_ttl_seconds
+        )
+        expired = await self.repository.get_expired_uploads(created_before, limit)
+        for video_project in expired:
+            await content_store.release_project(self.repository.session, video_project)
+            await self.repository.session.execute(
+                delete(UploadPart).where(UploadPart.video_project_id == video_project.id)
+            )
+            await self.repository.session.delete(video_project)
+        await self.uow.commit()
+
+        for video_project in expired:
+            staging_dir = resumable_part_path(video_project.id, 0).parent
+            await asyncio.to_thread(shutil.rmtree, staging_dir, True)
+        return len(expired)
+
+    async def cancel(self, project_id: int, owner_key: Optional[str] = None) -> VideoProject:
+        """
+        Cancel a project that has not finished yet.
+
+        A queued render message is skipped when it is dequeued, and a running
+        render notices the status within video.cancel_check_interval and stops.
+        With owner_key, projects of other owners are reported as not found.
+        """
+        stmt = (
+            update(VideoProject)
+            .where(
+                VideoProject.id == project_id,
+                VideoProject.status.in_(
+                    (VideoStatus.UPLOADING, VideoStatus.PENDING, VideoStatus.PROCESSING)
+                ),
+            )
+            .values(status=VideoStatus.CANCELLED, eta_seconds=None)
+            .returning(VideoProject.id)
+        )
+        if owner_key is not None:
+            stmt = stmt.where(VideoProject.owner_key == owner_key)
+        result = await self.repository.session.execute(stmt)
+        if result.scalar_one_or_none() is None:
+            video_project = await self.repository.get_one(project_id)
+            if not self._owned(video_project, owner_key):
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail=f"Video project {project_id} not found"
+                )
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=f"Video project {project_id} is already {VideoStatus(video_project.status).value}"
+            )
+
+        # Chunks of an unfinished upload are useless now
+        await self.repository.session.execute(
+            delete(UploadPart).where(UploadPart.video_project_id == project_id)
+        )
+        await self.uow.commit()
+        await asyncio.to_thread(
+            shutil.rmtree, resumable_part_path(project_id, 0).parent, True
+        )
+
+        video_project = await self.repository.get_one(project_id)
+        await self.repository.session.refresh(video_project)
+        await publish_project(video_project)
+        return video_project
+
+    async def delete(self, project_id: int, owner_key: Optional[str] = None) -> None:
+        """
+        Delete a project with its files, stopping its render if one is running.
+
+        The files are shared by content, so only the references are dropped;
+        unreferenced blobs are deleted by the garbage collection task.
+        """
+        video_project = await self.repository.get_with_images(project_id)
+        if not self._owned(video_project, owner_key):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Video project {project_id} not found"
+            )
+        await content_store.release_project(self.repository.session, video_project)
+        await self.repository.session.execute(
+            delete(UploadPart).where(UploadPart.video_project_id == project_id)
+        )
+        await self.repository.delete(video_project)
+        await self.uow.commit()
+        await asyncio.to_thread(
+            shutil.rmtree, resumable_part_path(project_id, 0).parent, True
+        )
+
+        # Lets open event streams of the project end
+        video_project.status = VideoStatus.CANCELLED
+        await publish_project(video_project)
+
+    @staticmethod
+    def _owned(video_project: Optional[VideoProject], owner_key: Optional[str]) -> bool:
+        """The project exists and, if an owner is given, belongs to it."""
+        if video_project is None:
+            return False
+        return owner_key is None or video_project.owner_key == owner_key
+
+    def _schedule(self, video_project: VideoProject, staged: List[StagedImage]) -> None:
+        """Queue a pending project; its render message commits with the project."""
+        schedule_render(
+            video_project,
+            [(staged_image.width, staged_image.height) for staged_image in staged],
+            settings.video,
+            settings.scheduler.small_lane_max_cost,
+        )
+        enqueue_render(self.repository.session, video_project)
+
+    async def _store_images(self, video_project: VideoProject, staged: List[StagedImage]) -> None:
+        """Move staged files to content-addressed storage and add their Image rows."""
+        for idx, staged_image in enumerate(staged):
+            key = await content_store.add(
+                self.repository.session,
+                staged_image.path,
+                staged_image.sha256,
+                staged_image.extension,
+            )
+            self.repository.session.add(
+                Image(
+                    video_project_id=video_project.id,
+                    image_path=key,
+                    order_index=idx,
+                    sha256=staged_image.sha256,
+                    size_bytes=staged_image.size_bytes,
+                    width=staged_image.width,
+                    height=staged_image.height,
+                )
+            )
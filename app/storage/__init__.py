@@ -0,0 +1,60 @@
+"""
+Media storage.
+
+Image.image_path and VideoProject.video_path hold logical keys; this package
+maps them to files on disk and to public URLs. Paths written before the
+content store existed ("media/images/...") are still resolved as-is.
+"""
+
+from pathlib import Path
+
+from config.config import StorageConfig, settings
+from .base import StorageBackend
+from .content import ContentStore, blob_key, file_sha256
+from .local import LocalStorage
+from .object_storage import LocalObjectStorage
+
+LEGACY_PREFIX = "media/"
+
+
+def build_backend(config: StorageConfig) -> StorageBackend:
+    root = Path(config.root)
+    if config.backend == "local":
+        return LocalStorage(root)
+    if config.backend == "object":
+        return LocalObjectStorage(root, config.bucket)
+    raise ValueError(f"Unknown storage backend: {config.backend}")
+
+
+storage_backend = build_backend(settings.storage)
+
+
+def local_path(key: str) -> Path:
+    """File of a stored key on the local filesystem."""
+    if key.startswith(LEGACY_PREFIX):
+        return Path(key)
+    return storage_backend.local_path(key)
+
+
+def public_path(key: str) -> str:
+    """URL path a stored key is served under."""
+    if key.startswith(LEGACY_PREFIX):
+        return f"/{key}"
+    return storage_backend.public_path(key)
+
+
+content_store = ContentStore(storage_backend)
+
+__all__ = [
+    "StorageBackend",
+    "LocalStorage",
+    "LocalObjectStorage",
+    "ContentStore",
+    "blob_key",
+    "file_sha256",
+    "build_backend",
+    "storage_backend",
+    "content_store",
+    "local_path",
+    "public_path",
+]
@@ -0,0 +1,26 @@
+from abc import ABC, abstractmethod
+from pathlib import Path
+
+
+class StorageBackend(ABC):
+    """Blob storage addressed by logical keys such as "blobs/ab/cd/<sha256>.png"."""
+
+    @abstractmethod
+    async def put_file(self, src: Path, key: str) -> None:
+        """Move a local file into storage under key."""
+
+    @abstractmethod
+    async def exists(self, key: str) -> bool:
+        """Check whether an object is stored under key."""
+
+    @abstractmethod
+    async def delete(self, key: str) -> None:
+        """Delete an object; missing objects are ignored."""
+
+    @abstractmethod
+    def local_path(self, key: str) -> Path:
+        """Path of the object on the local filesystem, for ffmpeg and Pillow."""
+
+    @abstractmethod
+    def public_path(self, key: str) -> str:
+        """URL path the object is served under."""
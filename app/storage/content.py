@@ -0,0 +1,127 @@
+import asyncio
+import hashlib
+from pathlib import Path
+from typing import Any
+
+from sqlalchemy import delete, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models.stored_blob import StoredBlob
+from .base import StorageBackend
+
+# session.info entry with the keys this session wrote files for
+_WRITTEN_KEYS = "content_store.written"
+
+
+def blob_key(sha256: str, extension: str) -> str:
+    """Key of a blob: sharded by the first two bytes of its hash, ab/cd/abcd...ext."""
+    return f"blobs/{sha256[:2]}/{sha256[2:4]}/{sha256}{extension}"
+
+
+def file_sha256(path: Path) -> str:
+    with open(path, "rb") as f:
+        return hashlib.file_digest(f, "sha256").hexdigest()
+
+
+class ContentStore:
+    """
+    Content-addressed blobs on top of a StorageBackend.
+
+    Identical files are stored once and shared through a reference count kept
+    in the stored_blobs table. Methods work inside the caller's transaction and
+    never commit, except collect_garbage which owns its session.
+    """
+
+    def __init__(self, backend: StorageBackend):
+        self.backend = backend
+
+    async def add(
+        self, session: AsyncSession, src: Path, sha256: str, extension: str
+    ) -> str:
+        """Store a local file (consuming it) and take a reference; returns its key."""
+        key = blob_key(sha256, extension)
+        if await self._take_reference(session, key):
+            await asyncio.to_thread(src.unlink, True)
+            return key
+
+        size_bytes = (await asyncio.to_thread(src.stat)).st_size
+        await self.backend.put_file(src, key)
+        session.info.setdefault(_WRITTEN_KEYS, set()).add(key)
+        try:
+            # Savepoint: a concurrent upload of the same content may insert first
+            async with session.begin_nested():
+                session.add(
+                    StoredBlob(key=key, sha256=sha256, size_bytes=size_bytes, refcount=1)
+                )
+        except IntegrityError:
+            await self._take_reference(session, key)
+        return key
+
+    async def add_file(self, session: AsyncSession, src: Path, extension: str) -> str:
+        """Like add, hashing the file first."""
+        sha256 = await asyncio.to_thread(file_sha256, src)
+        return await self.add(session, src, sha256, extension)
+
+    async def release(self, session: AsyncSession, key: str) -> None:
+        """Drop a reference. Files are deleted later by collect_garbage."""
+        await session.execute(
+            update(StoredBlob)
+            .where(StoredBlob.key == key, StoredBlob.refcount > 0)
+            .values(refcount=StoredBlob.refcount - 1)
+        )
+
+    async def release_project(self, session: AsyncSession, project: Any) -> None:
+        """Drop the references a video project holds: images, previews and rendered video."""
+        keys = [project.video_path, project.poster_path, *(project.media_keys or ())]
+        for image in project.images:
+            keys += [image.image_path, image.thumbnail_path]
+        for key in keys:
+            if key:
+                await self.release(session, key)
+
+    async def discard_uncommitted(self, session: AsyncSession) -> int:
+        """
+        Delete files add wrote in a transaction that was rolled back.
+
+        Call after session.rollback(); files whose blob row got committed, by
+        this or another session, are kept. Returns how many were deleted.
+        """
+        keys = session.info.pop(_WRITTEN_KEYS, set())
+        if not keys:
+            return 0
+        committed = set(
+            (await session.scalars(select(StoredBlob.key).where(StoredBlob.key.in_(keys)))).all()
+        )
+        orphans = keys - committed
+        for key in orphans:
+            await self.backend.delete(key)
+        return len(orphans)
+
+    async def collect_garbage(self, session: AsyncSession, limit: int = 500) -> int:
+        """Delete unreferenced blobs; returns how many were removed."""
+        keys = (
+            await session.scalars(
+                select(StoredBlob.key).where(StoredBlob.refcount == 0).limit(limit)
+            )
+        ).all()
+
+        removed = 0
+        for key in keys:
+            # Re-check the count: the blob may have been referenced again meanwhile
+            result = await session.execute(
+                delete(StoredBlob).where(StoredBlob.key == key, StoredBlob.refcount == 0)
+            )
+            if result.rowcount:
+                await self.backend.delete(key)
+                removed += 1
+            await session.commit()
+        return removed
+
+    async def _take_reference(self, session: AsyncSession, key: str) -> bool:
+        result = await session.execute(
+            update(StoredBlob)
+            .where(StoredBlob.key == key)
+            .values(refcount=StoredBlob.refcount + 1)
+        )
+        return bool(result.rowcount)
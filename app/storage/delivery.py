@@ -0,0 +1,316 @@
+"""
+Serving stored media over HTTP.
+
+MediaFileResponse replaces StaticFiles for /media: single byte ranges for
+seeking, strong ETags with If-None-Match / If-Range, immutable caching of
+content-addressed blobs. Open descriptors of hot files are kept in
+FileDescriptorCache, so a request for a cached immutable blob costs no
+open/stat syscalls.
+
+Zero-copy: an ASGI application never sees the socket, so sendfile(2) is only
+possible through the server. The body is sent by the first available of:
+
+- X-Accel-Redirect (settings.storage.accel_redirect_prefix): nginx in front
+  of the app serves the file with sendfile, ranges included;
+- the http.response.zerocopysend / http.response.pathsend ASGI extensions
+  (e.g. granian offers pathsend);
+- os.pread from the cached descriptor in a worker thread. This is what plain
+  uvicorn gets: one thread hop and one copy per chunk_size bytes.
+  benchmarks/media_delivery.py measures it.
+"""
+
+import asyncio
+import mimetypes
+import os
+import re
+import stat
+from collections import OrderedDict
+from email.utils import formatdate
+from pathlib import Path
+from typing import Optional
+
+from starlette.datastructures import Headers
+from starlette.responses import Response
+from starlette.types import Receive, Scope, Send
+
+# blobs/ab/cd/<sha256>.<ext>; the hash in the name makes the URL immutable
+_CONTENT_ADDRESSED = re.compile(r"(?:^|/)blobs/[0-9a-f]{2}/[0-9a-f]{2}/([0-9a-f]{64})\.[A-Za-z0-9]+$")
+_RANGE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+# Not known to every platform's mimetypes table
+mimetypes.add_type("application/vnd.apple.mpegurl", ".m3u8")
+mimetypes.add_type("video/mp2t", ".ts")
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "public, no-cache"
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+def content_hash(path: str) -> Optional[str]:
+    """SHA-256 from a content-addressed media path, or None for other files."""
+    match = _CONTENT_ADDRESSED.search(path)
+    return match.group(1) if match else None
+
+
+def parse_range(header: Optional[str], size: int) -> Optional[tuple[int, int]]:
+    """
+    Inclusive (start, end) of a single "bytes=" range.
+
+    None means the header is absent or not worth honouring (several ranges,
+    other units, malformed) and the whole file is sent, as RFC 9110 allows.
+    """
+    if not header:
+        return None
+    match = _RANGE.match(header.strip())
+    if not match:
+        return None
+
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0 or size == 0:
+            raise RangeNotSatisfiable()
+        return max(size - length, 0), size - 1
+
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise RangeNotSatisfiable()
+    return start, end
+
+
+class CachedFile:
+    __slots__ = ("fd", "size", "mtime", "identity", "users", "evicted")
+
+    def __init__(self, fd: int, stat_result: os.stat_result):
+        self.fd = fd
+        self.size = stat_result.st_size
+        self.mtime = stat_result.st_mtime
+        self.identity = (stat_result.st_ino, stat_result.st_mtime_ns, stat_result.st_size)
+        self.users = 0
+        self.evicted = False
+
+
+class FileDescriptorCache:
+    """
+    LRU of open read-only descriptors.
+
+    Reads go through os.pread, so one descriptor is shared by concurrent
+    requests. Evicted descriptors are closed once their last user releases
+    them. Only touched from the event loop thread.
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._entries: OrderedDict[Path, CachedFile] = OrderedDict()
+
+    async def acquire(self, path: Path, immutable: bool) -> CachedFile:
+        entry = self._entries.get(path)
+        if entry is not None and not immutable:
+            # Mutable files may have been replaced since they were opened. The
+            # entry is held during the stat: other requests may evict it
+            # meanwhile, which must not close its descriptor under us
+            entry.users += 1
+            try:
+                stat_result = await asyncio.to_thread(os.stat, path)
+            except FileNotFoundError:
+                self._evict_entry(path, entry)
+                self.release(entry)
+                raise
+            except BaseException:
+                self.release(entry)
+                raise
+            if (stat_result.st_ino, stat_result.st_mtime_ns, stat_result.st_size) == entry.identity:
+                if self._entries.get(path) is entry:
+                    self._entries.move_to_end(path)
+                # Still the same file even if evicted meanwhile; closed on the last release
+                return entry
+            self._evict_entry(path, entry)
+            self.release(entry)
+            entry = None
+
+        if entry is None:
+            entry = await asyncio.to_thread(self._open, path)
+            current = self._entries.get(path)
+            if current is not None and current.identity == entry.identity:
+                # Opened concurrently by another request
+                os.close(entry.fd)
+                entry = current
+            else:
+                if current is not None:
+                    self._evict(path)
+                self._entries[path] = entry
+                while len(self._entries) > self.max_size:
+                    self._evict(next(iter(self._entries)))
+
+        self._entries.move_to_end(path)
+        entry.users += 1
+        return entry
+
+    def release(self, entry: CachedFile) -> None:
+        entry.users -= 1
+        if entry.evicted and entry.users == 0:
+            os.close(entry.fd)
+
+    def close(self) -> None:
+        for path in list(self._entries):
+            self._evict(path)
+
+    @staticmethod
+    def _open(path: Path) -> CachedFile:
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            stat_result = os.fstat(fd)
+        except OSError:
+            os.close(fd)
+            raise
+        if not stat.S_ISREG(stat_result.st_mode):
+            os.close(fd)
+            raise FileNotFoundError(path)
+        return CachedFile(fd, stat_result)
+
+    def _evict_entry(self, path: Path, entry: CachedFile) -> None:
+        """Evict entry unless another request has already replaced or evicted it."""
+        if self._entries.get(path) is entry:
+            self._evict(path)
+
+    def _evict(self, path: Path) -> None:
+        entry = self._entries.pop(path)
+        entry.evicted = True
+        if entry.users == 0:
+            os.close(entry.fd)
+
+
+class MediaFileResponse(Response):
+    chunk_size = 256 * 1024
+
+    def __init__(
+        self,
+        path: Path,
+        fd_cache: FileDescriptorCache,
+        sha256: Optional[str] = None,
+    ):
+        self.path = path
+        self.fd_cache = fd_cache
+        self.sha256 = sha256
+        self.status_code = 200
+        self.media_type = mimetypes.guess_type(path.name)[0] or "application/octet-stream"
+        self.background = None
+        self.init_headers()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        try:
+            entry = await self.fd_cache.acquire(self.path, immutable=self.sha256 is not None)
+        except FileNotFoundError:
+            await Response(status_code=404)(scope, receive, send)
+            return
+
+        try:
+            await self._respond(entry, scope, receive, send)
+        finally:
+            self.fd_cache.release(entry)
+
+    async def _respond(self, entry: CachedFile, scope: Scope, receive: Receive, send: Send) -> None:
+        request_headers = Headers(scope=scope)
+        if self.sha256 is not None:
+            etag = f'"{self.sha256}"'
+            cache_control = IMMUTABLE_CACHE_CONTROL
+        else:
+            etag = f'"{entry.identity[0]:x}-{entry.identity[1]:x}-{entry.size:x}"'
+            cache_control = REVALIDATE_CACHE_CONTROL
+
+        headers = {
+            "etag": etag,
+            "cache-control": cache_control,
+            "accept-ranges": "bytes",
+            "last-modified": formatdate(entry.mtime, usegmt=True),
+        }
+
+        if_none_match = request_headers.get("if-none-match")
+        if if_none_match and (if_none_match.strip() == "*" or etag in _etag_list(if_none_match)):
+            await Response(status_code=304, headers=headers)(scope, receive, send)
+            return
+
+        try:
+            byte_range = parse_range(request_headers.get("range"), entry.size)
+        except RangeNotSatisfiable:
+            headers["content-range"] = f"bytes */{entry.size}"
+            await Response(status_code=416, headers=headers)(scope, receive, send)
+            return
+        if_range = request_headers.get("if-range")
+        if byte_range is not None and if_range is not None and if_range.strip() != etag:
+            byte_range = None
+
+        if byte_range is None:
+            status_code, start, end = 200, 0, entry.size - 1
+        else:
+            status_code, (start, end) = 206, byte_range
+            headers["content-range"] = f"bytes {start}-{end}/{entry.size}"
+        count = end - start + 1
+        headers["content-length"] = str(count)
+        self.status_code = status_code
+        self.init_headers(headers)
+
+        await send({"type": "http.response.start", "status": status_code, "headers": self.raw_headers})
+        if scope["method"].upper() == "HEAD" or count <= 0:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+
+        extensions = scope.get("extensions") or {}
+        if "http.response.zerocopysend" in extensions:
+            # The server calls sendfile(2) on the descriptor itself
+            await send({
+                "type": "http.response.zerocopysend",
+                "file": entry.fd,
+                "offset": start,
+                "count": count,
+                "more_body": False,
+            })
+        elif "http.response.pathsend" in extensions and status_code == 200:
+            await send({"type": "http.response.pathsend", "path": str(self.path)})
+        else:
+            await self._send_chunks(entry.fd, start, count, receive, send)
+
+    async def _send_chunks(self, fd: int, offset: int, count: int, receive: Receive, send: Send) -> None:
+        disconnected = asyncio.Event()
+
+        async def watch_disconnect() -> None:
+            while (await receive())["type"] != "http.disconnect":
+                pass
+            disconnected.set()
+
+        watcher = asyncio.create_task(watch_disconnect())
+        try:
+            while count > 0 and not disconnected.is_set():
+                chunk = await asyncio.to_thread(os.pread, fd, min(self.chunk_size, count), offset)
+                if not chunk:
+                    break
+                offset += len(chunk)
+                count -= len(chunk)
+                await send({"type": "http.response.body", "body": chunk, "more_body": count > 0})
+            if count > 0 and not disconnected.is_set():
+                # The file shrank under us; end the body instead of hanging
+                await send({"type": "http.response.body", "body": b"", "more_body": False})
+        finally:
+            watcher.cancel()
+
+
+def accel_redirect_response(uri: str, sha256: Optional[str]) -> Response:
+    """Empty response telling nginx to send the file at an internal location itself."""
+    headers = {"x-accel-redirect": uri}
+    if sha256 is not None:
+        headers["etag"] = f'"{sha256}"'
+        headers["cache-control"] = IMMUTABLE_CACHE_CONTROL
+    else:
+        headers["cache-control"] = REVALIDATE_CACHE_CONTROL
+    return Response(headers=headers)
+
+
+def _etag_list(header: str) -> list[str]:
+    return [tag.strip().removeprefix("W/") for tag in header.split(",")]
@@ -0,0 +1,38 @@
+import asyncio
+import os
+import shutil
+from pathlib import Path
+
+from .base import StorageBackend
+
+
+class LocalStorage(StorageBackend):
+    """Objects are plain files under root, served from url_prefix."""
+
+    def __init__(self, root: Path, url_prefix: str = "/media"):
+        self.root = root
+        self.url_prefix = url_prefix.rstrip("/")
+
+    def local_path(self, key: str) -> Path:
+        return self.root / key
+
+    def public_path(self, key: str) -> str:
+        return f"{self.url_prefix}/{key}"
+
+    async def put_file(self, src: Path, key: str) -> None:
+        dst = self.local_path(key)
+
+        def _move() -> None:
+            dst.parent.mkdir(parents=True, exist_ok=True)
+            shutil.move(src, dst)
+
+        await asyncio.to_thread(_move)
+
+    async def exists(self, key: str) -> bool:
+        return await asyncio.to_thread(self.local_path(key).exists)
+
+    async def delete(self, key: str) -> None:
+        try:
+            await asyncio.to_thread(os.remove, self.local_path(key))
+        except FileNotFoundError:
+            pass
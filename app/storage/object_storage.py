@@ -0,0 +1,84 @@
+"""
+Local stand-in for an S3-compatible object store.
+
+Objects live in a flat bucket namespace and every PUT writes an S3-style
+metadata record (ETag, size, content type) next to the bucket, so code written
+against this backend behaves like it would against S3: whole-object puts,
+HEAD for metadata, no in-place edits.
+"""
+
+import asyncio
+import hashlib
+import json
+import mimetypes
+import os
+import shutil
+from pathlib import Path
+from typing import Any, Optional
+
+from .base import StorageBackend
+
+
+class LocalObjectStorage(StorageBackend):
+    def __init__(self, root: Path, bucket: str, url_prefix: str = "/media"):
+        self.bucket = bucket
+        self.objects_dir = root / bucket
+        self.metadata_dir = root / f"{bucket}.meta"
+        self.url_prefix = url_prefix.rstrip("/")
+
+    def local_path(self, key: str) -> Path:
+        return self.objects_dir / key
+
+    def public_path(self, key: str) -> str:
+        return f"{self.url_prefix}/{self.bucket}/{key}"
+
+    def _metadata_path(self, key: str) -> Path:
+        return self.metadata_dir / f"{key}.json"
+
+    def _put(self, src: Path, key: str) -> None:
+        dst = self.local_path(key)
+        dst.parent.mkdir(parents=True, exist_ok=True)
+
+        with open(src, "rb") as f:
+            etag = hashlib.file_digest(f, "md5").hexdigest()
+        metadata = {
+            "ETag": f'"{etag}"',
+            "ContentLength": src.stat().st_size,
+            "ContentType": mimetypes.guess_type(key)[0] or "application/octet-stream",
+        }
+
+        # Upload to a temporary name first, so readers never see a partial object
+        tmp = dst.with_name(f".{dst.name}.upload")
+        shutil.move(src, tmp)
+        os.replace(tmp, dst)
+
+        meta_path = self._metadata_path(key)
+        meta_path.parent.mkdir(parents=True, exist_ok=True)
+        meta_path.write_text(json.dumps(metadata))
+
+    async def put_file(self, src: Path, key: str) -> None:
+        await asyncio.to_thread(self._put, src, key)
+
+    async def head(self, key: str) -> Optional[dict[str, Any]]:
+        """Object metadata like S3 HeadObject, or None if there is no such object."""
+
+        def _read() -> Optional[dict[str, Any]]:
+            try:
+                return json.loads(self._metadata_path(key).read_text())
+            except FileNotFoundError:
+                return None
+
+        return await asyncio.to_thread(_read)
+
+    async def exists(self, key: str) -> bool:
+        return await self.head(key) is not None
+
+    async def delete(self, key: str) -> None:
+        def _delete() -> None:
+            for path in (self.local_path(key), self._metadata_path(key)):
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+
+        await asyncio.to_thread(_delete)
@@ -0,0 +1,17 @@
+"""
+Periodic tasks, declared with schedule labels on the tasks themselves.
+
+Run a single scheduler next to the workers:
+    taskiq scheduler taskiq_scheduler:scheduler
+"""
+
+from taskiq import TaskiqScheduler
+from taskiq.schedule_sources import LabelScheduleSource
+
+from taskiq_broker import broker
+import tasks  # noqa: F401  registers the scheduled tasks
+
+scheduler = TaskiqScheduler(
+    broker=broker,
+    sources=[LabelScheduleSource(broker)],
+)
@@ -1,3 +1,12 @@
-from .video_tasks import generate_video_task
+from .video_tasks import generate_video_task, requeue_stuck_videos_task
+from .upload_tasks import expire_resumable_uploads_task
+from .storage_tasks import collect_blob_garbage_task
+from .auth_tasks import purge_expired_access_tokens_task
 
-__all__ = ["generate_video_task"]
+__all__ = [
+    "generate_video_task",
+    "requeue_stuck_videos_task",
+    "expire_resumable_uploads_task",
+    "collect_blob_garbage_task",
+    "purge_expired_access_tokens_task",
+]
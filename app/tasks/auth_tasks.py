@@ -0,0 +1,25 @@
+from typing import Annotated
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from taskiq import TaskiqDepends
+
+from taskiq_broker import broker
+from models import db_helper
+from config.config import settings
+from authentication.access_tokens import purge_expired_tokens
+
+
+@broker.task(schedule=[{"cron": "*/15 * * * *"}])
+async def purge_expired_access_tokens_task(
+    session: Annotated[
+        AsyncSession,
+        TaskiqDepends(db_helper.session_getter),
+    ],
+) -> int:
+    """Delete access tokens of the database strategy older than their lifetime."""
+    return await purge_expired_tokens(
+        session,
+        lifetime_seconds=settings.access_token.lifetime_seconds,
+        batch_size=settings.access_token.purge_batch_size,
+        max_batches=settings.access_token.purge_max_batches,
+    )
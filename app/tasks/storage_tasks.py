@@ -0,0 +1,19 @@
+from typing import Annotated
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from taskiq import TaskiqDepends
+
+from taskiq_broker import broker
+from models import db_helper
+from storage import content_store
+
+
+@broker.task(schedule=[{"cron": "17 * * * *"}])
+async def collect_blob_garbage_task(
+    session: Annotated[
+        AsyncSession,
+        TaskiqDepends(db_helper.session_getter),
+    ],
+) -> int:
+    """Delete stored blobs that are no longer referenced by any image or video."""
+    return await content_store.collect_garbage(session)
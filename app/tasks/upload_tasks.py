@@ -0,0 +1,19 @@
+from typing import Annotated
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from taskiq import TaskiqDepends
+
+from taskiq_broker import broker
+from models import db_helper
+from services import VideoProjectService
+
+
+@broker.task(schedule=[{"cron": "*/10 * * * *"}])
+async def expire_resumable_uploads_task(
+    session: Annotated[
+        AsyncSession,
+        TaskiqDepends(db_helper.session_getter),
+    ],
+) -> int:
+    """Delete resumable uploads that were not completed within the upload TTL."""
+    return await VideoProjectService(session).expire_resumable()
@@ -1,20 +1,257 @@
+import asyncio
+import logging
+import tempfile
 from pathlib import Path
-from typing import Annotated
-import os
+from typing import Annotated, Optional, Sequence
 
-os.environ["FFMPEG_BINARY"] = r"C:\ProgramData\chocolatey\bin\ffmpeg.exe"
-from moviepy import ImageClip, concatenate_videoclips
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
-from taskiq import TaskiqDepends
+from taskiq import TaskiqDepends, TaskiqEvents, TaskiqState
 
 from taskiq_broker import broker
-from models.video_project import VideoProject, VideoStatus
+from models.video_project import VideoProject, VideoStatus, VideoStage
 from models.image import Image
 from models import db_helper
+from config.config import settings
+from observability.metrics import RENDER_STAGE_SECONDS, RENDERS
+from observability.tracing import tracer
+from video import (
+    FFmpegEncoder,
+    SlideshowRenderer,
+    get_profile_size,
+    hls_output_args,
+    hls_renditions,
+    load_frames,
+    make_previews,
+    normalize_images,
+    store_hls,
+)
+from video.lease import LeaseLost, ProjectCancelled, ProjectLease, requeue_expired
+from video.scheduling import RENDER_TASK, SMALL_LANE, claim_next, enqueue_render
+from video.progress import ProgressReporter, publish_project
+from video.status_bus import status_bus
+from storage import content_store, local_path
 
+log = logging.getLogger(__name__)
 
-@broker.task
+
+async def _fail(session: AsyncSession, video_project: VideoProject, message: str) -> None:
+    video_project.status = VideoStatus.FAILED
+    video_project.error_message = message
+    video_project.lease_owner = None
+    video_project.lease_expires_at = None
+    video_project.eta_seconds = None
+    await session.commit()
+    await publish_project(video_project)
+    RENDERS.inc(settings.video.profile, "failed")
+
+
+async def _wait_previews(
+    previews: asyncio.Task, video_project_id: int
+) -> Optional[tuple[list[Path], Path]]:
+    """Result of the preview task; previews are optional, so failures are only logged."""
+    try:
+        return await previews
+    except Exception:
+        log.exception("Failed to build previews for video project %s", video_project_id)
+        return None
+
+
+async def _store_previews(
+    session: AsyncSession,
+    video_project: VideoProject,
+    images: Sequence[Image],
+    thumbnails: list[Path],
+    poster: Path,
+) -> None:
+    """Store previews in the content store, replacing those of a previous run."""
+    for image, thumbnail in zip(images, thumbnails):
+        if image.thumbnail_path:
+            await content_store.release(session, image.thumbnail_path)
+        image.thumbnail_path = await content_store.add_file(session, thumbnail, ".webp")
+
+    if video_project.poster_path:
+        await content_store.release(session, video_project.poster_path)
+    video_project.poster_path = await content_store.add_file(session, poster, ".webp")
+
+
+@broker.on_event(TaskiqEvents.WORKER_SHUTDOWN)
+async def close_status_bus(state: TaskiqState) -> None:
+    await status_bus.close()
+
+
+async def _render(session: AsyncSession, lease: ProjectLease) -> None:
+    """Render the leased project and store its outputs."""
+    video_project_id = lease.project_id
+    video_project = None
+    try:
+        async with lease:
+            result = await session.execute(
+                select(VideoProject).where(VideoProject.id == video_project_id)
+            )
+            video_project = result.scalar_one()
+
+            video_project.stage = VideoStage.NORMALIZING
+            video_project.progress = 0.0
+            await session.commit()
+            await publish_project(video_project)
+
+            # Get all images sorted by order_index
+            result = await session.execute(
+                select(Image)
+                .where(Image.video_project_id == video_project_id)
+                .order_by(Image.order_index)
+            )
+            images = result.scalars().all()
+
+            if not images:
+                await _fail(session, video_project, "No images found")
+                return
+
+            image_paths = []
+            for image in images:
+                image_path = local_path(image.image_path)
+                if not image_path.exists():
+                    await _fail(session, video_project, f"Image not found: {image.image_path}")
+                    return
+                image_paths.append(image_path)
+
+            size = get_profile_size(settings.video.profile)
+            renderer = SlideshowRenderer(
+                size=size,
+                fps=settings.video.fps,
+                image_duration=settings.video.image_duration,
+                transition=video_project.transition,
+                transition_duration=settings.video.transition_duration,
+            )
+
+            with tempfile.TemporaryDirectory(prefix=f"video_{video_project_id}_") as tmp_dir:
+                video_path = Path(tmp_dir) / "video.mp4"
+                hls_dir = Path(tmp_dir) / "hls"
+                output_args = None
+                if video_project.output_format == "hls":
+                    # Every rendition comes out of the same render pass
+                    output_args = hls_output_args(
+                        hls_dir,
+                        hls_renditions(settings.video.hls_renditions, size),
+                        fps=settings.video.fps,
+                        segment_seconds=settings.video.hls_segment_seconds,
+                        preset=settings.video.preset,
+                    )
+
+                profile = settings.video.profile
+                # Normalize images to the profile size so every frame is uniform
+                with RENDER_STAGE_SECONDS.time("normalize", profile), tracer.span("render.normalize"):
+                    frames = await asyncio.to_thread(
+                        normalize_images,
+                        image_paths,
+                        Path(tmp_dir),
+                        size,
+                        settings.video.normalize_workers,
+                    )
+
+                video_project.stage = VideoStage.ENCODING
+                await session.commit()
+                await publish_project(video_project)
+
+                # Thumbnails and poster are built while ffmpeg encodes, off the critical path
+                previews = asyncio.create_task(
+                    asyncio.to_thread(
+                        make_previews,
+                        image_paths,
+                        frames[0],
+                        Path(tmp_dir) / "previews",
+                        settings.video.thumbnail_size,
+                        settings.video.preview_quality,
+                        settings.video.preview_workers,
+                    )
+                )
+                with RENDER_STAGE_SECONDS.time("encode", profile), tracer.span("render.encode"):
+                    try:
+                        # Frames are streamed into ffmpeg one by one, whole clips never sit in memory
+                        async with FFmpegEncoder(
+                            video_path,
+                            size,
+                            fps=settings.video.fps,
+                            preset=settings.video.preset,  # скорость кодирования
+                            on_progress=ProgressReporter(
+                                video_project_id,
+                                renderer.total_frames(len(frames)),
+                                settings.video.progress_interval,
+                            ),
+                            output_args=output_args,
+                        ) as encoder:
+                            for frame in renderer.frames(load_frames(frames)):
+                                await encoder.write(frame)
+                    finally:
+                        # Never leave the thread writing into a directory that is about to go
+                        preview_result = await _wait_previews(previews, video_project_id)
+
+                with RENDER_STAGE_SECONDS.time("store", profile), tracer.span("render.store"):
+                    if preview_result is not None:
+                        await _store_previews(session, video_project, images, *preview_result)
+
+                    # A re-run replaces the previous output, which loses its references
+                    for key in (video_project.video_path, *(video_project.media_keys or ())):
+                        if key:
+                            await content_store.release(session, key)
+                    if output_args is None:
+                        video_key = await content_store.add_file(session, video_path, ".mp4")
+                        media_keys = None
+                    else:
+                        video_key, media_keys = await store_hls(session, hls_dir)
+
+            with tracer.span("render.commit"):
+                # Cancelling locks out the result: the row lock orders a concurrent cancel
+                # before or after this commit
+                await session.refresh(video_project, ["status"], with_for_update=True)
+                if video_project.status == VideoStatus.CANCELLED:
+                    raise ProjectCancelled(f"Video project {video_project_id} was cancelled")
+
+                # Update database
+                video_project.video_path = video_key
+                video_project.media_keys = media_keys
+                video_project.status = VideoStatus.SUCCESS
+                video_project.stage = VideoStage.DONE
+                video_project.progress = 100.0
+                video_project.eta_seconds = None
+                video_project.lease_owner = None
+                video_project.lease_expires_at = None
+                await session.commit()
+                await publish_project(video_project)
+                RENDERS.inc(settings.video.profile, "success")
+
+    except ProjectCancelled:
+        # The user cancelled or deleted the project, ffmpeg is already killed
+        await session.rollback()
+        await content_store.discard_uncommitted(session)
+        RENDERS.inc(settings.video.profile, "cancelled")
+        log.info("Rendering of video project %s stopped: cancelled", video_project_id)
+
+    except LeaseLost:
+        # The sweeper gave the project to another worker, which now owns its status
+        await session.rollback()
+        await content_store.discard_uncommitted(session)
+        RENDERS.inc(settings.video.profile, "lease_lost")
+        log.warning("Rendering of video project %s stopped: lease lost", video_project_id)
+
+    except Exception as e:
+        # Update status to failed with error message
+        if video_project is not None:
+            await session.rollback()
+            await content_store.discard_uncommitted(session)
+            exists = await session.scalar(
+                select(VideoProject.id).where(VideoProject.id == video_project_id)
+            )
+            if exists is None:
+                RENDERS.inc(settings.video.profile, "cancelled")
+                log.info("Rendering of video project %s stopped: deleted", video_project_id)
+                return
+            await session.refresh(video_project)
+            await _fail(session, video_project, str(e))
+
+
+@broker.task(task_name=RENDER_TASK)
 async def generate_video_task(
     video_project_id: int,
     session: Annotated[
@@ -22,89 +259,60 @@ async def generate_video_task(
         TaskiqDepends(db_helper.session_getter),
     ],
 ) -> None:
-    print("TASK STARTED")
     """
-    Generate video from images for a video project.
+    Render slot in the lane of a video project (see video.scheduling).
+
+    The scheduler picks the project, which is not necessarily video_project_id.
+    The slot keeps rendering while there is work it may claim, which also picks
+    up large projects that waited for a free large lane slot.
 
     Args:
-        video_project_id: ID of the video project
+        video_project_id: ID of the video project the message was sent for
         session: Database session injected by TaskiqDepends
     """
-    try:
-        # Update status to processing
-        result = await session.execute(
-            select(VideoProject).where(VideoProject.id == video_project_id)
-        )
-        video_project = result.scalar_one_or_none()
-
-        if not video_project:
-            return
-
-        video_project.status = VideoStatus.PROCESSING
-        await session.commit()
-
-        # Get all images sorted by order_index
-        result = await session.execute(
-            select(Image)
-            .where(Image.video_project_id == video_project_id)
-            .order_by(Image.order_index)
+    lane = await session.scalar(
+        select(VideoProject.lane).where(VideoProject.id == video_project_id)
+    )
+    while (
+        lease := await claim_next(
+            session,
+            lane or SMALL_LANE,
+            large_lane_slots=settings.scheduler.large_lane_slots,
+            fairness_window_seconds=settings.scheduler.fairness_window_seconds,
+            session_factory=db_helper.session_factory,
+            lease_seconds=settings.video.lease_seconds,
+            heartbeat_interval=settings.video.heartbeat_interval,
+            check_interval=settings.video.cancel_check_interval,
         )
-        images = result.scalars().all()
+    ) is not None:
+        # The claimed project may be another one than video_project_id
+        with tracer.span("render", **{"video_project.id": lease.project_id}):
+            await _render(session, lease)
+        session.expunge_all()
 
-        if not images:
-            video_project.status = VideoStatus.FAILED
-            video_project.error_message = "No images found"
-            await session.commit()
-            return
-
-        # Create video clips from images (each image displayed for 2 seconds)
-        clips = []
-        for image in images:
-            image_path = Path(image.image_path)
-            if not image_path.exists():
-                video_project.status = VideoStatus.FAILED
-                video_project.error_message = f"Image not found: {image.image_path}"
-                await session.commit()
-                return
 
-            clip = ImageClip(str(image_path), duration=2)
-            clips.append(clip)
-
-        # Concatenate clips
-        final_video = concatenate_videoclips(clips, method="compose")
-
-        # Save video
-        videos_dir = Path("media/videos")
-        videos_dir.mkdir(parents=True, exist_ok=True)
-
-        video_filename = f"video_{video_project_id}.mp4"
-        video_path = videos_dir / video_filename
-
-        # Write video file
-        final_video.write_videofile(
-            str(video_path),
-            fps=24,
-            codec="libx264",
-            audio=False,
-            preset="medium",       # скорость кодирования
-            ffmpeg_params=[
-                "-pix_fmt", "yuv420p",
-                "-vf", "scale=trunc(iw/2)*2:trunc(ih/2)*2"  # приводим размеры к чётным
-            ]
+@broker.task(schedule=[{"cron": "* * * * *"}])
+async def requeue_stuck_videos_task(
+    session: Annotated[
+        AsyncSession,
+        TaskiqDepends(db_helper.session_getter),
+    ],
+) -> int:
+    """Requeue projects whose worker died mid-render; fail those out of attempts."""
+    requeued, failed = await requeue_expired(
+        session,
+        lease_seconds=settings.video.lease_seconds,
+        max_attempts=settings.video.max_attempts,
+        backoff_seconds=settings.video.retry_backoff_seconds,
+    )
+    for video_project in requeued:
+        log.warning(
+            "Video project %s lost its worker, attempt %s requeued",
+            video_project.id,
+            video_project.attempts + 1,
         )
-
-        # Clean up
-        final_video.close()
-        for clip in clips:
-            clip.close()
-
-        # Update database
-        video_project.video_path = str(video_path)
-        video_project.status = VideoStatus.SUCCESS
-        await session.commit()
-
-    except Exception as e:
-        # Update status to failed with error message
-        video_project.status = VideoStatus.FAILED
-        video_project.error_message = str(e)
-        await session.commit()
+        enqueue_render(session, video_project)
+    await session.commit()
+    for video_project in failed:
+        await publish_project(video_project)
+    return len(requeued)
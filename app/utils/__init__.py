@@ -1,11 +1,31 @@
 from .data_shaping import (
     build_recipe_response,
     build_recipes_response_list,
+    compile_recipe_shaper,
+    compile_response_builder,
     recipe_to_dict,
 )
+from .recipe_serialization import (
+    json_dumps,
+    page_to_json,
+    recipe_to_read_dict,
+    recipes_to_read_dicts,
+)
+from .video_serialization import (
+    media_url,
+    video_project_to_dict,
+)
 
 __all__ = [
     "build_recipe_response",
     "build_recipes_response_list",
+    "compile_recipe_shaper",
+    "compile_response_builder",
     "recipe_to_dict",
+    "json_dumps",
+    "page_to_json",
+    "recipe_to_read_dict",
+    "recipes_to_read_dicts",
+    "media_url",
+    "video_project_to_dict",
 ]
@@ -3,7 +3,11 @@ Pure functions for data shaping and response building.
 These functions are independent of SQLAlchemy, FastAPI, and database operations.
 """
 
-from typing import Any, Dict, Set, List, Optional, Protocol
+from functools import lru_cache
+from typing import Any, Callable, Dict, FrozenSet, Set, List, Optional, Protocol
+
+# Base fields in the order they appear in a response
+BASE_FIELDS = ("id", "title", "description", "cooking_time", "difficulty")
 
 
 class RecipeProtocol(Protocol):
@@ -94,6 +98,85 @@ def build_recipe_response(
     return result
 
 
+def _compile(name: str, lines: List[str]) -> Callable:
+    """Function from generated source; only names from BASE_FIELDS reach it."""
+    namespace: Dict[str, Any] = {}
+    exec("\n".join(lines), {}, namespace)
+    return namespace[name]
+
+
+@lru_cache(maxsize=256)
+def _compile_response_builder(
+    select_set: FrozenSet[str], include_set: FrozenSet[str]
+) -> Callable[[Dict[str, Any]], Dict[str, Any]]:
+    # A dict display with constant keys is the cheapest way to build the row
+    fields = ", ".join(f"{name!r}: data[{name!r}]" for name in BASE_FIELDS if name in select_set)
+    lines = ["def build(data):", f"    result = {{{fields}}}"]
+    if "cuisine" in include_set:
+        lines += [
+            "    cuisine = data.get('cuisine')",
+            "    if cuisine:",
+            "        result['cuisine'] = cuisine",
+        ]
+    for name in ("allergens", "ingredients"):
+        if name in include_set:
+            lines.append(f"    result[{name!r}] = data.get({name!r}, [])")
+    lines.append("    return result")
+    return _compile("build", lines)
+
+
+def compile_response_builder(
+    select_set: Set[str], include_set: Set[str]
+) -> Callable[[Dict[str, Any]], Dict[str, Any]]:
+    """
+    Specialized build_recipe_response for one (select_set, include_set) pair.
+
+    The membership checks are done once, when the function is built; built
+    functions are memoized, so repeated requests with the same parameters
+    reuse them.
+    """
+    return _compile_response_builder(frozenset(select_set), frozenset(include_set))
+
+
+@lru_cache(maxsize=256)
+def _compile_recipe_shaper(
+    select_set: FrozenSet[str], include_set: FrozenSet[str]
+) -> Callable[[RecipeProtocol], Dict[str, Any]]:
+    fields = ", ".join(f"{name!r}: recipe.{name}" for name in BASE_FIELDS if name in select_set)
+    lines = ["def shape(recipe):", f"    result = {{{fields}}}"]
+    # Relations not included are never read, so they need not be loaded
+    if "cuisine" in include_set:
+        lines += [
+            "    cuisine = recipe.cuisine",
+            "    if cuisine:",
+            "        result['cuisine'] = {'id': cuisine.id, 'name': cuisine.name}",
+        ]
+    if "allergens" in include_set:
+        lines.append("    result['allergens'] = [{'id': a.id, 'name': a.name} for a in recipe.allergens]")
+    if "ingredients" in include_set:
+        lines.append(
+            "    result['ingredients'] = ["
+            "{'id': ri.ingredient.id, 'name': ri.ingredient.name,"
+            " 'quantity': ri.quantity, 'measurement': ri.measurement}"
+            " for ri in recipe.ingredients]"
+        )
+    lines.append("    return result")
+    return _compile("shape", lines)
+
+
+def compile_recipe_shaper(
+    select_set: Set[str], include_set: Set[str]
+) -> Callable[[RecipeProtocol], Dict[str, Any]]:
+    """
+    Function shaping a recipe object straight into its response dictionary.
+
+    Equivalent to build_recipe_response(recipe_to_dict(recipe, include_set),
+    select_set, include_set) without the intermediate dictionary. Memoized
+    per (select_set, include_set).
+    """
+    return _compile_recipe_shaper(frozenset(select_set), frozenset(include_set))
+
+
 def build_recipes_response_list(
     recipes_data: List[Dict[str, Any]],
     select_set: Set[str],
@@ -108,7 +191,5 @@ def build_recipes_response_list(
         List of dictionaries with selected fields and included relations
 
     """
-    return [
-        build_recipe_response(recipe_data, select_set, include_set)
-        for recipe_data in recipes_data
-    ]
+    build = compile_response_builder(select_set, include_set)
+    return [build(recipe_data) for recipe_data in recipes_data]
@@ -0,0 +1,78 @@
+"""
+Response building for recipe pages.
+
+Builds RecipeRead-shaped dicts straight from loaded rows and encodes them
+to JSON bytes, instead of validating every recipe into RecipeRead (and
+every ingredient through IngredientRead's before-validator) and then
+serializing the models. The bytes are the same as the ones FastAPI writes
+for a Page[RecipeRead] response_model.
+
+orjson is used when installed; otherwise pydantic-core, which FastAPI
+itself encodes responses with, so the output does not depend on it.
+"""
+
+from typing import Any, Dict, List
+
+from pydantic_core import to_json
+
+from models.recipe import MeasurementEnum
+
+try:
+    import orjson
+except ImportError:  # optional, pydantic-core writes the same bytes a little slower
+    orjson = None
+
+# Labels looked up by value, without building an enum member per ingredient
+MEASUREMENT_LABELS = {member.value: member.label for member in MeasurementEnum}
+
+
+def json_dumps(obj: Any) -> bytes:
+    """Compact JSON bytes, formatted like pydantic's JSON serializer."""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return to_json(obj)
+
+
+def recipe_to_read_dict(recipe: Any) -> Dict[str, Any]:
+    """Serialize a Recipe with author, cuisine, allergens and ingredients loaded into a RecipeRead dict."""
+    author = recipe.author
+    cuisine = recipe.cuisine
+    labels = MEASUREMENT_LABELS
+    return {
+        "id": recipe.id,
+        "title": recipe.title,
+        "description": recipe.description,
+        "cooking_time": recipe.cooking_time,
+        "difficulty": recipe.difficulty,
+        "author": {"id": author.id, "first_name": author.first_name, "last_name": author.last_name},
+        "cuisine": {"id": cuisine.id, "name": cuisine.name} if cuisine is not None else None,
+        "allergens": [{"id": a.id, "name": a.name} for a in recipe.allergens],
+        "ingredients": [
+            {
+                "ingredient_id": ri.ingredient.id,
+                "name": ri.ingredient.name,
+                "quantity": ri.quantity,
+                "measurement": ri.measurement,
+                "measurement_label": labels.get(ri.measurement, "?"),
+            }
+            for ri in recipe.ingredients
+        ],
+    }
+
+
+def recipes_to_read_dicts(recipes: List[Any]) -> List[Dict[str, Any]]:
+    """Items transformer for fastapi-pagination."""
+    return [recipe_to_read_dict(recipe) for recipe in recipes]
+
+
+def page_to_json(page: Any) -> bytes:
+    """Encode a fastapi-pagination Page whose items are already plain dicts."""
+    return json_dumps(
+        {
+            "items": page.items,
+            "total": page.total,
+            "page": page.page,
+            "size": page.size,
+            "pages": page.pages,
+        }
+    )
@@ -0,0 +1,51 @@
+"""
+Response building for video projects.
+
+Shared by the video endpoints: builds plain dicts in a single pass over the
+loaded rows instead of constructing intermediate schema objects per image.
+"""
+
+from operator import attrgetter
+from typing import Any, Dict, Iterable, List, Optional
+
+from storage import public_path
+
+_order_key = attrgetter("order_index")
+
+
+def media_url(base_url: str, key: Optional[str]) -> Optional[str]:
+    """Public URL of a stored file, or None if there is no file."""
+    if not key:
+        return None
+    return f"{base_url}{public_path(key)}"
+
+
+def images_to_list(images: Iterable[Any], base_url: str) -> List[Dict[str, Any]]:
+    return [
+        {
+            "id": img.id,
+            "image_url": media_url(base_url, img.image_path),
+            "thumbnail_url": media_url(base_url, img.thumbnail_path),
+            "order_index": img.order_index,
+        }
+        for img in sorted(images, key=_order_key)
+    ]
+
+
+def video_project_to_dict(project: Any, base_url: str) -> Dict[str, Any]:
+    """Serialize a VideoProject with its images loaded into a VideoProjectRead dict."""
+    return {
+        "id": project.id,
+        "status": project.status,
+        "stage": project.stage,
+        "progress": project.progress,
+        "eta_seconds": project.eta_seconds,
+        "transition": project.transition,
+        "output_format": project.output_format,
+        "video_url": media_url(base_url, project.video_path),
+        "poster_url": media_url(base_url, project.poster_path),
+        "error_message": project.error_message,
+        "created_at": project.created_at,
+        "updated_at": project.updated_at,
+        "images": images_to_list(project.images, base_url),
+    }
@@ -0,0 +1,26 @@
+from .profiles import VIDEO_PROFILES, get_profile_size
+from .normalize import normalize_image, normalize_images
+from .transitions import TRANSITIONS, SlideshowRenderer, load_frames
+from .encoder import FFmpegEncoder, EncoderError, get_ffmpeg_binary
+from .thumbnails import make_thumbnail, make_poster, make_previews
+from .hls import OUTPUT_FORMATS, hls_renditions, hls_output_args, store_hls
+
+__all__ = [
+    "VIDEO_PROFILES",
+    "get_profile_size",
+    "normalize_image",
+    "normalize_images",
+    "TRANSITIONS",
+    "SlideshowRenderer",
+    "load_frames",
+    "FFmpegEncoder",
+    "EncoderError",
+    "get_ffmpeg_binary",
+    "make_thumbnail",
+    "make_poster",
+    "make_previews",
+    "OUTPUT_FORMATS",
+    "hls_renditions",
+    "hls_output_args",
+    "store_hls",
+]
@@ -0,0 +1,164 @@
+"""
+ffmpeg encoder fed with raw frames through stdin.
+
+Frames are produced in Python (see transitions.py) and streamed straight into
+the encoder, so a clip never has to be held in memory as a whole.
+"""
+
+import asyncio
+import logging
+from collections import deque
+from pathlib import Path
+from typing import Awaitable, Callable, Optional
+
+import imageio_ffmpeg
+import numpy as np
+
+from config.config import settings
+
+log = logging.getLogger(__name__)
+
+class EncoderError(RuntimeError):
+    """Raised when ffmpeg exits with a non-zero code."""
+
+
+def get_ffmpeg_binary() -> str:
+    """ffmpeg from settings, falling back to the binary bundled with imageio-ffmpeg."""
+    return settings.video.ffmpeg_binary or imageio_ffmpeg.get_ffmpeg_exe()
+
+
+ProgressCallback = Callable[[int], Awaitable[None]]
+
+
+class FFmpegEncoder:
+    """
+    Encode rgb24 frames of a fixed size into an H.264 MP4.
+
+    on_progress, if given, is awaited with the number of frames ffmpeg has
+    actually encoded, as reported by its -progress output. output_args replace
+    the codec and output part of the command (see hls.hls_output_args); output
+    is then ignored.
+
+    Usage:
+        async with FFmpegEncoder(path, (1280, 720), fps=24) as encoder:
+            for frame in frames:
+                await encoder.write(frame)
+    """
+
+    def __init__(
+        self,
+        output: Path,
+        size: tuple[int, int],
+        fps: int,
+        preset: str = "medium",
+        on_progress: Optional[ProgressCallback] = None,
+        output_args: Optional[list[str]] = None,
+    ):
+        self.output = output
+        self.output_args = output_args
+        self.size = size
+        self.fps = fps
+        self.preset = preset
+        self.on_progress = on_progress
+        self.frames_written = 0
+        self._process: Optional[asyncio.subprocess.Process] = None
+        self._stderr_tail: deque[str] = deque(maxlen=20)
+        self._stderr_task: Optional[asyncio.Task] = None
+        self._progress_task: Optional[asyncio.Task] = None
+
+    def build_args(self) -> list[str]:
+        width, height = self.size
+        return [
+            get_ffmpeg_binary(),
+            "-hide_banner",
+            "-loglevel", "error",
+            "-nostats",
+            "-progress", "pipe:1",
+            "-y",
+            "-f", "rawvideo",
+            "-pix_fmt", "rgb24",
+            "-s", f"{width}x{height}",
+            "-r", str(self.fps),
+            "-i", "-",
+            "-an",
+            *(self.output_args or self._mp4_output_args()),
+        ]
+
+    def _mp4_output_args(self) -> list[str]:
+        return [
+            "-c:v", "libx264",
+            "-preset", self.preset,
+            "-pix_fmt", "yuv420p",
+            "-movflags", "+faststart",
+            str(self.output),
+        ]
+
+    async def start(self) -> None:
+        self._process = await asyncio.create_subprocess_exec(
+            *self.build_args(),
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+        # stderr must be drained, otherwise a chatty ffmpeg blocks on a full pipe
+        self._stderr_task = asyncio.create_task(self._drain_stderr())
+        self._progress_task = asyncio.create_task(self._read_progress())
+
+    async def _drain_stderr(self) -> None:
+        async for line in self._process.stderr:
+            self._stderr_tail.append(line.decode(errors="replace").rstrip())
+
+    async def _read_progress(self) -> None:
+        # -progress emits key=value blocks; frame= is the number of encoded frames
+        async for line in self._process.stdout:
+            key, _, value = line.decode(errors="replace").strip().partition("=")
+            if key == "frame" and self.on_progress is not None and value.isdigit():
+                try:
+                    await self.on_progress(int(value))
+                except Exception:
+                    # Progress reporting must never break the encode itself
+                    log.exception("Progress callback failed at frame %s", value)
+
+    async def _wait_readers(self) -> None:
+        for task in (self._stderr_task, self._progress_task):
+            if task is not None:
+                await task
+
+    async def write(self, frame: np.ndarray) -> None:
+        """Write one (height, width, 3) uint8 frame."""
+        try:
+            self._process.stdin.write(memoryview(frame).cast("B"))
+            await self._process.stdin.drain()
+        except (BrokenPipeError, ConnectionResetError):
+            await self._process.wait()
+            raise EncoderError(self._error_message())
+        self.frames_written += 1
+
+    async def close(self) -> None:
+        """Flush the remaining frames and wait for ffmpeg to finish."""
+        self._process.stdin.close()
+        returncode = await self._process.wait()
+        await self._wait_readers()
+        if returncode != 0:
+            raise EncoderError(self._error_message())
+
+    def terminate(self) -> None:
+        """Stop ffmpeg immediately, e.g. when rendering fails half way."""
+        if self._process is not None and self._process.returncode is None:
+            self._process.kill()
+
+    def _error_message(self) -> str:
+        details = "; ".join(self._stderr_tail) or "no output"
+        return f"ffmpeg exited with code {self._process.returncode}: {details}"
+
+    async def __aenter__(self) -> "FFmpegEncoder":
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            await self.close()
+            return
+        self.terminate()
+        await self._process.wait()
+        await self._wait_readers()
@@ -0,0 +1,140 @@
+"""
+HLS output: a master playlist with one or more renditions.
+
+The slideshow is rendered once at the project profile size and ffmpeg splits
+and scales it into every rendition within the same encode. Segments and
+playlists are then moved into the content store: segments keep their
+content-addressed (immutable, cacheable) URLs and the playlists are rewritten
+to point at them.
+"""
+
+import asyncio
+from pathlib import Path
+from typing import Sequence
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from storage import content_store, public_path
+from .profiles import VIDEO_BITRATES, VIDEO_PROFILES
+
+OUTPUT_FORMATS = ("mp4", "hls")
+MASTER_PLAYLIST = "master.m3u8"
+
+
+class Rendition:
+    def __init__(self, name: str, size: tuple[int, int], bitrate: str):
+        self.name = name
+        self.size = size
+        self.bitrate = bitrate
+
+    def __repr__(self):
+        return f"Rendition({self.name}, {self.bitrate})"
+
+
+def hls_renditions(names: Sequence[str], source_size: tuple[int, int]) -> list[Rendition]:
+    """Renditions from profile names, skipping those larger than the rendered frames."""
+    renditions = [
+        Rendition(name, VIDEO_PROFILES[name], VIDEO_BITRATES[name])
+        for name in names
+        if VIDEO_PROFILES[name][1] <= source_size[1]
+    ]
+    if not renditions:
+        # At least the source size itself
+        name = next(n for n, size in VIDEO_PROFILES.items() if size == source_size)
+        renditions = [Rendition(name, source_size, VIDEO_BITRATES[name])]
+    return sorted(renditions, key=lambda rendition: rendition.size[1], reverse=True)
+
+
+def hls_output_args(
+    out_dir: Path,
+    renditions: Sequence[Rendition],
+    fps: int,
+    segment_seconds: int,
+    preset: str,
+) -> list[str]:
+    """ffmpeg output arguments writing out_dir/master.m3u8 and out_dir/v<N>/ renditions."""
+    count = len(renditions)
+    graph = f"[0:v]split={count}" + "".join(f"[s{idx}]" for idx in range(count))
+    for idx, rendition in enumerate(renditions):
+        width, height = rendition.size
+        graph += f";[s{idx}]scale={width}:{height}[v{idx}]"
+
+    args = ["-filter_complex", graph]
+    for idx, rendition in enumerate(renditions):
+        bufsize = f"{int(rendition.bitrate.rstrip('k')) * 2}k"
+        args += [
+            "-map", f"[v{idx}]",
+            f"-c:v:{idx}", "libx264",
+            f"-b:v:{idx}", rendition.bitrate,
+            f"-maxrate:v:{idx}", rendition.bitrate,
+            f"-bufsize:v:{idx}", bufsize,
+        ]
+
+    # A keyframe at every segment boundary keeps the renditions switchable
+    gop = str(max(1, round(fps * segment_seconds)))
+    args += [
+        "-preset", preset,
+        "-pix_fmt", "yuv420p",
+        "-g", gop,
+        "-keyint_min", gop,
+        "-sc_threshold", "0",
+        "-f", "hls",
+        "-hls_time", str(segment_seconds),
+        "-hls_playlist_type", "vod",
+        "-hls_flags", "independent_segments",
+        "-hls_segment_filename", str(out_dir / "v%v" / "seg_%05d.ts"),
+        "-master_pl_name", MASTER_PLAYLIST,
+        "-var_stream_map", " ".join(f"v:{idx}" for idx in range(count)),
+        str(out_dir / "v%v" / "index.m3u8"),
+    ]
+    return args
+
+
+def _rewrite_playlist(text: str, uri_to_key: dict[str, str]) -> str:
+    """Replace relative URIs of a playlist with URL paths of stored keys."""
+    lines = []
+    for line in text.splitlines():
+        uri = line.strip()
+        if uri and not uri.startswith("#"):
+            line = public_path(uri_to_key[uri])
+        lines.append(line)
+    return "\n".join(lines) + "\n"
+
+
+async def store_hls(session: AsyncSession, out_dir: Path) -> tuple[str, list[str]]:
+    """
+    Move an HLS output directory into the content store.
+
+    Returns:
+        Key of the master playlist and keys of every other stored file
+        (variant playlists and segments), all referenced once
+    """
+    master_path = out_dir / MASTER_PLAYLIST
+    master_text = await asyncio.to_thread(master_path.read_text)
+    stored: list[str] = []
+    variant_keys: dict[str, str] = {}
+
+    for line in master_text.splitlines():
+        variant_uri = line.strip()
+        if not variant_uri or variant_uri.startswith("#"):
+            continue
+        variant_path = out_dir / variant_uri
+        variant_text = await asyncio.to_thread(variant_path.read_text)
+
+        segment_keys = {}
+        for segment_line in variant_text.splitlines():
+            segment_uri = segment_line.strip()
+            if segment_uri and not segment_uri.startswith("#"):
+                key = await content_store.add_file(session, variant_path.parent / segment_uri, ".ts")
+                segment_keys[segment_uri] = key
+                stored.append(key)
+
+        await asyncio.to_thread(
+            variant_path.write_text, _rewrite_playlist(variant_text, segment_keys)
+        )
+        variant_keys[variant_uri] = await content_store.add_file(session, variant_path, ".m3u8")
+        stored.append(variant_keys[variant_uri])
+
+    await asyncio.to_thread(master_path.write_text, _rewrite_playlist(master_text, variant_keys))
+    master_key = await content_store.add_file(session, master_path, ".m3u8")
+    return master_key, stored
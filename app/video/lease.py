@@ -0,0 +1,231 @@
+"""
+Lease-based ownership of video projects by worker tasks.
+
+A task execution owns a project while its lease is valid. The lease is claimed
+with one conditional UPDATE (PENDING -> PROCESSING), so a duplicate delivery of
+the same message finds the project already taken and is dropped. While the
+project renders, a heartbeat extends the lease. If a worker dies, its lease
+runs out and requeue_expired hands the project back to the queue after a
+backoff, until max_attempts is reached.
+
+Between heartbeats the lease checks, more often and with a cheap SELECT,
+whether the project was cancelled or deleted; the work is then cancelled
+with ProjectCancelled.
+"""
+
+import asyncio
+import logging
+import os
+import socket
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from sqlalchemy import and_, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from models.video_project import VideoProject, VideoStatus, VideoStage
+
+log = logging.getLogger(__name__)
+
+
+class LeaseLost(Exception):
+    """Raised inside the lease block when another owner took the project over."""
+
+
+class ProjectCancelled(LeaseLost):
+    """Raised inside the lease block when the project was cancelled or deleted."""
+
+
+def utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def retry_delay(attempts: int, backoff_seconds: float) -> float:
+    """Seconds to wait after an expired lease before the next attempt: 1x, 2x, 4x..."""
+    return backoff_seconds * 2 ** max(0, attempts - 1)
+
+
+class ProjectLease:
+    """
+    Lease of one project for one task execution.
+
+    Usage:
+        lease = ProjectLease(project_id, session_factory, 60, 15)
+        if not await lease.acquire(session):
+            return  # duplicate delivery or not ready
+        async with lease:
+            ...  # cancelled with LeaseLost if the lease is lost
+    """
+
+    def __init__(
+        self,
+        project_id: int,
+        session_factory: async_sessionmaker[AsyncSession],
+        lease_seconds: float,
+        heartbeat_interval: float,
+        check_interval: Optional[float] = None,
+    ):
+        self.project_id = project_id
+        self.session_factory = session_factory
+        self.lease_seconds = lease_seconds
+        self.heartbeat_interval = heartbeat_interval
+        self.check_interval = min(check_interval or heartbeat_interval, heartbeat_interval)
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:12]}"
+        self.lost: Optional[LeaseLost] = None
+        self._owner_task: Optional[asyncio.Task] = None
+        self._heartbeat: Optional[asyncio.Task] = None
+
+    async def acquire(self, session: AsyncSession) -> bool:
+        """Claim a pending project; False if it is not pending (taken, done, uploading)."""
+        now = utcnow()
+        result = await session.execute(
+            update(VideoProject)
+            .where(
+                VideoProject.id == self.project_id,
+                VideoProject.status == VideoStatus.PENDING,
+            )
+            .values(
+                status=VideoStatus.PROCESSING,
+                lease_owner=self.owner,
+                lease_expires_at=now + timedelta(seconds=self.lease_seconds),
+                heartbeat_at=now,
+                attempts=VideoProject.attempts + 1,
+            )
+            .execution_options(synchronize_session=False)
+        )
+        await session.commit()
+        return result.rowcount == 1
+
+    async def renew(self) -> bool:
+        """Extend the lease; False if the project is no longer ours."""
+        now = utcnow()
+        async with self.session_factory() as session:
+            result = await session.execute(
+                update(VideoProject)
+                .where(
+                    VideoProject.id == self.project_id,
+                    VideoProject.lease_owner == self.owner,
+                    VideoProject.status == VideoStatus.PROCESSING,
+                )
+                .values(
+                    lease_expires_at=now + timedelta(seconds=self.lease_seconds),
+                    heartbeat_at=now,
+                )
+                .execution_options(synchronize_session=False)
+            )
+            await session.commit()
+        return result.rowcount == 1
+
+    async def _state(self) -> tuple[Optional[VideoStatus], Optional[str]]:
+        """Status and lease owner of the project; (None, None) if it was deleted."""
+        async with self.session_factory() as session:
+            row = (
+                await session.execute(
+                    select(VideoProject.status, VideoProject.lease_owner).where(
+                        VideoProject.id == self.project_id
+                    )
+                )
+            ).one_or_none()
+        return (row.status, row.lease_owner) if row else (None, None)
+
+    async def _beat(self) -> None:
+        renewed_at = time.monotonic()
+        while True:
+            await asyncio.sleep(self.check_interval)
+            try:
+                if time.monotonic() - renewed_at >= self.heartbeat_interval - self.check_interval / 2:
+                    if await self.renew():
+                        renewed_at = time.monotonic()
+                        continue
+                status, owner = await self._state()
+            except Exception:
+                # A database hiccup is retried until the lease actually runs out
+                log.exception("Heartbeat of video project %s failed", self.project_id)
+                continue
+
+            if status is None or status == VideoStatus.CANCELLED:
+                self.lost = ProjectCancelled(f"Video project {self.project_id} was cancelled")
+            elif status != VideoStatus.PROCESSING or owner != self.owner:
+                self.lost = LeaseLost(f"Lease of video project {self.project_id} was lost")
+            else:
+                continue
+            log.warning("%s, stopping %s", self.lost, self.owner)
+            self._owner_task.cancel()
+            return
+
+    async def __aenter__(self) -> "ProjectLease":
+        self._owner_task = asyncio.current_task()
+        self._heartbeat = asyncio.create_task(self._beat())
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        self._heartbeat.cancel()
+        try:
+            await self._heartbeat
+        except asyncio.CancelledError:
+            pass
+        if self.lost is not None and exc_type is asyncio.CancelledError:
+            # The cancellation came from our heartbeat, not from outside
+            self._owner_task.uncancel()
+            raise self.lost from None
+
+
+async def requeue_expired(
+    session: AsyncSession,
+    lease_seconds: float,
+    max_attempts: int,
+    backoff_seconds: float,
+    limit: int = 100,
+) -> tuple[list[VideoProject], list[VideoProject]]:
+    """
+    Release projects whose worker stopped sending heartbeats.
+
+    Changes are not committed: the caller commits them together with the
+    render messages of the requeued projects.
+
+    Returns:
+        Projects put back to PENDING (to be enqueued again by the caller) and
+        projects failed because they ran out of attempts
+    """
+    now = utcnow()
+    stmt = (
+        select(VideoProject)
+        .where(
+            VideoProject.status == VideoStatus.PROCESSING,
+            or_(
+                VideoProject.lease_expires_at < now,
+                # Rows left by workers that predate leases
+                and_(
+                    VideoProject.lease_expires_at.is_(None),
+                    VideoProject.updated_at < now - timedelta(seconds=lease_seconds),
+                ),
+            ),
+        )
+        .order_by(VideoProject.id)
+        .limit(limit)
+    )
+    requeued, failed = [], []
+    for project in (await session.scalars(stmt)).all():
+        expired_at = project.lease_expires_at or project.updated_at
+        if expired_at.tzinfo is None:
+            # SQLite returns naive UTC datetimes
+            expired_at = expired_at.replace(tzinfo=timezone.utc)
+
+        if project.attempts >= max_attempts:
+            project.status = VideoStatus.FAILED
+            project.error_message = f"Rendering was interrupted {project.attempts} times"
+            failed.append(project)
+        elif now >= expired_at + timedelta(seconds=retry_delay(project.attempts, backoff_seconds)):
+            project.status = VideoStatus.PENDING
+            project.stage = VideoStage.QUEUED
+            project.progress = 0.0
+            requeued.append(project)
+        else:
+            continue
+        project.lease_owner = None
+        project.lease_expires_at = None
+        project.eta_seconds = None
+
+    return requeued, failed
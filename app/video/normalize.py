@@ -0,0 +1,81 @@
+"""
+Image normalization stage of the video pipeline.
+
+Uploaded images arrive in arbitrary sizes, orientations and formats. Before they
+reach the encoder each one is rotated according to its EXIF orientation, scaled
+to fit the target profile, centered on a canvas of exactly the profile size and
+converted to RGB, so the encoder only ever sees small, uniform frames.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Sequence
+
+from PIL import Image as PILImage, ImageOps
+
+# Bilinear with reducing_gap gives results close to Lanczos at a fraction of the cost
+RESAMPLE = PILImage.Resampling.BILINEAR
+REDUCING_GAP = 2.0
+BACKGROUND = (0, 0, 0)
+
+
+def fit_size(src_size: tuple[int, int], target: tuple[int, int]) -> tuple[int, int]:
+    """Largest size with the aspect ratio of src_size that fits into target."""
+    src_w, src_h = src_size
+    dst_w, dst_h = target
+    scale = min(dst_w / src_w, dst_h / src_h)
+    return max(1, round(src_w * scale)), max(1, round(src_h * scale))
+
+
+def normalize_image(src: Path, dst: Path, size: tuple[int, int]) -> Path:
+    """
+    Normalize a single image and save it to dst as PNG.
+
+    Returns:
+        Path of the written file
+    """
+    with PILImage.open(src) as img:
+        # JPEG can be decoded directly at 1/2, 1/4 or 1/8 scale, which is much
+        # cheaper than decoding the full image and downscaling it afterwards.
+        # Ask for the longest side so a 90° EXIF rotation still has enough pixels.
+        longest = max(size)
+        img.draft("RGB", (longest, longest))
+
+        img = ImageOps.exif_transpose(img)
+
+        if img.mode in ("RGBA", "LA") or (img.mode == "P" and "transparency" in img.info):
+            img = img.convert("RGBA")
+        elif img.mode != "RGB":
+            img = img.convert("RGB")
+
+        new_size = fit_size(img.size, size)
+        if new_size != img.size:
+            img = img.resize(new_size, RESAMPLE, reducing_gap=REDUCING_GAP)
+
+        canvas = PILImage.new("RGB", size, BACKGROUND)
+        offset = ((size[0] - new_size[0]) // 2, (size[1] - new_size[1]) // 2)
+        mask = img if img.mode == "RGBA" else None
+        canvas.paste(img, offset, mask)
+
+    # compress_level=1: the file is a short-lived intermediate, speed matters more than size
+    canvas.save(dst, format="PNG", compress_level=1)
+    return dst
+
+
+def normalize_images(
+    sources: Sequence[Path],
+    out_dir: Path,
+    size: tuple[int, int],
+    workers: int = 4,
+) -> list[Path]:
+    """
+    Normalize images in parallel, preserving their order.
+
+    Pillow releases the GIL while decoding, resizing and encoding, so a thread
+    pool scales across cores without the pickling overhead of processes.
+    """
+    out_dir.mkdir(parents=True, exist_ok=True)
+    targets = [out_dir / f"frame_{idx:05d}.png" for idx in range(len(sources))]
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        return list(executor.map(normalize_image, sources, targets, [size] * len(sources)))
@@ -0,0 +1,29 @@
+"""
+Output resolution profiles for rendered videos.
+
+Every dimension is even, so the frames can be encoded as yuv420p without an
+extra scale filter.
+"""
+
+VIDEO_PROFILES: dict[str, tuple[int, int]] = {
+    "480p": (854, 480),
+    "720p": (1280, 720),
+    "1080p": (1920, 1080),
+}
+
+# Target H.264 bitrates of HLS renditions
+VIDEO_BITRATES: dict[str, str] = {
+    "480p": "1400k",
+    "720p": "2800k",
+    "1080p": "5000k",
+}
+
+
+def get_profile_size(profile: str) -> tuple[int, int]:
+    """Return (width, height) for a profile name."""
+    try:
+        return VIDEO_PROFILES[profile]
+    except KeyError:
+        raise ValueError(
+            f"Unknown video profile: {profile}. Allowed: {', '.join(VIDEO_PROFILES)}"
+        )
@@ -0,0 +1,81 @@
+"""
+Progress tracking for video rendering.
+
+Progress is written to the VideoProject row with a single UPDATE and published
+on the status bus, throttled to settings.video.progress_interval.
+"""
+
+import time
+from typing import Any, Optional
+
+from sqlalchemy import update
+
+from models import db_helper
+from models.video_project import VideoProject, VideoStatus, VideoStage
+
+from .status_bus import status_bus
+
+
+def project_event(project: VideoProject) -> dict[str, Any]:
+    """Status event payload for a project."""
+    return {
+        "id": project.id,
+        "status": VideoStatus(project.status).value,
+        "stage": VideoStage(project.stage).value,
+        "progress": project.progress,
+        "eta_seconds": project.eta_seconds,
+        "error_message": project.error_message,
+        "video_path": project.video_path,
+    }
+
+
+async def publish_project(project: VideoProject) -> None:
+    await status_bus.publish(project_event(project))
+
+
+class ProgressReporter:
+    """Encoder progress callback that stores percent and ETA of the encode stage."""
+
+    def __init__(self, project_id: int, total_frames: int, interval: float):
+        self.project_id = project_id
+        self.total_frames = max(1, total_frames)
+        self.interval = interval
+        self._started = time.monotonic()
+        self._last_report: Optional[float] = None
+
+    async def __call__(self, frames_done: int) -> None:
+        now = time.monotonic()
+        finished = frames_done >= self.total_frames
+        if (
+            not finished
+            and self._last_report is not None
+            and now - self._last_report < self.interval
+        ):
+            return
+        self._last_report = now
+
+        fraction = min(1.0, frames_done / self.total_frames)
+        eta_seconds = None
+        if fraction > 0:
+            eta_seconds = round((now - self._started) * (1 - fraction) / fraction)
+        progress = round(fraction * 100, 1)
+
+        async with db_helper.session_factory() as session:
+            await session.execute(
+                update(VideoProject)
+                .where(VideoProject.id == self.project_id)
+                .values(progress=progress, eta_seconds=eta_seconds)
+            )
+            await session.commit()
+
+        await status_bus.publish(
+            {
+                "id": self.project_id,
+                "status": VideoStatus.PROCESSING.value,
+                "stage": VideoStage.ENCODING.value,
+                "progress": progress,
+                "eta_seconds": eta_seconds,
+                "error_message": None,
+                "video_path": None,
+            }
+        )
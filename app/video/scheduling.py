@@ -0,0 +1,186 @@
+"""
+Render scheduling: cost estimate, small/large lanes and per-owner fairness.
+
+The broker queue stays a plain FIFO. Its messages are render slots, not
+assignments: a worker that receives the message of a project claims the most
+deserving pending project of that project's lane, which may be another one.
+Every pending project has exactly one message on its way, so each message
+still renders one project, but in scheduler order:
+
+- lanes: projects above settings.scheduler.small_lane_max_cost go to the large
+  lane, and at most large_lane_slots of them render at once, so a few huge
+  uploads cannot occupy every worker. A slot that finds its own lane empty or
+  full renders a project of the other lane instead;
+- fairness: within a lane the owner who consumed the least render cost
+  recently (projects rendering or finished within fairness_window_seconds)
+  goes first, then the oldest project. After one of a user's 50 uploads
+  renders, another user's first upload is next.
+
+A message that finds nothing to claim (a duplicate, or its project already
+rendered by another slot) is dropped.
+"""
+
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Sequence
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from config.config import VideoConfig
+from models.video_project import VideoProject, VideoStatus
+from outbox import add_message
+
+from .hls import hls_renditions
+from .lease import ProjectLease
+from .profiles import get_profile_size
+
+# Name of tasks.video_tasks.generate_video_task, which consumes render messages
+RENDER_TASK = "tasks.video_tasks:generate_video_task"
+
+SMALL_LANE = "small"
+LARGE_LANE = "large"
+LANES = (SMALL_LANE, LARGE_LANE)
+
+# Claims lost to concurrent workers before giving up on a message
+MAX_CLAIM_RACES = 5
+
+
+def owner_key(user_id: Optional[int], client_host: Optional[str]) -> str:
+    """Fair-share key of a project: its user, or the client address for anonymous uploads."""
+    if user_id is not None:
+        return f"user:{user_id}"
+    return f"ip:{client_host or 'unknown'}"
+
+
+def estimate_render_cost(
+    image_sizes: Sequence[tuple[int, int]],
+    output_format: str,
+    video: VideoConfig,
+) -> float:
+    """
+    Render cost in megapixels processed: decoding every source image plus
+    encoding every output frame (every rendition for HLS).
+
+    Normalizing is proportional to the source pixels and encoding to the
+    output pixels, which covers most of a render's CPU time.
+    """
+    size = get_profile_size(video.profile)
+    frames = len(image_sizes) * max(1, round(video.image_duration * video.fps))
+    if output_format == "hls":
+        frame_pixels = sum(width * height for width, height in (
+            rendition.size for rendition in hls_renditions(video.hls_renditions, size)
+        ))
+    else:
+        frame_pixels = size[0] * size[1]
+    source_pixels = sum(width * height for width, height in image_sizes)
+    return (frames * frame_pixels + source_pixels) / 1_000_000
+
+
+def schedule_render(
+    project: VideoProject,
+    image_sizes: Sequence[tuple[int, int]],
+    video: VideoConfig,
+    small_lane_max_cost: float,
+) -> None:
+    """Put a project in the queue: estimate its cost and choose its lane."""
+    project.render_cost = estimate_render_cost(image_sizes, project.output_format, video)
+    project.lane = SMALL_LANE if project.render_cost <= small_lane_max_cost else LARGE_LANE
+    project.queued_at = datetime.now(timezone.utc)
+
+
+def enqueue_render(session: AsyncSession, project: VideoProject) -> None:
+    """Add the render message of a pending project to the outbox of the current transaction."""
+    add_message(session, RENDER_TASK, project.id)
+
+
+async def queue_depth(session: AsyncSession) -> dict[tuple[str, str], int]:
+    """Pending and processing projects per (lane, status); the index answers it."""
+    rows = await session.execute(
+        select(VideoProject.lane, VideoProject.status, func.count())
+        .where(VideoProject.status.in_((VideoStatus.PENDING, VideoStatus.PROCESSING)))
+        .group_by(VideoProject.lane, VideoProject.status)
+    )
+    depth = {(lane, status.value): 0 for lane in LANES for status in (
+        VideoStatus.PENDING, VideoStatus.PROCESSING
+    )}
+    for lane, status, count in rows:
+        depth[(lane or SMALL_LANE, VideoStatus(status).value)] += count
+    return depth
+
+
+async def next_project_id(
+    session: AsyncSession,
+    lane: str,
+    large_lane_slots: int,
+    fairness_window_seconds: float,
+) -> Optional[int]:
+    """Id of the pending project to render next by a slot of lane, or None."""
+    # heartbeat_at is set at claim time and kept after the render ends
+    served_since = datetime.now(timezone.utc) - timedelta(seconds=fairness_window_seconds)
+    served = (
+        select(
+            VideoProject.owner_key,
+            func.sum(VideoProject.render_cost).label("cost"),
+        )
+        .where(
+            VideoProject.status != VideoStatus.PENDING,
+            VideoProject.heartbeat_at > served_since,
+        )
+        .group_by(VideoProject.owner_key)
+        .subquery()
+    )
+    large_running = await session.scalar(
+        select(func.count()).where(
+            VideoProject.status == VideoStatus.PROCESSING,
+            VideoProject.lane == LARGE_LANE,
+        )
+    )
+    lanes = [lane] + [other for other in LANES if other != lane]
+    if large_running >= large_lane_slots:
+        lanes.remove(LARGE_LANE)
+
+    for candidate_lane in lanes:
+        project_id = await session.scalar(
+            select(VideoProject.id)
+            .outerjoin(served, served.c.owner_key == VideoProject.owner_key)
+            .where(
+                VideoProject.status == VideoStatus.PENDING,
+                VideoProject.lane == candidate_lane,
+            )
+            .order_by(
+                func.coalesce(served.c.cost, 0),
+                VideoProject.queued_at,
+                VideoProject.id,
+            )
+            .limit(1)
+        )
+        if project_id is not None:
+            return project_id
+    return None
+
+
+async def claim_next(
+    session: AsyncSession,
+    lane: str,
+    large_lane_slots: int,
+    fairness_window_seconds: float,
+    session_factory: async_sessionmaker[AsyncSession],
+    lease_seconds: float,
+    heartbeat_interval: float,
+    check_interval: Optional[float] = None,
+) -> Optional[ProjectLease]:
+    """Lease the next project for a slot of lane; None if nothing is left to render."""
+    for _ in range(MAX_CLAIM_RACES):
+        project_id = await next_project_id(
+            session, lane, large_lane_slots, fairness_window_seconds
+        )
+        await session.commit()
+        if project_id is None:
+            return None
+        lease = ProjectLease(
+            project_id, session_factory, lease_seconds, heartbeat_interval, check_interval
+        )
+        if await lease.acquire(session):
+            return lease
+        # Another worker claimed it between the select and the update
+    return None
@@ -0,0 +1,217 @@
+"""
+Pub/sub for video project status changes.
+
+Workers publish status events to a RabbitMQ fanout exchange. Every API process
+keeps a single consumer on that exchange and fans events out in memory to the
+clients streaming /videos/{id}/events, so thousands of waiting clients cost one
+subscription per process instead of thousands of DB polls.
+
+Without RabbitMQ (settings.broker.mode) the transport follows the broker:
+"memory" runs tasks in the API process, so events go straight into the hub;
+"local" workers send them as UDP datagrams to every API process on the host.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import socket
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Optional
+
+import aio_pika
+
+from config.config import BrokerConfig, settings
+
+log = logging.getLogger(__name__)
+
+TERMINAL_STATUSES = {"success", "failed", "cancelled"}
+
+
+class StatusHub:
+    """In-process fan-out of status events to per-project subscriber queues."""
+
+    def __init__(self, queue_size: int = 16):
+        self.queue_size = queue_size
+        self._subscribers: dict[int, set[asyncio.Queue]] = defaultdict(set)
+
+    def subscribe(self, project_id: int) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers[project_id].add(queue)
+        return queue
+
+    def unsubscribe(self, project_id: int, queue: asyncio.Queue) -> None:
+        subscribers = self._subscribers.get(project_id)
+        if subscribers is None:
+            return
+        subscribers.discard(queue)
+        if not subscribers:
+            del self._subscribers[project_id]
+
+    def dispatch(self, event: dict[str, Any]) -> None:
+        for queue in self._subscribers.get(event["id"], ()):
+            if queue.full():
+                # A slow client only needs the latest state, drop the oldest event
+                queue.get_nowait()
+            queue.put_nowait(event)
+
+
+class StatusBus:
+    """Publishes status events to a fanout exchange and feeds them into a hub."""
+
+    def __init__(self, url: str, exchange_name: str):
+        self.url = url
+        self.exchange_name = exchange_name
+        self._connection: Optional[aio_pika.abc.AbstractRobustConnection] = None
+        self._channel: Optional[aio_pika.abc.AbstractChannel] = None
+        self._exchange: Optional[aio_pika.abc.AbstractExchange] = None
+        self._lock = asyncio.Lock()
+
+    async def _get_exchange(self) -> aio_pika.abc.AbstractExchange:
+        async with self._lock:
+            if self._exchange is None:
+                self._connection = await aio_pika.connect_robust(self.url)
+                self._channel = await self._connection.channel()
+                self._exchange = await self._channel.declare_exchange(
+                    self.exchange_name, aio_pika.ExchangeType.FANOUT
+                )
+            return self._exchange
+
+    async def publish(self, event: dict[str, Any]) -> None:
+        """Publish an event; failures are logged, status delivery is best effort."""
+        try:
+            exchange = await self._get_exchange()
+            await exchange.publish(
+                aio_pika.Message(
+                    body=json.dumps(event).encode(),
+                    content_type="application/json",
+                ),
+                routing_key="",
+            )
+        except Exception:
+            log.exception("Failed to publish status event for project %r", event.get("id"))
+
+    async def consume(self, hub: StatusHub) -> None:
+        """Bind an exclusive queue to the exchange and dispatch events into hub."""
+        exchange = await self._get_exchange()
+        queue = await self._channel.declare_queue(exclusive=True, auto_delete=True)
+        await queue.bind(exchange)
+
+        async def on_message(message: aio_pika.abc.AbstractIncomingMessage) -> None:
+            hub.dispatch(json.loads(message.body))
+
+        await queue.consume(on_message, no_ack=True)
+
+    async def close(self) -> None:
+        if self._connection is not None:
+            await self._connection.close()
+        self._connection = None
+        self._channel = None
+        self._exchange = None
+
+
+class InProcessStatusBus:
+    """Status bus of the in-memory broker: tasks run next to the hub."""
+
+    def __init__(self):
+        self._hub: Optional[StatusHub] = None
+
+    async def publish(self, event: dict[str, Any]) -> None:
+        if self._hub is not None:
+            self._hub.dispatch(event)
+
+    async def consume(self, hub: StatusHub) -> None:
+        self._hub = hub
+
+    async def close(self) -> None:
+        self._hub = None
+
+
+class _DatagramReceiver(asyncio.DatagramProtocol):
+    def __init__(self, hub: StatusHub):
+        self.hub = hub
+
+    def datagram_received(self, data: bytes, addr) -> None:
+        try:
+            self.hub.dispatch(json.loads(data))
+        except ValueError:
+            log.warning("Malformed status datagram from %s", addr)
+
+
+class LoopbackStatusBus:
+    """
+    Status bus of the local broker, for processes on one host.
+
+    Every consuming API process listens on a loopback UDP port and announces
+    it with a file in directory; publishers send each event to all announced
+    ports. Delivery is best effort, like the AMQP bus.
+    """
+
+    # How long publishers reuse the list of announced ports, seconds
+    PORTS_TTL = 1.0
+
+    def __init__(self, directory: Path):
+        self.directory = directory
+        self._receiver: Optional[asyncio.DatagramTransport] = None
+        self._sender: Optional[asyncio.DatagramTransport] = None
+        self._port_file: Optional[Path] = None
+        self._ports: list[int] = []
+        self._ports_read_at = 0.0
+
+    def _announced_ports(self) -> list[int]:
+        now = time.monotonic()
+        if now - self._ports_read_at > self.PORTS_TTL:
+            ports = []
+            for path in self.directory.glob("*.port"):
+                try:
+                    ports.append(int(path.read_text()))
+                except (OSError, ValueError):
+                    continue  # removed or being written
+            self._ports = ports
+            self._ports_read_at = now
+        return self._ports
+
+    async def publish(self, event: dict[str, Any]) -> None:
+        """Publish an event; failures are logged, status delivery is best effort."""
+        try:
+            if self._sender is None:
+                self._sender, _ = await asyncio.get_running_loop().create_datagram_endpoint(
+                    asyncio.DatagramProtocol, family=socket.AF_INET
+                )
+            data = json.dumps(event).encode()
+            for port in self._announced_ports():
+                self._sender.sendto(data, ("127.0.0.1", port))
+        except Exception:
+            log.exception("Failed to publish status event for project %r", event.get("id"))
+
+    async def consume(self, hub: StatusHub) -> None:
+        self._receiver, _ = await asyncio.get_running_loop().create_datagram_endpoint(
+            lambda: _DatagramReceiver(hub), local_addr=("127.0.0.1", 0)
+        )
+        port = self._receiver.get_extra_info("sockname")[1]
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._port_file = self.directory / f"{os.getpid()}.port"
+        self._port_file.write_text(str(port))
+
+    async def close(self) -> None:
+        for transport in (self._receiver, self._sender):
+            if transport is not None:
+                transport.close()
+        self._receiver = self._sender = None
+        if self._port_file is not None:
+            self._port_file.unlink(missing_ok=True)
+            self._port_file = None
+
+
+def build_status_bus(config: BrokerConfig):
+    if config.mode == "memory":
+        return InProcessStatusBus()
+    if config.mode == "local":
+        return LoopbackStatusBus(Path(config.spool_dir) / "status")
+    return StatusBus(config.url, config.status_exchange)
+
+
+status_hub = StatusHub()
+status_bus = build_status_bus(settings.broker)
@@ -0,0 +1,76 @@
+"""
+Preview images: WebP thumbnails of the uploaded images and a poster for the video.
+
+Runs in the worker next to the encode, so listings can show small previews
+instead of full-size originals.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Sequence
+
+from PIL import Image as PILImage, ImageOps
+
+from .normalize import REDUCING_GAP, RESAMPLE
+
+# method=4 is libwebp's default trade-off; 6 is ~2x slower for a few % smaller files
+WEBP_METHOD = 4
+
+
+def make_thumbnail(src: Path, dst: Path, max_side: int, quality: int) -> Path:
+    """Save a WebP copy of src whose longest side is at most max_side."""
+    with PILImage.open(src) as img:
+        img.draft("RGB", (max_side, max_side))
+        img = ImageOps.exif_transpose(img)
+
+        if img.mode in ("RGBA", "LA") or (img.mode == "P" and "transparency" in img.info):
+            img = img.convert("RGBA")
+        elif img.mode != "RGB":
+            img = img.convert("RGB")
+
+        img.thumbnail((max_side, max_side), RESAMPLE, reducing_gap=REDUCING_GAP)
+        img.save(dst, format="WEBP", quality=quality, method=WEBP_METHOD)
+    return dst
+
+
+def make_poster(first_frame: Path, dst: Path, quality: int) -> Path:
+    """
+    Save the poster of a video as WebP.
+
+    first_frame is the normalized first image, i.e. the picture the video
+    opens with, already at the profile size and letterboxed.
+    """
+    with PILImage.open(first_frame) as img:
+        img.save(dst, format="WEBP", quality=quality, method=WEBP_METHOD)
+    return dst
+
+
+def make_previews(
+    sources: Sequence[Path],
+    first_frame: Path,
+    out_dir: Path,
+    max_side: int,
+    quality: int,
+    workers: int = 2,
+) -> tuple[list[Path], Path]:
+    """
+    Thumbnails of sources (in order) and the poster, built in a thread pool.
+
+    Returns:
+        (thumbnail paths, poster path)
+    """
+    out_dir.mkdir(parents=True, exist_ok=True)
+    targets = [out_dir / f"thumb_{idx:05d}.webp" for idx in range(len(sources))]
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        poster = executor.submit(make_poster, first_frame, out_dir / "poster.webp", quality)
+        thumbnails = list(
+            executor.map(
+                make_thumbnail,
+                sources,
+                targets,
+                [max_side] * len(sources),
+                [quality] * len(sources),
+            )
+        )
+        return thumbnails, poster.result()
@@ -0,0 +1,131 @@
+"""
+Slideshow frame generation with transitions.
+
+Frames are produced with vectorized NumPy operations over buffers that are
+allocated once per render, and yielded one by one so they can be streamed into
+the encoder. Supported transitions:
+
+- none: hard cut between images
+- crossfade: linear blend into the next image
+- kenburns: slow pan/zoom over every image plus a crossfade between them
+"""
+
+from pathlib import Path
+from typing import Iterable, Iterator, Optional, Sequence
+
+import numpy as np
+from PIL import Image as PILImage
+
+TRANSITIONS = ("none", "crossfade", "kenburns")
+
+
+def load_frames(paths: Sequence[Path]) -> Iterator[np.ndarray]:
+    """Lazily decode normalized images into (height, width, 3) uint8 arrays."""
+    for path in paths:
+        with PILImage.open(path) as img:
+            yield np.asarray(img.convert("RGB"))
+
+
+class SlideshowRenderer:
+    """
+    Turn a sequence of equally sized images into video frames.
+
+    The yielded array may be a reused internal buffer: consume (encode) it
+    before requesting the next frame.
+    """
+
+    def __init__(
+        self,
+        size: tuple[int, int],
+        fps: int,
+        image_duration: float,
+        transition: str = "none",
+        transition_duration: float = 0.5,
+        zoom: float = 1.15,
+    ):
+        if transition not in TRANSITIONS:
+            raise ValueError(
+                f"Unknown transition: {transition}. Allowed: {', '.join(TRANSITIONS)}"
+            )
+        width, height = size
+        self.transition = transition
+        self.zoom = zoom
+        self.frames_per_slide = max(1, round(image_duration * fps))
+        self.transition_frames = 0
+        if transition != "none":
+            self.transition_frames = min(
+                round(transition_duration * fps), self.frames_per_slide - 1
+            )
+
+        self._out = np.empty((height, width, 3), dtype=np.uint8)
+        self._incoming = np.empty((height, width, 3), dtype=np.uint8)
+        self._rows = np.empty((height, width, 3), dtype=np.uint8)
+        self._acc = np.empty((height, width, 3), dtype=np.uint16)
+        self._tmp = np.empty((height, width, 3), dtype=np.uint16)
+        # Pixel centers, used to map output pixels into the pan/zoom window
+        self._ys = np.arange(height) + 0.5
+        self._xs = np.arange(width) + 0.5
+
+    def total_frames(self, count: int) -> int:
+        """Number of frames rendered for count images."""
+        return count * self.frames_per_slide
+
+    def frames(self, slides: Iterable[np.ndarray]) -> Iterator[np.ndarray]:
+        slides = iter(slides)
+        current: Optional[np.ndarray] = next(slides, None)
+        index = 0
+
+        while current is not None:
+            upcoming = next(slides, None)
+
+            for local in range(self.frames_per_slide):
+                frame = self._slide_frame(current, index, local, self._out)
+
+                remaining = self.frames_per_slide - local
+                if upcoming is not None and remaining <= self.transition_frames:
+                    step = self.transition_frames - remaining + 1
+                    weight = round(256 * step / (self.transition_frames + 1))
+                    incoming = self._slide_frame(upcoming, index + 1, 0, self._incoming)
+                    frame = self._blend(frame, incoming, weight, self._out)
+
+                yield frame
+
+            current = upcoming
+            index += 1
+
+    def _slide_frame(
+        self, image: np.ndarray, index: int, local: int, out: np.ndarray
+    ) -> np.ndarray:
+        if self.transition != "kenburns":
+            return image
+
+        height, width = image.shape[:2]
+        t = local / max(1, self.frames_per_slide - 1)
+        # Even slides zoom in and pan right, odd slides zoom out and pan left
+        if index % 2:
+            t = 1.0 - t
+        scale = 1.0 + (self.zoom - 1.0) * t
+
+        crop_w = width / scale
+        crop_h = height / scale
+        x0 = (width - crop_w) * t
+        y0 = (height - crop_h) / 2
+
+        rows = np.minimum((y0 + self._ys / scale).astype(np.intp), height - 1)
+        cols = np.minimum((x0 + self._xs / scale).astype(np.intp), width - 1)
+
+        # Nearest-neighbour resampling as two gathers into preallocated buffers
+        np.take(image, rows, axis=0, out=self._rows)
+        np.take(self._rows, cols, axis=1, out=out)
+        return out
+
+    def _blend(
+        self, a: np.ndarray, b: np.ndarray, weight: int, out: np.ndarray
+    ) -> np.ndarray:
+        """out = (a * (256 - weight) + b * weight) / 256, in 16-bit integer math."""
+        np.multiply(a, 256 - weight, out=self._acc, dtype=np.uint16)
+        np.multiply(b, weight, out=self._tmp, dtype=np.uint16)
+        self._acc += self._tmp
+        self._acc >>= 8
+        np.copyto(out, self._acc, casting="unsafe")
+        return out
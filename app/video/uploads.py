@@ -0,0 +1,444 @@
+"""
+Streaming intake of uploaded images.
+
+Multipart bodies are parsed straight from the request stream and files are
+written to a staging directory chunk by chunk, with disk writes offloaded to a
+thread and the SHA-256 computed on the fly. The content is checked by its
+magic bytes in its first 16 bytes and by decoded dimensions before anything is
+moved to permanent storage.
+
+Resumable (tus-style) uploads append request bodies to a per-file staging file
+whose size is the received offset, so a retry only resends the missing bytes.
+"""
+
+import asyncio
+import hashlib
+import shutil
+import uuid
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import AsyncIterator, BinaryIO, Optional
+
+from fastapi import HTTPException, Request, UploadFile, status
+from PIL import Image as PILImage
+from python_multipart.multipart import MultipartParser, parse_options_header
+
+from config.config import settings
+
+try:
+    import fcntl
+except ImportError:  # Windows: only the in-process guard applies
+    fcntl = None
+
+ALLOWED_FORMATS = ("jpg", "png", "webp")
+# Plain form fields (e.g. transition) are kept in memory
+MAX_FORM_FIELD_BYTES = 64 * 1024
+
+
+def detect_image_type(head: bytes) -> Optional[str]:
+    """Image format by magic bytes: jpg, png, webp or None."""
+    if head.startswith(b"\xff\xd8\xff"):
+        return "jpg"
+    if head.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "png"
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "webp"
+    return None
+
+
+def read_dimensions(path: Path) -> tuple[int, int]:
+    """Width and height from the image header; raises if the file cannot be decoded."""
+    with PILImage.open(path) as img:
+        img.verify()
+        return img.size
+
+
+class StagedImage:
+    """An uploaded image that passed validation and waits in the staging directory."""
+
+    def __init__(
+        self,
+        path: Path,
+        image_type: str,
+        sha256: str,
+        size_bytes: int,
+        width: int,
+        height: int,
+    ):
+        self.path = path
+        self.image_type = image_type
+        self.sha256 = sha256
+        self.size_bytes = size_bytes
+        self.width = width
+        self.height = height
+
+    @property
+    def extension(self) -> str:
+        return f".{self.image_type}"
+
+
+def _reject(code: int, detail: str) -> HTTPException:
+    return HTTPException(status_code=code, detail=detail)
+
+
+def check_dimensions(filename: str, width: int, height: int) -> None:
+    limits = settings.upload
+    if min(width, height) < limits.min_image_side:
+        raise _reject(
+            status.HTTP_400_BAD_REQUEST,
+            f"Image too small: {filename} ({width}x{height})",
+        )
+    if max(width, height) > limits.max_image_side or width * height > limits.max_image_pixels:
+        raise _reject(
+            status.HTTP_400_BAD_REQUEST,
+            f"Image too large: {filename} ({width}x{height})",
+        )
+
+
+async def validate_staged_file(path: Path, filename: str, image_type: str) -> tuple[int, int]:
+    """Decode the header of a fully received file and check its dimensions."""
+    try:
+        width, height = await asyncio.to_thread(read_dimensions, path)
+    except Exception:
+        raise _reject(
+            status.HTTP_400_BAD_REQUEST,
+            f"Corrupted or unsupported image: {filename}",
+        )
+    check_dimensions(filename, width, height)
+    return width, height
+
+
+class _FileIntake:
+    """One file being streamed into staging: type sniffing, limits and hashing."""
+
+    def __init__(self, staging: "UploadStaging", filename: str):
+        self.staging = staging
+        self.filename = filename
+        self.path = staging.root / uuid.uuid4().hex
+        self.digest = hashlib.sha256()
+        self.size = 0
+        self.image_type: Optional[str] = None
+        self._head = b""
+        self._out: Optional[BinaryIO] = None
+
+    async def write(self, chunk: bytes) -> None:
+        limits = settings.upload
+        if self._out is None:
+            self._out = await asyncio.to_thread(open, self.path, "wb")
+        if self.image_type is None:
+            self._head += chunk[: 16 - len(self._head)]
+            if len(self._head) >= 16:
+                self._detect()
+
+        self.size += len(chunk)
+        self.staging.total_bytes += len(chunk)
+        if self.size > limits.max_file_bytes:
+            raise _reject(
+                status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                f"File too large: {self.filename}. Limit: {limits.max_file_bytes} bytes",
+            )
+        if self.staging.total_bytes > limits.max_request_bytes:
+            raise _reject(
+                status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                f"Upload too large. Limit: {limits.max_request_bytes} bytes",
+            )
+
+        self.digest.update(chunk)
+        await asyncio.to_thread(self._out.write, chunk)
+
+    async def close(self) -> None:
+        if self._out is not None:
+            await asyncio.to_thread(self._out.close)
+            self._out = None
+
+    async def finish(self) -> StagedImage:
+        await self.close()
+        if not self.size:
+            raise _reject(status.HTTP_400_BAD_REQUEST, f"Empty file: {self.filename}")
+        if self.image_type is None:
+            self._detect()
+
+        width, height = await validate_staged_file(self.path, self.filename, self.image_type)
+        return StagedImage(
+            self.path, self.image_type, self.digest.hexdigest(), self.size, width, height
+        )
+
+    def _detect(self) -> None:
+        self.image_type = detect_image_type(self._head)
+        if self.image_type is None:
+            raise _reject(
+                status.HTTP_400_BAD_REQUEST,
+                f"Invalid file type: {self.filename}. Allowed: {', '.join(ALLOWED_FORMATS)}",
+            )
+
+
+class UploadStaging:
+    """
+    A per-request staging directory.
+
+    Usage:
+        async with UploadStaging() as staging:
+            staged, fields = await staging.receive_multipart(request)
+            ...move staged paths to permanent storage...
+    """
+
+    def __init__(self):
+        self.root = Path(settings.upload.staging_dir) / uuid.uuid4().hex
+        self.total_bytes = 0
+
+    async def __aenter__(self) -> "UploadStaging":
+        await asyncio.to_thread(self.root.mkdir, parents=True, exist_ok=True)
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        # Whatever was not moved to permanent storage is dropped
+        await asyncio.to_thread(shutil.rmtree, self.root, True)
+
+    async def receive(self, upload: UploadFile) -> StagedImage:
+        """Stream one already parsed UploadFile into the staging directory and validate it."""
+        intake = _FileIntake(self, upload.filename or "image")
+        try:
+            while chunk := await upload.read(settings.upload.chunk_size):
+                await intake.write(chunk)
+        finally:
+            await intake.close()
+        return await intake.finish()
+
+    async def receive_multipart(
+        self, request: Request, file_field: str = "images"
+    ) -> tuple[list[StagedImage], dict[str, str]]:
+        """
+        Parse a multipart/form-data body straight from the socket.
+
+        Unlike File(...) parameters, which let Starlette spool the whole body
+        to temporary files before the handler runs, limits apply while the
+        body arrives: Content-Length is checked before the first byte is read,
+        and each file is sniffed, counted and hashed as its bytes come in.
+
+        Returns:
+            Validated files of file_field in order, and the plain form fields
+        """
+        limits = settings.upload
+        mime, options = parse_options_header(request.headers.get("content-type", ""))
+        boundary = options.get(b"boundary")
+        if mime != b"multipart/form-data" or not boundary:
+            raise _reject(
+                status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+                "Expected a multipart/form-data body",
+            )
+
+        content_length = request.headers.get("content-length", "")
+        if content_length.isdigit() and int(content_length) > limits.max_request_bytes:
+            raise _reject(
+                status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                f"Upload too large. Limit: {limits.max_request_bytes} bytes",
+            )
+
+        # The parser is synchronous: callbacks only record events, which are
+        # handled after each chunk so that disk writes can be awaited
+        events: list[tuple[str, bytes]] = []
+        parser = MultipartParser(
+            boundary,
+            {
+                "on_part_begin": lambda: events.append(("begin", b"")),
+                "on_header_field": lambda data, start, end: events.append(("name", data[start:end])),
+                "on_header_value": lambda data, start, end: events.append(("value", data[start:end])),
+                "on_header_end": lambda: events.append(("header_end", b"")),
+                "on_headers_finished": lambda: events.append(("headers_done", b"")),
+                "on_part_data": lambda data, start, end: events.append(("data", data[start:end])),
+                "on_part_end": lambda: events.append(("end", b"")),
+            },
+        )
+
+        staged: list[StagedImage] = []
+        fields: dict[str, str] = {}
+        headers: dict[bytes, bytes] = {}
+        header_name = header_value = b""
+        field_name: Optional[str] = None
+        field_value = bytearray()
+        intake: Optional[_FileIntake] = None
+        body_bytes = 0
+
+        try:
+            async for chunk in request.stream():
+                body_bytes += len(chunk)
+                if body_bytes > limits.max_request_bytes:
+                    raise _reject(
+                        status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                        f"Upload too large. Limit: {limits.max_request_bytes} bytes",
+                    )
+                parser.write(chunk)
+
+                for kind, data in events:
+                    if kind == "begin":
+                        headers, header_name, header_value = {}, b"", b""
+                        field_name, field_value, intake = None, bytearray(), None
+                    elif kind == "name":
+                        header_name += data
+                    elif kind == "value":
+                        header_value += data
+                    elif kind == "header_end":
+                        headers[header_name.lower()] = header_value
+                        header_name = header_value = b""
+                    elif kind == "headers_done":
+                        _, disposition = parse_options_header(headers.get(b"content-disposition", b""))
+                        name = disposition.get(b"name", b"").decode(errors="replace")
+                        filename = disposition.get(b"filename")
+                        if filename is None:
+                            field_name = name
+                        elif name == file_field:
+                            if len(staged) >= limits.max_files:
+                                raise _reject(
+                                    status.HTTP_400_BAD_REQUEST,
+                                    f"Too many images. Limit: {limits.max_files}",
+                                )
+                            intake = _FileIntake(self, filename.decode(errors="replace") or "image")
+                    elif kind == "data":
+                        if intake is not None:
+                            await intake.write(data)
+                        elif field_name is not None:
+                            field_value += data
+                            if len(field_value) > MAX_FORM_FIELD_BYTES:
+                                raise _reject(
+                                    status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                                    f"Form field too large: {field_name}",
+                                )
+                    elif kind == "end":
+                        if intake is not None:
+                            staged.append(await intake.finish())
+                            intake = None
+                        elif field_name is not None:
+                            fields[field_name] = field_value.decode(errors="replace")
+                events.clear()
+            parser.finalize()
+        finally:
+            if intake is not None:
+                await intake.close()
+
+        return staged, fields
+
+
+# Resumable parts with a PATCH in flight in this process
+_parts_in_progress: set[Path] = set()
+
+
+def upload_expires_at(created_at: datetime) -> datetime:
+    """When an unfinished resumable upload started at created_at is deleted."""
+    if created_at.tzinfo is None:
+        # SQLite returns naive UTC timestamps
+        created_at = created_at.replace(tzinfo=timezone.utc)
+    expires_at = created_at + timedelta(seconds=settings.upload.resumable_ttl_seconds)
+    return expires_at.astimezone(timezone.utc)
+
+
+def resumable_part_path(project_id: int, order_index: int) -> Path:
+    """Staging file of one file of a resumable upload."""
+    return (
+        Path(settings.upload.staging_dir)
+        / "resumable"
+        / f"project_{project_id}"
+        / f"part_{order_index}"
+    )
+
+
+def received_bytes(path: Path) -> int:
+    try:
+        return path.stat().st_size
+    except FileNotFoundError:
+        return 0
+
+
+def _open_part(path: Path, filename: str) -> BinaryIO:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    out = open(path, "ab")
+    if fcntl is not None:
+        try:
+            fcntl.flock(out.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            out.close()
+            raise _locked(filename)
+    return out
+
+
+def _locked(filename: str) -> HTTPException:
+    return _reject(status.HTTP_423_LOCKED, f"Upload of {filename} is already in progress")
+
+
+async def append_chunks(
+    path: Path,
+    chunks: AsyncIterator[bytes],
+    offset: int,
+    length: int,
+    filename: str,
+) -> int:
+    """
+    Append a request body to a partially received file.
+
+    Only one request may append to a part at a time: a client retrying after
+    a timeout while the first request is still streaming gets 423 instead of
+    both requests appending at the same offset. The guard is an in-process
+    set plus flock(2) on the staging file for other worker processes.
+
+    Args:
+        offset: Upload-Offset sent by the client, must equal the received size
+        length: declared total size of the file
+
+    Returns:
+        The new offset
+    """
+    if path in _parts_in_progress:
+        raise _locked(filename)
+    _parts_in_progress.add(path)
+    try:
+        out: BinaryIO = await asyncio.to_thread(_open_part, path, filename)
+        try:
+            if out.tell() != offset:
+                raise _reject(
+                    status.HTTP_409_CONFLICT,
+                    f"Offset mismatch for {filename}: expected {out.tell()}, got {offset}",
+                )
+
+            async for chunk in chunks:
+                if not chunk:
+                    continue
+                if offset == 0 and len(chunk) >= 12 and detect_image_type(chunk[:16]) is None:
+                    raise _reject(
+                        status.HTTP_400_BAD_REQUEST,
+                        f"Invalid file type: {filename}. Allowed: {', '.join(ALLOWED_FORMATS)}",
+                    )
+                if offset + len(chunk) > length:
+                    raise _reject(
+                        status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                        f"More data than declared for {filename}: {length} bytes",
+                    )
+                await asyncio.to_thread(out.write, chunk)
+                offset += len(chunk)
+        finally:
+            # Whatever arrived before a disconnect is kept, the client resumes
+            # from it; closing also releases the flock
+            await asyncio.to_thread(out.close)
+    finally:
+        _parts_in_progress.discard(path)
+
+    return offset
+
+
+def _hash_file(path: Path) -> tuple[bytes, str, int]:
+    with open(path, "rb") as f:
+        head = f.read(16)
+        f.seek(0)
+        digest = hashlib.file_digest(f, "sha256")
+    return head, digest.hexdigest(), path.stat().st_size
+
+
+async def finalize_part(path: Path, filename: str) -> StagedImage:
+    """Validate a completely received resumable file."""
+    head, sha256, size = await asyncio.to_thread(_hash_file, path)
+    image_type = detect_image_type(head)
+    if image_type is None:
+        raise _reject(
+            status.HTTP_400_BAD_REQUEST,
+            f"Invalid file type: {filename}. Allowed: {', '.join(ALLOWED_FORMATS)}",
+        )
+    width, height = await validate_staged_file(path, filename, image_type)
+    return StagedImage(path, image_type, sha256, size, width, height)
@@ -0,0 +1,305 @@
+"""
+Load scenarios for the recipe and video API against a seeded database.
+
+Drives the app in-process through ASGI (no network stack, no server), so the
+numbers are the cost of routing, queries and serialization. Seed the database
+first with seed_recipes.py:
+
+    python benchmarks/seed_recipes.py --db-url sqlite+aiosqlite:///bench.sqlite --recipes 100k
+    python benchmarks/api_scenarios.py --db-url sqlite+aiosqlite:///bench.sqlite --save-baseline base.json
+    python benchmarks/api_scenarios.py --db-url sqlite+aiosqlite:///bench.sqlite --baseline base.json
+
+Scenarios: list, filter, detail, by_ingredient, create, update, upload.
+create and update write to the database; run them against a copy of the
+dataset. upload only enqueues renders: the broker spools into a temporary
+directory and no worker consumes it.
+
+With --baseline the run is compared to a previous --save-baseline; a
+scenario whose throughput dropped or whose p95 grew by more than
+--tolerance is reported and the exit status is 1.
+"""
+
+import argparse
+import asyncio
+import io
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+APP_DIR = Path(__file__).resolve().parent.parent / "app"
+SCENARIOS = ("list", "filter", "detail", "by_ingredient", "create", "update", "upload")
+BENCH_EMAIL = "bench@example.com"
+BENCH_PASSWORD = "bench-password-1"
+
+
+def configure(tmp: Path, args: argparse.Namespace) -> None:
+    """Settings for the run; applied before the app is imported."""
+    os.environ.update({
+        "APP_CONFIG__DB__URL": args.db_url,
+        "APP_CONFIG__DB__ECHO": "false",
+        "APP_CONFIG__OBSERVABILITY__REQUEST_LOG": "false",
+        "APP_CONFIG__OBSERVABILITY__METRICS_DIR": str(tmp / "metrics"),
+        "APP_CONFIG__BROKER__MODE": "local",
+        "APP_CONFIG__BROKER__SPOOL_DIR": str(tmp / "broker"),
+        "APP_CONFIG__STORAGE__ROOT": str(tmp / "media"),
+        "APP_CONFIG__UPLOAD__STAGING_DIR": str(tmp / "uploads"),
+    })
+
+
+def absolute_sqlite_url(url: str) -> str:
+    """The benchmark runs from app/; a relative SQLite path is resolved before that."""
+    prefix, sep, path = url.partition(":///")
+    if not sep or not prefix.startswith("sqlite") or path.startswith("/") or path == ":memory:":
+        return url
+    return f"{prefix}:///{Path(path).resolve()}"
+
+
+def image_bytes(seed: int) -> bytes:
+    from PIL import Image
+
+    buffer = io.BytesIO()
+    color = (seed * 37 % 256, seed * 91 % 256, seed * 53 % 256)
+    Image.new("RGB", (640, 480), color).save(buffer, "JPEG", quality=85)
+    return buffer.getvalue()
+
+
+def percentile(values: list[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, round(fraction * (len(ordered) - 1)))]
+
+
+class Dataset:
+    """Id ranges of the seeded tables and the benchmark user's credentials."""
+
+    def __init__(self, rng: random.Random, recipes: int, ingredients: int, cuisines: int, allergens: int):
+        self.rng = rng
+        self.recipes = recipes
+        self.ingredients = ingredients
+        self.cuisines = cuisines
+        self.allergens = allergens
+        self.token = ""
+        self.own_recipe = 0
+        self.own_allergens: list[int] = []
+        self.images = [image_bytes(seed) for seed in range(4)]
+
+    def ingredient(self) -> int:
+        # Popular ingredients (low ids) match most recipes, the tail matches few
+        if self.rng.random() < 0.5:
+            return self.rng.randint(1, min(20, self.ingredients))
+        return self.rng.randint(1, self.ingredients)
+
+    def recipe_body(self) -> dict:
+        rng = self.rng
+        ingredient_ids = rng.sample(range(1, self.ingredients + 1), min(8, self.ingredients))
+        return {
+            "title": f"Bench recipe {rng.randint(1, 10**9)}",
+            "description": "Created by the load benchmark.",
+            "cooking_time": rng.randint(5, 120),
+            "difficulty": rng.randint(1, 5),
+            "cuisine_id": rng.randint(1, self.cuisines),
+            "allergen_ids": rng.sample(range(1, self.allergens + 1), min(2, self.allergens)),
+            "ingredients": [
+                {"ingredient_id": idx, "quantity": 100.0, "measurement": 1} for idx in ingredient_ids
+            ],
+        }
+
+
+def build_requests(data: Dataset) -> dict:
+    """Scenario name -> function returning the keyword arguments of one request."""
+    rng = data.rng
+    auth = lambda: {"Authorization": f"Bearer {data.token}"}  # noqa: E731
+
+    def listing():
+        return {"method": "GET", "url": "/api/receipts", "params": {"page": rng.randint(1, 50), "size": 50}}
+
+    def filtering():
+        ids = ",".join(str(data.ingredient()) for _ in range(rng.randint(1, 3)))
+        params = {"ingredient_id": ids, "order_by": rng.choice(("-id", "difficulty")), "size": 50}
+        if rng.random() < 0.3:
+            params["name__like"] = rng.choice(("Italian", "dish 1", "Thai"))
+        return {"method": "GET", "url": "/api/receipts", "params": params}
+
+    def detail():
+        return {"method": "GET", "url": f"/api/receipts/{rng.randint(1, data.recipes)}"}
+
+    def by_ingredient():
+        include = rng.choice(("", "cuisine", "cuisine,ingredients,allergens"))
+        return {
+            "method": "GET",
+            "url": f"/api/ingredients/{data.ingredient()}/recipes",
+            "params": {"include": include} if include else {},
+        }
+
+    def create():
+        return {"method": "POST", "url": "/api/receipts", "json": data.recipe_body(), "headers": auth()}
+
+    def update():
+        body = data.recipe_body()
+        # Concurrent updates changing the allergen links of one recipe conflict
+        # on their primary key; the benchmark measures the update, not that race
+        body["allergen_ids"] = data.own_allergens
+        return {"method": "PUT", "url": f"/api/receipts/{data.own_recipe}", "json": body, "headers": auth()}
+
+    def upload():
+        files = [
+            ("images", (f"{idx}.jpg", image, "image/jpeg"))
+            for idx, image in enumerate(data.images[: rng.randint(2, 4)])
+        ]
+        return {"method": "POST", "url": "/api/videos", "files": files}
+
+    return {
+        "list": listing,
+        "filter": filtering,
+        "detail": detail,
+        "by_ingredient": by_ingredient,
+        "create": create,
+        "update": update,
+        "upload": upload,
+    }
+
+
+async def prepare(client, args: argparse.Namespace) -> Dataset:
+    """Read the dataset's id ranges, sign in the benchmark user and give it a recipe."""
+    from sqlalchemy import func, select
+
+    from models import Allergen, Cuisine, Ingredient, Recipe, db_helper
+
+    async with db_helper.session_factory() as session:
+        recipes = await session.scalar(select(func.max(Recipe.id)))
+        ingredients = await session.scalar(select(func.max(Ingredient.id)))
+        cuisines = await session.scalar(select(func.max(Cuisine.id)))
+        allergens = await session.scalar(select(func.max(Allergen.id)))
+    if not recipes:
+        sys.exit("No recipes in the database; seed it with benchmarks/seed_recipes.py")
+
+    data = Dataset(random.Random(args.seed), recipes, ingredients, cuisines, allergens)
+    if not {"create", "update"} & set(args.scenarios):
+        return data
+
+    # 400 on a second run: the user already exists
+    await client.post("/api/auth/register", json={"email": BENCH_EMAIL, "password": BENCH_PASSWORD})
+    response = await client.post(
+        "/api/auth/login", data={"username": BENCH_EMAIL, "password": BENCH_PASSWORD}
+    )
+    response.raise_for_status()
+    data.token = response.json()["access_token"]
+    body = data.recipe_body()
+    response = await client.post(
+        "/api/receipts", json=body, headers={"Authorization": f"Bearer {data.token}"}
+    )
+    response.raise_for_status()
+    data.own_recipe = response.json()["id"]
+    data.own_allergens = body["allergen_ids"]
+    return data
+
+
+async def measure(client, make_request, requests: int, concurrency: int) -> dict:
+    latencies: list[float] = []
+    errors = 0
+    remaining = iter(range(requests))
+
+    async def worker():
+        nonlocal errors
+        for _ in remaining:
+            request = make_request()
+            started = time.perf_counter()
+            response = await client.request(**request)
+            latencies.append(time.perf_counter() - started)
+            if response.status_code >= 400:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    return {
+        "requests": requests,
+        "errors": errors,
+        "rps": requests / elapsed,
+        "p50": percentile(latencies, 0.50),
+        "p95": percentile(latencies, 0.95),
+        "p99": percentile(latencies, 0.99),
+    }
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Scenarios slower than the baseline beyond tolerance."""
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        if result["rps"] < base["rps"] * (1 - tolerance):
+            regressions.append(f"{name}: {result['rps']:.1f} req/s, baseline {base['rps']:.1f}")
+        if result["p95"] > base["p95"] * (1 + tolerance):
+            regressions.append(
+                f"{name}: p95 {result['p95'] * 1000:.1f}ms, baseline {base['p95'] * 1000:.1f}ms"
+            )
+    return regressions
+
+
+async def run(args: argparse.Namespace) -> dict:
+    import httpx
+
+    from main import app
+
+    results = {}
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+            data = await prepare(client, args)
+            requests = build_requests(data)
+            print(f"recipes={data.recipes} ingredients={data.ingredients} "
+                  f"requests={args.requests} concurrency={args.concurrency}")
+            print(f"{'scenario':<14} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>7}")
+            for name in args.scenarios:
+                await measure(client, requests[name], args.warmup, args.concurrency)
+                result = await measure(client, requests[name], args.requests, args.concurrency)
+                results[name] = result
+                print(f"{name:<14} {result['rps']:9.1f} {result['p50'] * 1000:9.1f} "
+                      f"{result['p95'] * 1000:9.1f} {result['p99'] * 1000:9.1f} {result['errors']:7}")
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db-url", required=True, help="async SQLAlchemy URL of a seeded database")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help="comma-separated")
+    parser.add_argument("--requests", type=int, default=200, help="measured requests per scenario")
+    parser.add_argument("--warmup", type=int, default=20, help="unmeasured requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--baseline", type=Path, help="compare with this results file")
+    parser.add_argument("--save-baseline", type=Path, help="write the results here")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="allowed regression, 0.15 = 15%%")
+    args = parser.parse_args()
+    args.scenarios = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+    args.db_url = absolute_sqlite_url(args.db_url)
+    baseline = json.loads(args.baseline.read_text()) if args.baseline else None
+    save_to = args.save_baseline.resolve() if args.save_baseline else None
+
+    with tempfile.TemporaryDirectory(prefix="api_bench_") as tmp:
+        configure(Path(tmp), args)
+        os.chdir(APP_DIR)
+        sys.path.insert(0, str(APP_DIR))
+        results = asyncio.run(run(args))
+
+    if save_to is not None:
+        save_to.write_text(json.dumps(results, indent=2))
+    if baseline is not None:
+        regressions = compare(results, baseline, args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            sys.exit(1)
+        print(f"no regressions beyond {args.tolerance:.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Shaping recipes for /api/ingredients/{id}/recipes: the per-row functions
+(recipe_to_dict + build_recipe_response) against the compiled shaper.
+
+    python benchmarks/data_shaping.py --rows 500 --repeat 20
+
+Rows are plain objects, so only the shaping is measured, not the ORM.
+"""
+
+import argparse
+import sys
+import timeit
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "app"))
+
+from utils.data_shaping import (  # noqa: E402
+    BASE_FIELDS,
+    build_recipe_response,
+    build_recipes_response_list,
+    compile_recipe_shaper,
+    recipe_to_dict,
+)
+
+CASES = {
+    "all fields": (set(BASE_FIELDS), set()),
+    "id,title + cuisine": ({"id", "title"}, {"cuisine"}),
+    "all fields + all includes": (set(BASE_FIELDS), {"cuisine", "allergens", "ingredients"}),
+}
+
+
+def make_recipes(rows: int) -> list[SimpleNamespace]:
+    cuisine = SimpleNamespace(id=1, name="Italian")
+    allergens = [SimpleNamespace(id=idx, name=f"Allergen {idx}") for idx in range(2)]
+    ingredients = [
+        SimpleNamespace(ingredient=SimpleNamespace(id=idx, name=f"Ingredient {idx}"), quantity=100.0, measurement=1)
+        for idx in range(8)
+    ]
+    return [
+        SimpleNamespace(
+            id=idx,
+            title=f"Recipe {idx}",
+            description="Synthetic",
+            cooking_time=30,
+            difficulty=2,
+            cuisine=cuisine,
+            allergens=allergens,
+            ingredients=ingredients,
+        )
+        for idx in range(rows)
+    ]
+
+
+def per_row(recipes, select_set, include_set):
+    return [build_recipe_response(recipe_to_dict(r, include_set), select_set, include_set) for r in recipes]
+
+
+def compiled(recipes, select_set, include_set):
+    shape = compile_recipe_shaper(select_set, include_set)
+    return [shape(r) for r in recipes]
+
+
+def list_per_row(data, select_set, include_set):
+    return [build_recipe_response(d, select_set, include_set) for d in data]
+
+
+def best(func, repeat: int) -> float:
+    return min(timeit.repeat(func, number=1, repeat=repeat))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    recipes = make_recipes(args.rows)
+    print(f"rows={args.rows}, best of {args.repeat}")
+    print(f"{'case':<44} {'per-row ms':>11} {'compiled ms':>12} {'speedup':>8}")
+    for name, (select_set, include_set) in CASES.items():
+        assert per_row(recipes, select_set, include_set) == compiled(recipes, select_set, include_set)
+        old = best(lambda: per_row(recipes, select_set, include_set), args.repeat)
+        new = best(lambda: compiled(recipes, select_set, include_set), args.repeat)
+        print(f"{'objects: ' + name:<44} {old * 1000:11.3f} {new * 1000:12.3f} {old / new:7.1f}x")
+
+        data = [recipe_to_dict(r, include_set) for r in recipes]
+        assert list_per_row(data, select_set, include_set) == build_recipes_response_list(
+            data, select_set, include_set
+        )
+        old = best(lambda: list_per_row(data, select_set, include_set), args.repeat)
+        new = best(lambda: build_recipes_response_list(data, select_set, include_set), args.repeat)
+        print(f"{'dicts: ' + name:<44} {old * 1000:11.3f} {new * 1000:12.3f} {old / new:7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Throughput of the /media pread fallback (what uvicorn gets) against Starlette's
+FileResponse, driven through ASGI without a network stack.
+
+    python benchmarks/media_delivery.py --size-mb 256 --requests 20
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "app"))
+
+from starlette.responses import FileResponse  # noqa: E402
+
+from storage.delivery import FileDescriptorCache, MediaFileResponse  # noqa: E402
+
+
+async def drive(response, headers=()) -> int:
+    scope = {"type": "http", "method": "GET", "headers": list(headers), "extensions": {}}
+    received = 0
+
+    async def receive():
+        await asyncio.Event().wait()
+
+    async def send(message):
+        nonlocal received
+        received += len(message.get("body", b""))
+
+    await response(scope, receive, send)
+    return received
+
+
+async def measure(name: str, make_response, requests: int, concurrency: int) -> None:
+    started = time.perf_counter()
+    total = 0
+    for first in range(0, requests, concurrency):
+        batch = min(concurrency, requests - first)
+        sizes = await asyncio.gather(*(drive(make_response()) for _ in range(batch)))
+        total += sum(sizes)
+    elapsed = time.perf_counter() - started
+    print(f"{name:<28} {total / elapsed / 2**20:10.1f} MiB/s  ({elapsed:.2f}s)")
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size-mb", type=int, default=128)
+    parser.add_argument("--requests", type=int, default=16)
+    parser.add_argument("--concurrency", type=int, default=4)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "video.mp4"
+        with open(path, "wb") as f:
+            for _ in range(args.size_mb):
+                f.write(os.urandom(2**20))
+
+        cache = FileDescriptorCache(8)
+        await measure(
+            "MediaFileResponse (pread)",
+            lambda: MediaFileResponse(path, cache, sha256="0" * 64),
+            args.requests,
+            args.concurrency,
+        )
+        await measure(
+            "starlette FileResponse",
+            lambda: FileResponse(path),
+            args.requests,
+            args.concurrency,
+        )
+        cache.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,148 @@
+"""
+Serialization of GET /api/receipts pages: validation through Page[RecipeRead]
+(what the response_model does) against the fast path of settings.api
+(recipe_to_read_dict + json_dumps).
+
+    python benchmarks/recipe_pages.py --size 100 --repeat 50
+    python benchmarks/recipe_pages.py --db-url sqlite+aiosqlite:///bench.sqlite --requests 200
+
+Without --db-url only the serialization of in-memory ORM objects is timed.
+With it, pages of a database seeded by seed_recipes.py are also requested
+through the app (in-process ASGI) in both modes.
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+import timeit
+from pathlib import Path
+
+APP_DIR = Path(__file__).resolve().parent.parent / "app"
+
+
+def absolute_sqlite_url(url: str) -> str:
+    """The app runs from app/; a relative SQLite path is resolved before that."""
+    prefix, sep, path = url.partition(":///")
+    if not sep or not prefix.startswith("sqlite") or path.startswith("/") or path == ":memory:":
+        return url
+    return f"{prefix}:///{Path(path).resolve()}"
+
+
+def make_recipes(count: int, ingredients: int):
+    from models import Allergen, Cuisine, Ingredient, Recipe, RecipeIngredient, User
+
+    author = User(id=1, email="a@example.com", hashed_password="x", first_name="Анна", last_name="Иванова")
+    cuisine = Cuisine(id=1, name="Italian")
+    allergens = [Allergen(id=idx, name=f"Allergen {idx}") for idx in range(2)]
+    products = [Ingredient(id=idx, name=f"Ингредиент {idx}") for idx in range(ingredients)]
+    return [
+        Recipe(
+            id=idx,
+            title=f"Recipe {idx}",
+            description="Synthetic recipe for the benchmark.",
+            cooking_time=30,
+            difficulty=2,
+            author_id=1,
+            author=author,
+            cuisine=cuisine,
+            allergens=allergens,
+            ingredients=[
+                RecipeIngredient(ingredient=product, quantity=125.5, measurement=idx % 3 + 1)
+                for idx, product in enumerate(products)
+            ],
+        )
+        for idx in range(count)
+    ]
+
+
+def serialization(args: argparse.Namespace) -> None:
+    from fastapi_pagination import Page, Params
+    from pydantic import TypeAdapter
+
+    from schemas import RecipeRead
+    from utils.recipe_serialization import json_dumps, orjson, recipe_to_read_dict
+
+    recipes = make_recipes(args.size, args.ingredients)
+    params = Params(page=1, size=args.size)
+    adapter = TypeAdapter(Page[RecipeRead])
+
+    def schema_path() -> bytes:
+        # Page.create validates the items, FastAPI validates the page again and dumps it
+        page = Page[RecipeRead].create(recipes, params, total=10_000)
+        return adapter.dump_json(adapter.validate_python(page))
+
+    def fast_path() -> bytes:
+        return json_dumps({
+            "items": [recipe_to_read_dict(recipe) for recipe in recipes],
+            "total": 10_000,
+            "page": 1,
+            "size": args.size,
+            "pages": (10_000 + args.size - 1) // args.size,
+        })
+
+    assert schema_path() == fast_path()
+    old = min(timeit.repeat(schema_path, number=1, repeat=args.repeat))
+    new = min(timeit.repeat(fast_path, number=1, repeat=args.repeat))
+    encoder = "orjson" if orjson is not None else "pydantic-core"
+    print(f"page of {args.size} recipes x {args.ingredients} ingredients, "
+          f"{len(fast_path())} bytes, encoder {encoder}, best of {args.repeat}")
+    print(f"Page[RecipeRead]    {old * 1000:8.2f} ms")
+    print(f"fast serialization  {new * 1000:8.2f} ms  ({old / new:.1f}x)")
+
+
+async def through_app(args: argparse.Namespace) -> None:
+    import httpx
+
+    from config.config import settings
+    from main import app
+
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            bodies = {}
+            for fast in (False, True):
+                settings.api.fast_serialization = fast
+                latencies = []
+                for number in range(args.requests):
+                    params = {"size": args.size, "page": number % 20 + 1}
+                    started = time.perf_counter()
+                    response = await client.get("/api/receipts", params=params)
+                    latencies.append(time.perf_counter() - started)
+                    response.raise_for_status()
+                    if number == 0:
+                        bodies[fast] = response.content
+                latencies.sort()
+                name = "fast serialization" if fast else "Page[RecipeRead]"
+                print(f"GET /api/receipts size={args.size} {name:<20} "
+                      f"p50 {latencies[len(latencies) // 2] * 1000:7.1f} ms  "
+                      f"{args.requests / sum(latencies):7.1f} req/s")
+    assert bodies[False] == bodies[True], "responses differ"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=100, help="recipes per page")
+    parser.add_argument("--ingredients", type=int, default=8, help="ingredients per in-memory recipe")
+    parser.add_argument("--repeat", type=int, default=30)
+    parser.add_argument("--db-url", help="async SQLAlchemy URL of a seeded database")
+    parser.add_argument("--requests", type=int, default=100, help="requests per mode with --db-url")
+    args = parser.parse_args()
+
+    os.environ.setdefault("APP_CONFIG__DB__ECHO", "false")
+    os.environ.setdefault("APP_CONFIG__OBSERVABILITY__REQUEST_LOG", "false")
+    if args.db_url:
+        os.environ["APP_CONFIG__DB__URL"] = absolute_sqlite_url(args.db_url)
+        # Pages only: renders are never enqueued, no RabbitMQ needed
+        os.environ["APP_CONFIG__BROKER__MODE"] = "memory"
+        os.chdir(APP_DIR)
+    sys.path.insert(0, str(APP_DIR))
+
+    serialization(args)
+    if args.db_url:
+        asyncio.run(through_app(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+End-to-end render throughput without RabbitMQ.
+
+Uploads projects through the API (in-process ASGI), lets the configured broker
+render them and reports projects per minute and time-to-video percentiles.
+Everything (database, media, spool) lives in a temporary directory.
+
+    python benchmarks/render_throughput.py --mode memory --projects 20 --images 3
+    python benchmarks/render_throughput.py --mode local --workers 2
+
+"memory" renders inside the benchmark process (settings.broker.mode=memory);
+"local" starts `taskiq worker` processes on the spool broker.
+"""
+
+import argparse
+import asyncio
+import io
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+APP_DIR = Path(__file__).resolve().parent.parent / "app"
+
+
+def configure(tmp: Path, args: argparse.Namespace) -> dict[str, str]:
+    """Settings for the run; applied before the app is imported."""
+    env = {
+        "APP_CONFIG__DB__URL": f"sqlite+aiosqlite:///{tmp / 'bench.sqlite'}",
+        "APP_CONFIG__DB__ECHO": "false",
+        "APP_CONFIG__BROKER__MODE": args.mode,
+        "APP_CONFIG__BROKER__SPOOL_DIR": str(tmp / "broker"),
+        "APP_CONFIG__BROKER__MEMORY_MAX_TASKS": str(args.concurrency),
+        "APP_CONFIG__STORAGE__ROOT": str(tmp / "media"),
+        "APP_CONFIG__UPLOAD__STAGING_DIR": str(tmp / "uploads"),
+        "APP_CONFIG__VIDEO__PROFILE": args.profile,
+        "APP_CONFIG__VIDEO__PRESET": "veryfast",
+    }
+    os.environ.update(env)
+    return env
+
+
+def image_bytes(seed: int, size: tuple[int, int]) -> bytes:
+    from PIL import Image
+
+    buffer = io.BytesIO()
+    color = (seed * 37 % 256, seed * 91 % 256, seed * 53 % 256)
+    Image.new("RGB", size, color).save(buffer, "JPEG", quality=85)
+    return buffer.getvalue()
+
+
+def percentile(values: list[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, round(fraction * (len(ordered) - 1)))]
+
+
+async def run(args: argparse.Namespace) -> None:
+    import httpx
+
+    from main import app
+
+    size = tuple(int(side) for side in args.size.split("x"))
+    submitted: dict[int, float] = {}
+    finished: dict[int, float] = {}
+
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            started = time.perf_counter()
+            for number in range(args.projects):
+                files = [
+                    ("images", (f"{idx}.jpg", image_bytes(number + idx, size), "image/jpeg"))
+                    for idx in range(args.images)
+                ]
+                response = await client.post("/api/videos", files=files)
+                response.raise_for_status()
+                submitted[response.json()["id"]] = time.perf_counter()
+
+            while len(finished) < len(submitted):
+                await asyncio.sleep(0.05)
+                waiting = [str(project_id) for project_id in submitted if project_id not in finished]
+                response = await client.get("/api/videos/status", params={"ids": ",".join(waiting[:100])})
+                for row in response.json():
+                    if row["status"] in ("success", "failed"):
+                        finished[row["id"]] = time.perf_counter()
+                        if row["status"] == "failed":
+                            print(f"project {row['id']} failed", file=sys.stderr)
+            elapsed = time.perf_counter() - started
+
+    latencies = [finished[project_id] - submitted[project_id] for project_id in submitted]
+    print(f"mode={args.mode} projects={args.projects} images={args.images} size={args.size}")
+    print(f"throughput      {len(latencies) / elapsed * 60:8.1f} projects/min ({elapsed:.1f}s)")
+    print(f"time-to-video   p50 {statistics.median(latencies):.2f}s  "
+          f"p95 {percentile(latencies, 0.95):.2f}s  max {max(latencies):.2f}s")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mode", choices=("memory", "local"), default="memory")
+    parser.add_argument("--projects", type=int, default=10)
+    parser.add_argument("--images", type=int, default=3)
+    parser.add_argument("--size", default="1280x960", help="source image size, WxH")
+    parser.add_argument("--profile", default="480p")
+    parser.add_argument("--concurrency", type=int, default=2, help="renders at once in memory mode")
+    parser.add_argument("--workers", type=int, default=2, help="worker processes in local mode")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="render_bench_") as tmp:
+        env = configure(Path(tmp), args)
+        os.chdir(APP_DIR)
+        sys.path.insert(0, str(APP_DIR))
+
+        workers = None
+        if args.mode == "local":
+            workers = subprocess.Popen(
+                [sys.executable, "-m", "taskiq", "worker", "taskiq_broker:broker", "tasks",
+                 "--workers", str(args.workers)],
+                cwd=APP_DIR,
+                env={**os.environ, **env},
+            )
+        try:
+            asyncio.run(run(args))
+        finally:
+            if workers is not None:
+                workers.terminate()
+                workers.wait()
+
+
+if __name__ == "__main__":
+    main()
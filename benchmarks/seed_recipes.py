@@ -0,0 +1,186 @@
+"""
+Synthetic recipe dataset for the API benchmarks.
+
+Seeds authors, cuisines, allergens, ingredients and recipes into an empty
+SQLite or PostgreSQL database, in batches through SQLAlchemy Core:
+
+    python benchmarks/seed_recipes.py --db-url sqlite+aiosqlite:///bench.sqlite --recipes 100k
+    python benchmarks/seed_recipes.py --db-url postgresql+asyncpg://u:p@localhost/bench --recipes 1M
+
+The distributions are skewed like real cookbooks: a few cuisines and
+ingredients (salt, onion) appear in most recipes and a long tail in few,
+so filtering by ingredient hits both huge and tiny result sets. A fixed
+--seed gives the same dataset on every run.
+"""
+
+import argparse
+import asyncio
+import itertools
+import os
+import random
+import sys
+import time
+from pathlib import Path
+
+APP_DIR = Path(__file__).resolve().parent.parent / "app"
+
+CUISINES = [
+    "Italian", "Russian", "French", "Japanese", "Chinese", "Mexican", "Indian", "Georgian",
+    "Thai", "Spanish", "Greek", "Turkish", "Korean", "Vietnamese", "American", "German",
+    "Uzbek", "Lebanese", "Moroccan", "Peruvian", "Ethiopian", "Brazilian", "Polish",
+    "Ukrainian", "Armenian",
+]
+# The 14 allergens food labelling regulations require
+ALLERGENS = [
+    "Gluten", "Crustaceans", "Eggs", "Fish", "Peanuts", "Soybeans", "Milk", "Nuts",
+    "Celery", "Mustard", "Sesame", "Sulphites", "Lupin", "Molluscs",
+]
+COMMON_INGREDIENTS = [
+    "Salt", "Onion", "Garlic", "Olive oil", "Black pepper", "Butter", "Eggs", "Flour",
+    "Sugar", "Milk", "Tomato", "Carrot", "Potato", "Lemon", "Parsley", "Rice", "Chicken",
+    "Beef", "Cheese", "Cream",
+]
+
+
+def parse_count(value: str) -> int:
+    """10k, 100k, 1M or a plain number."""
+    multiplier = {"k": 1_000, "m": 1_000_000}.get(value[-1].lower(), 1)
+    return int(float(value.rstrip("kKmM")) * multiplier)
+
+
+def zipf_weights(count: int, exponent: float) -> list[float]:
+    return [1 / (rank ** exponent) for rank in range(1, count + 1)]
+
+
+class Generator:
+    def __init__(self, rng: random.Random, ingredients: int, authors: int):
+        self.rng = rng
+        self.ingredient_ids = list(range(1, ingredients + 1))
+        self.cuisine_ids = list(range(1, len(CUISINES) + 1))
+        self.allergen_ids = list(range(1, len(ALLERGENS) + 1))
+        self.authors = authors
+        # Cumulative weights make every weighted choice a bisect
+        self.ingredient_weights = list(itertools.accumulate(zipf_weights(ingredients, 1.1)))
+        self.cuisine_weights = list(itertools.accumulate(zipf_weights(len(CUISINES), 0.9)))
+        self.allergen_weights = list(itertools.accumulate(zipf_weights(len(ALLERGENS), 0.7)))
+
+    def recipe(self, recipe_id: int) -> dict:
+        rng = self.rng
+        cuisine_id = rng.choices(self.cuisine_ids, cum_weights=self.cuisine_weights)[0]
+        return {
+            "id": recipe_id,
+            "title": f"{CUISINES[cuisine_id - 1]} dish {recipe_id}",
+            "description": f"Synthetic recipe {recipe_id} for load testing.",
+            "cooking_time": max(5, int(rng.lognormvariate(3.4, 0.6))),
+            "difficulty": rng.choices((1, 2, 3, 4, 5), weights=(30, 35, 20, 10, 5))[0],
+            "author_id": rng.randint(1, self.authors),
+            # Some recipes have no cuisine
+            "cuisine_id": cuisine_id if rng.random() > 0.05 else None,
+        }
+
+    def ingredients(self, recipe_id: int) -> list[dict]:
+        rng = self.rng
+        count = min(len(self.ingredient_ids), max(3, int(rng.gauss(8, 3))))
+        chosen = set()
+        while len(chosen) < count:
+            chosen.add(rng.choices(self.ingredient_ids, cum_weights=self.ingredient_weights)[0])
+        return [
+            {
+                "recipe_id": recipe_id,
+                "ingredient_id": ingredient_id,
+                "quantity": round(rng.uniform(1, 500), 1),
+                "measurement": rng.choices((1, 2, 3), weights=(60, 25, 15))[0],
+            }
+            for ingredient_id in sorted(chosen)
+        ]
+
+    def allergens(self, recipe_id: int) -> list[dict]:
+        rng = self.rng
+        count = rng.choices((0, 1, 2, 3), weights=(35, 35, 20, 10))[0]
+        chosen = set()
+        while len(chosen) < count:
+            chosen.add(rng.choices(self.allergen_ids, cum_weights=self.allergen_weights)[0])
+        return [{"recipe_id": recipe_id, "allergen_id": allergen_id} for allergen_id in chosen]
+
+
+async def seed(args: argparse.Namespace) -> None:
+    from sqlalchemy import func, insert, select
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    from models import Allergen, Base, Cuisine, Ingredient, Recipe, RecipeAllergen, RecipeIngredient, User
+
+    engine = create_async_engine(args.db_url)
+    rng = random.Random(args.seed)
+    authors = max(10, args.recipes // 100)
+    ingredient_names = COMMON_INGREDIENTS + [
+        f"Ingredient {idx}" for idx in range(len(COMMON_INGREDIENTS) + 1, args.ingredients + 1)
+    ]
+    generator = Generator(rng, len(ingredient_names), authors)
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        if await conn.scalar(select(func.count()).select_from(Recipe)):
+            sys.exit("The database already has recipes; seed an empty one")
+
+        await conn.execute(insert(User), [
+            # Not a valid password hash: seeded authors cannot log in
+            {"id": idx, "email": f"author{idx}@example.com", "hashed_password": "!"}
+            for idx in range(1, authors + 1)
+        ])
+        await conn.execute(insert(Cuisine), [
+            {"id": idx, "name": name} for idx, name in enumerate(CUISINES, 1)
+        ])
+        await conn.execute(insert(Allergen), [
+            {"id": idx, "name": name} for idx, name in enumerate(ALLERGENS, 1)
+        ])
+        await conn.execute(insert(Ingredient), [
+            {"id": idx, "name": name} for idx, name in enumerate(ingredient_names, 1)
+        ])
+
+    started = time.perf_counter()
+    for first in range(1, args.recipes + 1, args.batch_size):
+        ids = range(first, min(first + args.batch_size, args.recipes + 1))
+        recipes = [generator.recipe(recipe_id) for recipe_id in ids]
+        ingredients = [row for recipe_id in ids for row in generator.ingredients(recipe_id)]
+        allergens = [row for recipe_id in ids for row in generator.allergens(recipe_id)]
+        # One transaction per batch keeps memory and WAL bounded for 1M recipes
+        async with engine.begin() as conn:
+            await conn.execute(insert(Recipe), recipes)
+            await conn.execute(insert(RecipeIngredient), ingredients)
+            if allergens:
+                await conn.execute(insert(RecipeAllergen), allergens)
+        done = ids[-1]
+        elapsed = time.perf_counter() - started
+        print(f"\r{done:>9} / {args.recipes} recipes  {done / elapsed:8.0f}/s", end="", flush=True)
+
+    if engine.dialect.name == "postgresql":
+        # Explicit ids leave the sequences behind; the API inserts after them
+        async with engine.begin() as conn:
+            for table in ("user", "cuisines", "allergens", "ingredients", "recipes", "recipe_ingredients"):
+                await conn.exec_driver_sql(
+                    f"SELECT setval(pg_get_serial_sequence('\"{table}\"', 'id'), "
+                    f"(SELECT COALESCE(MAX(id), 1) FROM \"{table}\"))"
+                )
+    await engine.dispose()
+    print(f"\nseeded {args.recipes} recipes, {len(ingredient_names)} ingredients, "
+          f"{authors} authors in {time.perf_counter() - started:.1f}s")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db-url", required=True, help="async SQLAlchemy URL of an empty database")
+    parser.add_argument("--recipes", type=parse_count, default=parse_count("10k"), help="10k, 100k, 1M")
+    parser.add_argument("--ingredients", type=int, default=2000)
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    # Importing models builds the app's engine from settings
+    os.environ.setdefault("APP_CONFIG__DB__URL", args.db_url)
+    os.environ.setdefault("APP_CONFIG__DB__ECHO", "false")
+    sys.path.insert(0, str(APP_DIR))
+    asyncio.run(seed(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,36 @@
 """
 Pytest configuration for all tests.
 
-This file configures the Python path to allow importing from the 'app' module.
+This file configures the Python path to allow importing from the 'app' module
+and provides fixtures guarding the number of SQL statements of read paths.
 """
 
 import sys
 from pathlib import Path
 
+import pytest
+
 # Add the app directory to the Python path
 app_dir = Path(__file__).parent.parent / "app"
 sys.path.insert(0, str(app_dir))
+
+
+@pytest.fixture
+def query_budget():
+    """
+    Context manager failing the test when a block executes too many statements.
+
+        with query_budget(2):
+            await queries.get_page(limit=20)
+    """
+    from observability import query_budget
+
+    return query_budget
+
+
+@pytest.fixture
+def strict_loading(monkeypatch):
+    """Read paths in queries/ raise on relationships they did not load explicitly."""
+    from config.config import settings
+
+    monkeypatch.setattr(settings.db, "raise_on_lazy_load", True)
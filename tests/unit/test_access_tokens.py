@@ -0,0 +1,133 @@
+"""
+Unit tests for access tokens of the database strategy (authentication/access_tokens.py).
+
+ЧТО МЫ ТЕСТИРУЕМ:
+- Повторная проверка токена не обращается к БД
+- Неизвестный и отозванный токен кэшируются как отсутствующие
+- Истёкший токен отклоняется и из кэша
+- Просроченные токены удаляются пачками, живые остаются
+
+ВХОДНЫЕ ДАННЫЕ: токены в файловой SQLite, DatabaseStrategy fastapi-users
+ВЫХОДНЫЕ ДАННЫЕ: пользователь или None, число запросов к БД, оставшиеся строки
+
+"""
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+import pytest_asyncio
+from fastapi_users.authentication.strategy.db import DatabaseStrategy
+from fastapi_users_db_sqlalchemy.access_token import SQLAlchemyAccessTokenDatabase
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from authentication.access_tokens import (
+    AccessTokenCache,
+    CachedAccessTokenDatabase,
+    purge_expired_tokens,
+)
+from models import AccessToken, User
+
+
+@pytest_asyncio.fixture
+async def session_factory(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'tokens.sqlite'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(User.__table__.create)
+        await conn.run_sync(AccessToken.__table__.create)
+    factory = async_sessionmaker(engine, expire_on_commit=False)
+    async with factory() as session:
+        session.add(User(id=1, email="a@example.com", hashed_password="x"))
+        await session.commit()
+    yield factory
+    await engine.dispose()
+
+
+class CountingDatabase(SQLAlchemyAccessTokenDatabase):
+    lookups = 0
+
+    async def get_by_token(self, token, max_age=None):
+        self.lookups += 1
+        return await super().get_by_token(token, max_age)
+
+
+class FakeUserManager:
+    def parse_id(self, value):
+        return int(value)
+
+    async def get(self, user_id):
+        return User(id=user_id, email="a@example.com", hashed_password="x")
+
+
+def make_cache() -> AccessTokenCache:
+    return AccessTokenCache(ttl_seconds=60, negative_ttl_seconds=600, max_size=100)
+
+
+async def add_token(session, token: str, age: timedelta) -> None:
+    session.add(
+        AccessToken(token=token, user_id=1, created_at=datetime.now(timezone.utc) - age)
+    )
+    await session.commit()
+
+
+class TestCachedAccessTokenDatabase:
+    @pytest.mark.asyncio
+    async def test_repeated_lookup_cached(self, session_factory):
+        """Тест: токен проверяется в БД один раз, затем берётся из кэша"""
+        async with session_factory() as session:
+            database = CountingDatabase(session, AccessToken)
+            strategy = DatabaseStrategy(CachedAccessTokenDatabase(database, make_cache()), 3600)
+            token = await strategy.write_token(User(id=1))
+
+            first = await strategy.read_token(token, FakeUserManager())
+            second = await strategy.read_token(token, FakeUserManager())
+
+        assert first.id == second.id == 1
+        assert database.lookups == 0  # the token was cached when it was written
+
+    @pytest.mark.asyncio
+    async def test_unknown_and_revoked_cached(self, session_factory):
+        """Тест: неизвестный и отозванный токены не ищутся в БД повторно"""
+        async with session_factory() as session:
+            database = CountingDatabase(session, AccessToken)
+            cached = CachedAccessTokenDatabase(database, make_cache())
+            strategy = DatabaseStrategy(cached, 3600)
+            token = await strategy.write_token(User(id=1))
+            user = await strategy.read_token(token, FakeUserManager())
+
+            await strategy.destroy_token(token, user)
+            assert await strategy.read_token(token, FakeUserManager()) is None
+            assert await strategy.read_token("unknown", FakeUserManager()) is None
+            assert await strategy.read_token("unknown", FakeUserManager()) is None
+
+            rows = await session.scalar(select(func.count()).select_from(AccessToken))
+        assert rows == 0
+        assert database.lookups == 1
+
+    @pytest.mark.asyncio
+    async def test_expired_rejected_from_cache(self, session_factory):
+        """Тест: закэшированный токен отклоняется после истечения срока"""
+        async with session_factory() as session:
+            await add_token(session, "old", timedelta(hours=2))
+            cached = CachedAccessTokenDatabase(SQLAlchemyAccessTokenDatabase(session, AccessToken), make_cache())
+            max_age = datetime.now(timezone.utc) - timedelta(hours=1)
+
+            assert await cached.get_by_token("old") is not None
+            assert await cached.get_by_token("old", max_age) is None
+
+
+class TestPurgeExpiredTokens:
+    @pytest.mark.asyncio
+    async def test_purged_in_batches(self, session_factory):
+        """Тест: просроченные токены удаляются пачками, живые остаются"""
+        async with session_factory() as session:
+            for idx in range(5):
+                await add_token(session, f"expired-{idx}", timedelta(hours=2))
+            await add_token(session, "alive", timedelta(minutes=5))
+
+            first_run = await purge_expired_tokens(session, 3600, batch_size=2, max_batches=2)
+            second_run = await purge_expired_tokens(session, 3600, batch_size=2, max_batches=2)
+
+            tokens = (await session.scalars(select(AccessToken.token))).all()
+        assert (first_run, second_run) == (4, 1)
+        assert tokens == ["alive"]
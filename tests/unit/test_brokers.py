@@ -0,0 +1,147 @@
+"""
+Unit tests for broker modes without RabbitMQ (local_broker.py, taskiq_broker.py, status buses).
+
+ЧТО МЫ ТЕСТИРУЕМ:
+- Режим брокера выбирается настройками, неизвестный режим — ошибка
+- InProcessBroker выполняет не больше max_running задач одновременно
+- SpoolBroker отдаёт сообщения по порядку и только одному воркеру
+- Незавершённые сообщения умершего воркера возвращаются в очередь
+- Статусы доходят до хаба через процессную и loopback-шину
+
+ВХОДНЫЕ ДАННЫЕ: сообщения taskiq, каталог очереди во временной папке
+ВЫХОДНЫЕ ДАННЫЕ: порядок и число выполненных задач, события в хабе
+
+"""
+
+import asyncio
+import os
+import time
+
+import pytest
+from taskiq import BrokerMessage
+
+from config.config import BrokerConfig
+from local_broker import InProcessBroker, SpoolBroker
+from taskiq_broker import build_broker
+from video.status_bus import InProcessStatusBus, LoopbackStatusBus, StatusHub
+
+
+def message(task_id: str, data: bytes) -> BrokerMessage:
+    return BrokerMessage(task_id=task_id, task_name="task", message=data, labels={})
+
+
+async def next_message(iterator):
+    return await asyncio.wait_for(anext(iterator), timeout=2)
+
+
+class TestBuildBroker:
+    def test_modes(self, tmp_path):
+        """Тест: режим из настроек определяет класс брокера"""
+        assert isinstance(build_broker(BrokerConfig(mode="memory")), InProcessBroker)
+        assert isinstance(
+            build_broker(BrokerConfig(mode="local", spool_dir=str(tmp_path))), SpoolBroker
+        )
+
+    def test_unknown_mode(self):
+        """Тест: опечатка в режиме не превращается молча в RabbitMQ"""
+        with pytest.raises(ValueError, match="Unknown broker mode"):
+            build_broker(BrokerConfig(mode="rabbit"))
+
+
+class TestInProcessBroker:
+    @pytest.mark.asyncio
+    async def test_concurrency_capped(self):
+        """Тест: одновременно выполняется не больше max_running задач"""
+        broker = InProcessBroker(max_running=2)
+        running = 0
+        peak = 0
+
+        @broker.task
+        async def work() -> None:
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+
+        await broker.startup()
+        for _ in range(6):
+            await work.kiq()
+        await broker.wait_all()
+        await broker.shutdown()
+
+        assert peak == 2
+
+
+class TestSpoolBroker:
+    @pytest.mark.asyncio
+    async def test_fifo_and_single_consumer(self, tmp_path):
+        """Тест: сообщения идут по порядку, каждое получает один воркер"""
+        producer = SpoolBroker(str(tmp_path), poll_interval=0.01)
+        first_worker = SpoolBroker(str(tmp_path), poll_interval=0.01)
+        second_worker = SpoolBroker(str(tmp_path), poll_interval=0.01)
+        for broker in (producer, first_worker, second_worker):
+            await broker.startup()
+        for idx in range(3):
+            await producer.kick(message(str(idx), f"m{idx}".encode()))
+
+        first = first_worker.listen()
+        second = second_worker.listen()
+        received = [
+            await next_message(first),
+            await next_message(second),
+            await next_message(first),
+        ]
+        for item in received:
+            await item.ack()
+
+        assert [item.data for item in received] == [b"m0", b"m1", b"m2"]
+        assert os.listdir(tmp_path / "queue") == []
+        assert os.listdir(tmp_path / "claimed") == []
+
+    @pytest.mark.asyncio
+    async def test_unacknowledged_requeued(self, tmp_path):
+        """Тест: сообщение, взятое умершим воркером, возвращается в очередь"""
+        broker = SpoolBroker(str(tmp_path), poll_interval=0.01, stale_after=60)
+        await broker.startup()
+        await broker.kick(message("1", b"lost"))
+        await next_message(broker.listen())  # claimed, never acknowledged
+        claimed = next((tmp_path / "claimed").iterdir())
+        old = time.time() - 120
+        os.utime(claimed, (old, old))
+
+        restarted = SpoolBroker(str(tmp_path), poll_interval=0.01, stale_after=60)
+        received = await next_message(restarted.listen())
+
+        assert received.data == b"lost"
+
+
+class TestStatusBuses:
+    @pytest.mark.asyncio
+    async def test_in_process(self):
+        """Тест: в режиме memory события сразу попадают в хаб"""
+        hub = StatusHub()
+        queue = hub.subscribe(1)
+        bus = InProcessStatusBus()
+        await bus.consume(hub)
+
+        await bus.publish({"id": 1, "status": "processing"})
+
+        assert queue.get_nowait()["status"] == "processing"
+
+    @pytest.mark.asyncio
+    async def test_loopback(self, tmp_path):
+        """Тест: воркер отправляет событие по UDP всем объявленным API-процессам"""
+        hub = StatusHub()
+        queue = hub.subscribe(5)
+        consumer = LoopbackStatusBus(tmp_path)
+        publisher = LoopbackStatusBus(tmp_path)
+        await consumer.consume(hub)
+
+        await publisher.publish({"id": 5, "status": "success"})
+        event = await asyncio.wait_for(queue.get(), timeout=2)
+        await publisher.close()
+        await consumer.close()
+
+        assert event["status"] == "success"
+        assert list(tmp_path.glob("*.port")) == []
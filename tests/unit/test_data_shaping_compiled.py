@@ -0,0 +1,102 @@
+"""
+Unit tests for the compiled shapers (compile_response_builder, compile_recipe_shaper).
+
+ЧТО МЫ ТЕСТИРУЕМ:
+- Скомпилированные функции дают тот же результат и порядок ключей,
+  что и build_recipe_response / recipe_to_dict, для всех комбинаций select и include
+- Функции кэшируются по паре (select_set, include_set)
+- Невключённые связи объекта не читаются
+
+ВХОДНЫЕ ДАННЫЕ: объекты рецептов (SimpleNamespace), множества select_set и include_set
+ВЫХОДНЫЕ ДАННЫЕ: словари ответа
+
+"""
+
+from itertools import chain, combinations
+from types import SimpleNamespace
+
+import pytest
+
+from utils.data_shaping import (
+    BASE_FIELDS,
+    build_recipe_response,
+    compile_recipe_shaper,
+    compile_response_builder,
+    recipe_to_dict,
+)
+
+INCLUDES = ("cuisine", "allergens", "ingredients")
+
+
+def subsets(items):
+    return [set(combo) for combo in chain.from_iterable(combinations(items, n) for n in range(len(items) + 1))]
+
+
+def make_recipe(recipe_id: int, with_cuisine: bool = True) -> SimpleNamespace:
+    return SimpleNamespace(
+        id=recipe_id,
+        title=f"Recipe {recipe_id}",
+        description="Classic",
+        cooking_time=30,
+        difficulty=3,
+        cuisine=SimpleNamespace(id=1, name="Italian") if with_cuisine else None,
+        allergens=[SimpleNamespace(id=1, name="Gluten"), SimpleNamespace(id=2, name="Eggs")],
+        ingredients=[
+            SimpleNamespace(ingredient=SimpleNamespace(id=5, name="Pasta"), quantity=500.0, measurement=1),
+        ],
+    )
+
+
+class Unloaded:
+    """Recipe whose relations raise when read, like raiseload('*')."""
+
+    id, title, description, cooking_time, difficulty = 1, "Soup", "Hot", 20, 1
+
+    def __getattr__(self, name):
+        raise AssertionError(f"{name} was read")
+
+
+@pytest.mark.parametrize("include_set", subsets(INCLUDES), ids=str)
+@pytest.mark.parametrize("select_set", [set(), {"id"}, {"title", "difficulty"}, set(BASE_FIELDS)], ids=str)
+class TestEquivalence:
+    def test_recipe_shaper(self, select_set, include_set):
+        """Тест: результат и порядок ключей совпадают с recipe_to_dict + build_recipe_response"""
+        shape = compile_recipe_shaper(select_set, include_set)
+        for recipe in (make_recipe(1), make_recipe(2, with_cuisine=False)):
+            expected = build_recipe_response(recipe_to_dict(recipe, include_set), select_set, include_set)
+            result = shape(recipe)
+
+            assert result == expected
+            assert list(result) == list(expected)
+
+    def test_response_builder(self, select_set, include_set):
+        """Тест: результат и порядок ключей совпадают с build_recipe_response"""
+        build = compile_response_builder(select_set, include_set)
+        for with_cuisine in (True, False):
+            data = recipe_to_dict(make_recipe(1, with_cuisine), set(INCLUDES))
+            expected = build_recipe_response(data, select_set, include_set)
+
+            assert build(data) == expected
+            assert list(build(data)) == list(expected)
+
+
+class TestCompilation:
+    def test_memoized(self):
+        """Тест: одна и та же пара множеств - одна и та же функция"""
+        assert compile_recipe_shaper({"id", "title"}, {"cuisine"}) is compile_recipe_shaper(
+            {"title", "id"}, {"cuisine"}
+        )
+        assert compile_response_builder({"id"}, set()) is not compile_response_builder({"title"}, set())
+
+    def test_relations_not_read(self):
+        """Тест: без include связи объекта не читаются"""
+        shape = compile_recipe_shaper(set(BASE_FIELDS), set())
+
+        assert shape(Unloaded()) == {
+            "id": 1, "title": "Soup", "description": "Hot", "cooking_time": 20, "difficulty": 1,
+        }
+
+    def test_missing_key(self):
+        """Тест: как и build_recipe_response, отсутствующее выбранное поле - KeyError"""
+        with pytest.raises(KeyError):
+            compile_response_builder({"title"}, set())({"id": 1})
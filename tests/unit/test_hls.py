@@ -0,0 +1,103 @@
+"""
+Unit tests for HLS output (renditions, ffmpeg arguments, storing playlists).
+
+ЧТО МЫ ТЕСТИРУЕМ:
+- Рендишены не превышают размер отрендеренных кадров
+- Аргументы ffmpeg собирают все рендишены в одном проходе
+- Плейлисты переписываются на URL сохранённых blob-ов
+
+ВХОДНЫЕ ДАННЫЕ: имена профилей, каталог с плейлистами и сегментами
+ВЫХОДНЫЕ ДАННЫЕ: список рендишенов, аргументы ffmpeg, ключи хранилища
+
+"""
+
+from pathlib import Path
+
+import pytest
+import pytest_asyncio
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+import video.hls as hls
+from models import StoredBlob
+from storage import ContentStore, LocalStorage
+from video import hls_output_args, hls_renditions, store_hls
+
+
+@pytest_asyncio.fixture
+async def session():
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(StoredBlob.__table__.create)
+    async with async_sessionmaker(engine, expire_on_commit=False)() as session:
+        yield session
+    await engine.dispose()
+
+
+class TestHlsRenditions:
+    def test_larger_than_source_skipped(self):
+        """Тест: 720p не делается из кадров 480p"""
+        renditions = hls_renditions(["720p", "480p"], (854, 480))
+
+        assert [rendition.name for rendition in renditions] == ["480p"]
+
+    def test_sorted_from_largest(self):
+        """Тест: рендишены упорядочены от большего к меньшему"""
+        renditions = hls_renditions(["480p", "720p"], (1920, 1080))
+
+        assert [rendition.name for rendition in renditions] == ["720p", "480p"]
+
+    def test_falls_back_to_source_size(self):
+        """Тест: если все рендишены больше исходника, остаётся сам исходник"""
+        renditions = hls_renditions(["1080p"], (854, 480))
+
+        assert [(r.name, r.size) for r in renditions] == [("480p", (854, 480))]
+
+
+class TestHlsOutputArgs:
+    def test_one_pass_for_all_renditions(self, tmp_path):
+        """Тест: один filter_complex со split и var_stream_map на все рендишены"""
+        renditions = hls_renditions(["720p", "480p"], (1280, 720))
+
+        args = hls_output_args(tmp_path, renditions, fps=30, segment_seconds=4, preset="fast")
+
+        graph = args[args.index("-filter_complex") + 1]
+        assert graph.startswith("[0:v]split=2[s0][s1]")
+        assert "scale=854:480" in graph
+        assert args[args.index("-var_stream_map") + 1] == "v:0 v:1"
+        assert args[args.index("-g") + 1] == "120"
+        assert args[-1] == str(tmp_path / "v%v" / "index.m3u8")
+
+
+class TestStoreHls:
+    def test_rewrite_playlist(self):
+        """Тест: URI заменяются на пути /media, комментарии и теги остаются"""
+        text = "#EXTM3U\n#EXTINF:4.0,\nseg_00000.ts\n#EXT-X-ENDLIST\n"
+
+        result = hls._rewrite_playlist(text, {"seg_00000.ts": "blobs/ab/cd/x.ts"})
+
+        assert result == "#EXTM3U\n#EXTINF:4.0,\n/media/blobs/ab/cd/x.ts\n#EXT-X-ENDLIST\n"
+
+    @pytest.mark.asyncio
+    async def test_store_hls(self, tmp_path, session, monkeypatch):
+        """Тест: сегменты и плейлисты попадают в хранилище, мастер ссылается на вариант"""
+        store = ContentStore(LocalStorage(tmp_path / "media"))
+        monkeypatch.setattr(hls, "content_store", store)
+        out_dir = tmp_path / "hls"
+        (out_dir / "v0").mkdir(parents=True)
+        (out_dir / "v0" / "seg_00000.ts").write_bytes(b"segment-0")
+        (out_dir / "v0" / "seg_00001.ts").write_bytes(b"segment-1")
+        (out_dir / "v0" / "index.m3u8").write_text(
+            "#EXTM3U\n#EXTINF:4.0,\nseg_00000.ts\n#EXTINF:2.0,\nseg_00001.ts\n#EXT-X-ENDLIST\n"
+        )
+        (out_dir / "master.m3u8").write_text(
+            "#EXTM3U\n#EXT-X-STREAM-INF:BANDWIDTH=1540000\nv0/index.m3u8\n"
+        )
+
+        master_key, keys = await store_hls(session, out_dir)
+
+        assert len(keys) == 3
+        assert master_key.endswith(".m3u8")
+        master = Path(tmp_path / "media" / master_key).read_text()
+        assert f"/media/{keys[2]}" in master
+        variant = Path(tmp_path / "media" / keys[2]).read_text()
+        assert f"/media/{keys[0]}" in variant and f"/media/{keys[1]}" in variant
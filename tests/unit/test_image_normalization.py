@@ -0,0 +1,104 @@
+"""
+Unit tests for the image normalization stage (normalize_image, normalize_images)
+and WebP previews (make_thumbnail, make_previews).
+
+ЧТО МЫ ТЕСТИРУЕМ:
+- Приведение изображений к размеру профиля с сохранением пропорций
+- Учёт EXIF-ориентации и приведение к RGB
+- Миниатюры WebP не больше заданной стороны и постер видео
+
+ВХОДНЫЕ ДАННЫЕ: файлы изображений разных размеров и форматов
+ВЫХОДНЫЕ ДАННЫЕ: PNG-файлы ровно размера профиля
+
+"""
+
+from PIL import Image as PILImage
+
+from video.normalize import fit_size, normalize_image, normalize_images
+from video.thumbnails import make_previews, make_thumbnail
+
+
+class TestFitSize:
+    def test_landscape_into_landscape(self):
+        assert fit_size((4000, 2000), (1280, 720)) == (1280, 640)
+
+    def test_portrait_into_landscape(self):
+        assert fit_size((1000, 2000), (1280, 720)) == (360, 720)
+
+    def test_small_image_is_upscaled(self):
+        assert fit_size((640, 360), (1280, 720)) == (1280, 720)
+
+
+class TestNormalizeImage:
+    def test_output_has_profile_size_and_rgb(self, tmp_path):
+        """Тест: RGBA PNG произвольного размера → RGB PNG размера профиля"""
+        src = tmp_path / "src.png"
+        PILImage.new("RGBA", (300, 500), (255, 0, 0, 128)).save(src)
+
+        dst = normalize_image(src, tmp_path / "out.png", (1280, 720))
+
+        with PILImage.open(dst) as out:
+            assert out.size == (1280, 720)
+            assert out.mode == "RGB"
+
+    def test_exif_orientation_is_applied(self, tmp_path):
+        """Тест: JPEG с EXIF Orientation=6 (поворот на 90°) становится портретным"""
+        src = tmp_path / "rotated.jpg"
+        img = PILImage.new("RGB", (400, 200), (0, 255, 0))
+        exif = img.getexif()
+        exif[0x0112] = 6
+        img.save(src, exif=exif)
+
+        dst = normalize_image(src, tmp_path / "out.png", (1280, 720))
+
+        with PILImage.open(dst) as out:
+            # Портретное изображение 200x400 вписывается по высоте: по бокам поля
+            assert out.getpixel((0, 360)) == (0, 0, 0)
+            assert out.getpixel((640, 360))[1] > 200
+
+
+class TestNormalizeImages:
+    def test_order_is_preserved(self, tmp_path):
+        sources = []
+        for idx, color in enumerate([(255, 0, 0), (0, 0, 255)]):
+            src = tmp_path / f"src_{idx}.webp"
+            PILImage.new("RGB", (64, 64), color).save(src)
+            sources.append(src)
+
+        frames = normalize_images(sources, tmp_path / "frames", (128, 72), workers=2)
+
+        assert [f.name for f in frames] == ["frame_00000.png", "frame_00001.png"]
+        with PILImage.open(frames[1]) as out:
+            assert out.getpixel((64, 36)) == (0, 0, 255)
+
+
+class TestPreviews:
+    def test_thumbnail_is_small_webp(self, tmp_path):
+        src = tmp_path / "src.jpg"
+        PILImage.new("RGB", (4000, 3000), (0, 128, 255)).save(src)
+
+        dst = make_thumbnail(src, tmp_path / "thumb.webp", max_side=320, quality=75)
+
+        with PILImage.open(dst) as out:
+            assert out.format == "WEBP"
+            assert out.size == (320, 240)
+
+    def test_previews_keep_order_and_build_poster(self, tmp_path):
+        """Тест: миниатюры в порядке исходников + постер из первого кадра"""
+        sources = []
+        for idx, size in enumerate([(100, 50), (50, 100)]):
+            path = tmp_path / f"src_{idx}.png"
+            PILImage.new("RGB", size).save(path)
+            sources.append(path)
+        frame = tmp_path / "frame.png"
+        PILImage.new("RGB", (1280, 720)).save(frame)
+
+        thumbnails, poster = make_previews(sources, frame, tmp_path / "out", 40, 75)
+
+        sizes = []
+        for path in thumbnails:
+            with PILImage.open(path) as out:
+                sizes.append(out.size)
+        assert sizes == [(40, 20), (20, 40)]
+        with PILImage.open(poster) as out:
+            assert (out.format, out.size) == ("WEBP", (1280, 720))
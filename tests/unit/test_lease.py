@@ -0,0 +1,222 @@
+"""
+Unit tests for worker leases of video projects (video/lease.py).
+
+ЧТО МЫ ТЕСТИРУЕМ:
+- Проект захватывается только из PENDING, повторная доставка отбрасывается
+- Heartbeat продлевает аренду; потерянная аренда останавливает работу
+- Отмена или удаление проекта останавливают работу ProjectCancelled
+- Проекты с истёкшей арендой возвращаются в очередь с backoff
+- После max_attempts проект помечается FAILED
+
+ВХОДНЫЕ ДАННЫЕ: проекты в файловой SQLite, время аренды
+ВЫХОДНЫЕ ДАННЫЕ: результат захвата, статусы проектов, LeaseLost, ProjectCancelled
+
+"""
+
+import asyncio
+from datetime import timedelta
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import delete, update
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from models import VideoProject
+from models.video_project import VideoStatus
+from video.lease import (
+    LeaseLost,
+    ProjectCancelled,
+    ProjectLease,
+    requeue_expired,
+    retry_delay,
+    utcnow,
+)
+
+
+@pytest_asyncio.fixture
+async def session_factory(tmp_path):
+    # A file database: the heartbeat uses its own connections
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'lease.sqlite'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(VideoProject.__table__.create)
+    yield async_sessionmaker(engine, expire_on_commit=False)
+    await engine.dispose()
+
+
+async def add_project(session_factory, **values) -> int:
+    async with session_factory() as session:
+        project = VideoProject(**values)
+        session.add(project)
+        await session.commit()
+        return project.id
+
+
+async def get_project(session_factory, project_id: int) -> VideoProject:
+    async with session_factory() as session:
+        return await session.get(VideoProject, project_id)
+
+
+def make_lease(session_factory, project_id: int, heartbeat_interval: float = 10.0):
+    return ProjectLease(project_id, session_factory, 60, heartbeat_interval)
+
+
+class TestAcquire:
+    @pytest.mark.asyncio
+    async def test_duplicate_delivery_dropped(self, session_factory):
+        """Тест: вторая доставка того же задания не захватывает проект"""
+        project_id = await add_project(session_factory, status=VideoStatus.PENDING)
+
+        async with session_factory() as session:
+            first = await make_lease(session_factory, project_id).acquire(session)
+            second = await make_lease(session_factory, project_id).acquire(session)
+
+        project = await get_project(session_factory, project_id)
+        assert (first, second) == (True, False)
+        assert project.status == VideoStatus.PROCESSING
+        assert project.attempts == 1
+        assert project.lease_expires_at is not None
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("status", [VideoStatus.UPLOADING, VideoStatus.SUCCESS])
+    async def test_not_pending_skipped(self, session_factory, status):
+        """Тест: незавершённая загрузка и готовый проект не захватываются"""
+        project_id = await add_project(session_factory, status=status)
+
+        async with session_factory() as session:
+            assert not await make_lease(session_factory, project_id).acquire(session)
+
+
+class TestHeartbeat:
+    @pytest.mark.asyncio
+    async def test_renew_only_by_owner(self, session_factory):
+        """Тест: продлить аренду может только её владелец"""
+        project_id = await add_project(session_factory, status=VideoStatus.PENDING)
+        lease = make_lease(session_factory, project_id)
+        async with session_factory() as session:
+            await lease.acquire(session)
+
+        assert await lease.renew()
+        assert not await make_lease(session_factory, project_id).renew()
+
+    @pytest.mark.asyncio
+    async def test_lost_lease_stops_work(self, session_factory):
+        """Тест: если проект отдан другому воркеру, работа прерывается LeaseLost"""
+        project_id = await add_project(session_factory, status=VideoStatus.PENDING)
+        lease = make_lease(session_factory, project_id, heartbeat_interval=0.01)
+        async with session_factory() as session:
+            await lease.acquire(session)
+            await session.execute(
+                update(VideoProject)
+                .where(VideoProject.id == project_id)
+                .values(lease_owner="other-worker")
+            )
+            await session.commit()
+
+        with pytest.raises(LeaseLost):
+            async with lease:
+                await asyncio.sleep(5)
+        assert not asyncio.current_task().cancelling()
+
+
+class TestCancellation:
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("deleted", [False, True])
+    async def test_cancel_stops_work_between_heartbeats(self, session_factory, deleted):
+        """Тест: отмену или удаление проекта видно раньше следующего heartbeat"""
+        project_id = await add_project(session_factory, status=VideoStatus.PENDING)
+        lease = ProjectLease(project_id, session_factory, 60, 30, check_interval=0.01)
+        async with session_factory() as session:
+            await lease.acquire(session)
+            if deleted:
+                await session.execute(delete(VideoProject).where(VideoProject.id == project_id))
+            else:
+                await session.execute(
+                    update(VideoProject)
+                    .where(VideoProject.id == project_id)
+                    .values(status=VideoStatus.CANCELLED)
+                )
+            await session.commit()
+
+        with pytest.raises(ProjectCancelled):
+            async with asyncio.timeout(2):
+                async with lease:
+                    await asyncio.sleep(5)
+        assert not asyncio.current_task().cancelling()
+
+    @pytest.mark.asyncio
+    async def test_owned_project_keeps_running(self, session_factory):
+        """Тест: частые проверки не прерывают работу, пока проект принадлежит воркеру"""
+        project_id = await add_project(session_factory, status=VideoStatus.PENDING)
+        lease = ProjectLease(project_id, session_factory, 60, 0.05, check_interval=0.01)
+        async with session_factory() as session:
+            await lease.acquire(session)
+
+        async with lease:
+            await asyncio.sleep(0.2)
+        assert lease.lost is None
+
+
+class TestRequeueExpired:
+    @pytest.mark.asyncio
+    async def test_expired_lease_requeued_after_backoff(self, session_factory):
+        """Тест: истёкшая аренда возвращается в PENDING только после backoff"""
+        now = utcnow()
+        waiting = await add_project(
+            session_factory,
+            status=VideoStatus.PROCESSING,
+            lease_owner="dead",
+            lease_expires_at=now - timedelta(seconds=5),
+            attempts=1,
+        )
+        ready = await add_project(
+            session_factory,
+            status=VideoStatus.PROCESSING,
+            lease_owner="dead",
+            lease_expires_at=now - timedelta(seconds=60),
+            attempts=1,
+        )
+        alive = await add_project(
+            session_factory,
+            status=VideoStatus.PROCESSING,
+            lease_owner="alive",
+            lease_expires_at=now + timedelta(seconds=60),
+            attempts=1,
+        )
+
+        async with session_factory() as session:
+            requeued, failed = await requeue_expired(
+                session, lease_seconds=60, max_attempts=3, backoff_seconds=30
+            )
+            await session.commit()
+
+        assert [project.id for project in requeued] == [ready]
+        assert failed == []
+        assert (await get_project(session_factory, ready)).lease_owner is None
+        assert (await get_project(session_factory, waiting)).status == VideoStatus.PROCESSING
+        assert (await get_project(session_factory, alive)).status == VideoStatus.PROCESSING
+
+    @pytest.mark.asyncio
+    async def test_out_of_attempts_failed(self, session_factory):
+        """Тест: после max_attempts проект не перезапускается, а падает"""
+        project_id = await add_project(
+            session_factory,
+            status=VideoStatus.PROCESSING,
+            lease_owner="dead",
+            lease_expires_at=utcnow() - timedelta(hours=1),
+            attempts=3,
+        )
+
+        async with session_factory() as session:
+            requeued, failed = await requeue_expired(
+                session, lease_seconds=60, max_attempts=3, backoff_seconds=30
+            )
+            await session.commit()
+
+        project = await get_project(session_factory, project_id)
+        assert requeued == [] and [p.id for p in failed] == [project_id]
+        assert project.status == VideoStatus.FAILED
+        assert "3 times" in project.error_message
+
+    def test_retry_delay_doubles(self):
+        """Тест: задержка удваивается с каждой попыткой"""
+        assert [retry_delay(attempts, 30) for attempts in (1, 2, 3)] == [30, 60, 120]
@@ -0,0 +1,267 @@
+"""
+Unit tests for media delivery (parse_range, content_hash, MediaFileResponse,
+resolve_media_path).
+
+ЧТО МЫ ТЕСТИРУЕМ:
+- Разбор заголовка Range: обычный, открытый, суффиксный, невыполнимый
+- Content-addressed пути получают immutable Cache-Control и ETag = SHA-256
+- Ответы 206 / 304 / 416 и отдача через zero-copy расширение сервера
+- URL-путь не выходит за корень media и не открывает служебные файлы
+- Кэш дескрипторов: вытеснение во время проверки файла не закрывает используемый дескриптор
+
+ВХОДНЫЕ ДАННЫЕ: заголовки запроса и временный файл
+ВЫХОДНЫЕ ДАННЫЕ: статус, заголовки и тело ответа
+
+"""
+
+import asyncio
+import os
+import threading
+
+import pytest
+from fastapi import HTTPException
+
+import api.media
+from api.media import resolve_media_path
+from storage import LocalObjectStorage
+from storage.delivery import (
+    IMMUTABLE_CACHE_CONTROL,
+    FileDescriptorCache,
+    MediaFileResponse,
+    RangeNotSatisfiable,
+    accel_redirect_response,
+    content_hash,
+    parse_range,
+)
+
+DIGEST = "ab" * 32
+
+
+async def call(response, headers=None, method="GET", extensions=None):
+    scope = {
+        "type": "http",
+        "method": method,
+        "headers": [(k.encode(), v.encode()) for k, v in (headers or {}).items()],
+        "extensions": extensions or {},
+    }
+    messages = []
+
+    async def receive():
+        # Like a server: the request has no body and the client never disconnects
+        await asyncio.Event().wait()
+
+    async def send(message):
+        messages.append(message)
+
+    await response(scope, receive, send)
+    start = messages[0]
+    response_headers = {k.decode(): v.decode() for k, v in start["headers"]}
+    return start["status"], response_headers, messages[1:]
+
+
+def body_of(messages) -> bytes:
+    return b"".join(m.get("body", b"") for m in messages)
+
+
+@pytest.fixture
+def media_file(tmp_path):
+    path = tmp_path / f"{DIGEST}.mp4"
+    path.write_bytes(bytes(range(100)))
+    return path
+
+
+class TestParseRange:
+    @pytest.mark.parametrize(
+        "header, expected",
+        [
+            ("bytes=0-9", (0, 9)),
+            ("bytes=90-", (90, 99)),
+            ("bytes=-10", (90, 99)),
+            ("bytes=95-500", (95, 99)),
+            ("bytes=0-1,5-6", None),
+            ("items=0-1", None),
+            (None, None),
+        ],
+    )
+    def test_ranges(self, header, expected):
+        assert parse_range(header, 100) == expected
+
+    @pytest.mark.parametrize("header", ["bytes=100-", "bytes=-0", "bytes=9-5"])
+    def test_not_satisfiable(self, header):
+        with pytest.raises(RangeNotSatisfiable):
+            parse_range(header, 100)
+
+
+def test_content_hash():
+    assert content_hash(f"blobs/ab/ab/{DIGEST}.mp4") == DIGEST
+    assert content_hash("videos/video_1.mp4") is None
+
+
+class TestMediaFileResponse:
+    @pytest.mark.asyncio
+    async def test_full_response_is_immutable(self, media_file):
+        cache = FileDescriptorCache(4)
+        status, headers, messages = await call(MediaFileResponse(media_file, cache, DIGEST))
+
+        assert status == 200
+        assert headers["etag"] == f'"{DIGEST}"'
+        assert headers["cache-control"] == IMMUTABLE_CACHE_CONTROL
+        assert headers["content-length"] == "100"
+        assert body_of(messages) == bytes(range(100))
+        cache.close()
+
+    @pytest.mark.asyncio
+    async def test_range_request(self, media_file):
+        cache = FileDescriptorCache(4)
+        response = MediaFileResponse(media_file, cache, DIGEST)
+        status, headers, messages = await call(response, {"range": "bytes=10-19"})
+
+        assert status == 206
+        assert headers["content-range"] == "bytes 10-19/100"
+        assert body_of(messages) == bytes(range(10, 20))
+        cache.close()
+
+    @pytest.mark.asyncio
+    async def test_stale_if_range_sends_whole_file(self, media_file):
+        cache = FileDescriptorCache(4)
+        response = MediaFileResponse(media_file, cache, DIGEST)
+        status, _, _ = await call(response, {"range": "bytes=10-19", "if-range": '"other"'})
+
+        assert status == 200
+        cache.close()
+
+    @pytest.mark.asyncio
+    async def test_if_none_match(self, media_file):
+        cache = FileDescriptorCache(4)
+        response = MediaFileResponse(media_file, cache, DIGEST)
+        status, _, _ = await call(response, {"if-none-match": f'"{DIGEST}"'})
+
+        assert status == 304
+        cache.close()
+
+    @pytest.mark.asyncio
+    async def test_unsatisfiable_range(self, media_file):
+        cache = FileDescriptorCache(4)
+        response = MediaFileResponse(media_file, cache, DIGEST)
+        status, headers, _ = await call(response, {"range": "bytes=500-"})
+
+        assert status == 416
+        assert headers["content-range"] == "bytes */100"
+        cache.close()
+
+    @pytest.mark.asyncio
+    async def test_zero_copy_send(self, media_file):
+        """Тест: сервер с http.response.zerocopysend получает дескриптор, а не байты"""
+        cache = FileDescriptorCache(4)
+        response = MediaFileResponse(media_file, cache, DIGEST)
+        _, _, messages = await call(
+            response, {"range": "bytes=10-19"}, extensions={"http.response.zerocopysend": {}}
+        )
+
+        assert messages[0]["type"] == "http.response.zerocopysend"
+        assert (messages[0]["offset"], messages[0]["count"]) == (10, 10)
+        cache.close()
+
+    @pytest.mark.asyncio
+    async def test_missing_file(self, tmp_path):
+        cache = FileDescriptorCache(4)
+        status, _, _ = await call(MediaFileResponse(tmp_path / "nope.mp4", cache))
+
+        assert status == 404
+
+
+class TestFileDescriptorCache:
+    @pytest.mark.asyncio
+    async def test_descriptor_reused_and_evicted(self, tmp_path):
+        paths = []
+        for name in ("a", "b"):
+            path = tmp_path / name
+            path.write_bytes(b"x")
+            paths.append(path)
+        cache = FileDescriptorCache(1)
+
+        first = await cache.acquire(paths[0], immutable=True)
+        cache.release(first)
+        again = await cache.acquire(paths[0], immutable=True)
+        assert again is first
+        cache.release(again)
+
+        await cache.acquire(paths[1], immutable=True)
+        assert first.evicted
+        cache.close()
+
+    @pytest.mark.asyncio
+    async def test_evicted_while_stat_pending(self, tmp_path, monkeypatch):
+        """Тест: вытеснение во время stat не закрывает дескриптор, чтение идёт из нужного файла"""
+        first_path, second_path = tmp_path / "a", tmp_path / "b"
+        first_path.write_bytes(b"first")
+        second_path.write_bytes(b"second")
+        cache = FileDescriptorCache(1)
+        cache.release(await cache.acquire(first_path, immutable=False))
+
+        stat_started, stat_continue = threading.Event(), threading.Event()
+        real_stat = os.stat
+
+        def slow_stat(path, *args, **kwargs):
+            if path == first_path:
+                stat_started.set()
+                stat_continue.wait(5)
+            return real_stat(path, *args, **kwargs)
+
+        monkeypatch.setattr(os, "stat", slow_stat)
+        pending = asyncio.create_task(cache.acquire(first_path, immutable=False))
+        await asyncio.to_thread(stat_started.wait, 5)
+
+        # Overflows the LRU of size 1 and evicts the entry being checked
+        second = await cache.acquire(second_path, immutable=True)
+        stat_continue.set()
+        first = await pending
+
+        assert first.evicted
+        assert os.pread(first.fd, 16, 0) == b"first"
+        cache.release(first)
+        cache.release(second)
+        with pytest.raises(OSError):
+            os.fstat(first.fd)
+        assert os.pread(second.fd, 16, 0) == b"second"
+        cache.close()
+
+
+def test_accel_redirect_response():
+    response = accel_redirect_response(f"/protected-media/blobs/ab/ab/{DIGEST}.mp4", DIGEST)
+
+    assert response.headers["x-accel-redirect"] == f"/protected-media/blobs/ab/ab/{DIGEST}.mp4"
+    assert response.headers["cache-control"] == IMMUTABLE_CACHE_CONTROL
+    assert response.body == b""
+
+
+class TestResolveMediaPath:
+    def test_regular_path(self):
+        path = resolve_media_path(f"blobs/ab/ab/{DIGEST}.mp4")
+        assert path == api.media.media_root / "blobs" / "ab" / "ab" / f"{DIGEST}.mp4"
+
+    @pytest.mark.parametrize(
+        "path",
+        [
+            "../app/.env",
+            "blobs/../../app/.env",
+            "videos/.video.mp4.upload",
+            ".env",
+            "videos//video.mp4",
+            "videos\\..\\secret",
+        ],
+    )
+    def test_rejected(self, path):
+        """Тест: '..', dot-файлы и пустые сегменты → 404"""
+        with pytest.raises(HTTPException) as exc_info:
+            resolve_media_path(path)
+        assert exc_info.value.status_code == 404
+
+    def test_object_metadata_hidden(self, monkeypatch):
+        """Тест: метаданные заглушки S3 (bucket.meta) не отдаются наружу"""
+        backend = LocalObjectStorage(api.media.media_root, "bucket")
+        monkeypatch.setattr(api.media, "storage_backend", backend)
+
+        assert resolve_media_path("bucket/blobs/x.png") == backend.local_path("blobs/x.png")
+        with pytest.raises(HTTPException):
+            resolve_media_path("bucket.meta/blobs/x.png.json")
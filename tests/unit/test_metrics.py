@@ -0,0 +1,165 @@
+"""
+Unit tests for the metrics registry (observability/metrics.py).
+
+ЧТО МЫ ТЕСТИРУЕМ:
+- Счётчики и гистограммы выводятся в текстовом формате Prometheus
+- Бакеты гистограммы накопительные, +Inf равен _count
+- Снимки воркеров суммируются со значениями процесса API
+- Коллекторы (в том числе async) вычисляются при чтении
+- Латентность HTTP записывается по шаблону маршрута, а не по пути
+
+ВХОДНЫЕ ДАННЫЕ: отдельный MetricsRegistry, приложение FastAPI с RequestTimingMiddleware
+ВЫХОДНЫЕ ДАННЫЕ: текст экспозиции, значения метрик
+
+"""
+
+import httpx
+import pytest
+from fastapi import APIRouter, FastAPI
+
+from observability import MetricsRegistry, RequestTimingMiddleware, TimedRoute
+from observability.metrics import HTTP_REQUEST_SECONDS, read_snapshots, write_snapshot
+
+
+def sample(text: str, line_start: str) -> float:
+    """Value of the first exposition line starting with line_start."""
+    for line in text.splitlines():
+        if line.startswith(line_start + " "):
+            return float(line.rsplit(" ", 1)[1])
+    raise AssertionError(f"{line_start} not in exposition")
+
+
+class TestExposition:
+    def test_counter(self):
+        """Тест: счётчик выводится с HELP, TYPE и метками"""
+        registry = MetricsRegistry()
+        renders = registry.counter("renders_total", "Finished renders.", ("result",))
+        renders.inc("success")
+        renders.inc("success")
+        renders.inc("failed")
+
+        text = registry.render()
+
+        assert "# HELP renders_total Finished renders." in text
+        assert "# TYPE renders_total counter" in text
+        assert sample(text, 'renders_total{result="success"}') == 2
+        assert sample(text, 'renders_total{result="failed"}') == 1
+
+    def test_histogram_buckets(self):
+        """Тест: бакеты накопительные, _sum и _count согласованы"""
+        registry = MetricsRegistry()
+        latency = registry.histogram("latency_seconds", "Latency.", buckets=(0.1, 1.0))
+        for value in (0.05, 0.5, 0.5, 3.0):
+            latency.observe(value)
+
+        text = registry.render()
+
+        assert sample(text, 'latency_seconds_bucket{le="0.1"}') == 1
+        assert sample(text, 'latency_seconds_bucket{le="1"}') == 3
+        assert sample(text, 'latency_seconds_bucket{le="+Inf"}') == 4
+        assert sample(text, "latency_seconds_count") == 4
+        assert sample(text, "latency_seconds_sum") == pytest.approx(4.05)
+
+    def test_label_escaping(self):
+        """Тест: кавычки и переводы строк в метках экранируются"""
+        registry = MetricsRegistry()
+        registry.counter("errors_total", "Errors.", ("message",)).inc('bad "x"\nline')
+
+        assert 'errors_total{message="bad \\"x\\"\\nline"} 1' in registry.render()
+
+    def test_wrong_labels(self):
+        """Тест: неверное число меток - ошибка, повторная регистрация возвращает ту же метрику"""
+        registry = MetricsRegistry()
+        counter = registry.counter("calls_total", "Calls.", ("task",))
+
+        with pytest.raises(ValueError):
+            counter.inc()
+        assert registry.counter("calls_total", "Calls.", ("task",)) is counter
+        with pytest.raises(ValueError):
+            registry.gauge("calls_total", "Calls.")
+
+
+class TestCollectors:
+    @pytest.mark.asyncio
+    async def test_sync_and_async(self):
+        """Тест: коллекторы заменяют значения при каждом чтении"""
+        registry = MetricsRegistry()
+        depth = {"small": 3}
+
+        async def queue_depth():
+            return [({"lane": lane}, count) for lane, count in depth.items()]
+
+        registry.collector("queue_depth", "Queue depth.", ("lane",), queue_depth)
+        registry.collector("pool", "Pool.", (), lambda: [({}, 5)])
+
+        await registry.collect()
+        depth = {"large": 1}
+        await registry.collect()
+        text = registry.render()
+
+        assert sample(text, 'queue_depth{lane="large"}') == 1
+        assert 'lane="small"' not in text
+        assert sample(text, "pool") == 5
+
+
+class TestSnapshots:
+    def test_worker_snapshots_merged(self):
+        """Тест: значения из снимка воркера прибавляются к значениям процесса"""
+        worker = MetricsRegistry()
+        worker.counter("tasks_total", "Tasks.", ("task",)).inc("render", amount=3)
+        worker.histogram("task_seconds", "Task time.", buckets=(1.0,)).observe(0.5)
+        worker.gauge("running", "Running.").set(7)
+        snapshot = worker.snapshot()
+
+        api = MetricsRegistry()
+        api.counter("tasks_total", "Tasks.", ("task",)).inc("render")
+        api.histogram("task_seconds", "Task time.", buckets=(1.0,)).observe(2.0)
+        api.gauge("running", "Running.")
+        text = api.render([snapshot])
+
+        assert sample(text, 'tasks_total{task="render"}') == 4
+        assert sample(text, 'task_seconds_bucket{le="1"}') == 1
+        assert sample(text, "task_seconds_count") == 2
+        # Gauges describe one process and are not summed
+        assert not [line for line in text.splitlines() if line.startswith("running ")]
+
+    def test_own_and_stale_snapshots_skipped(self, tmp_path):
+        """Тест: снимок своего процесса и устаревшие снимки не читаются"""
+        registry = MetricsRegistry()
+        registry.counter("tasks_total", "Tasks.").inc()
+        write_snapshot(registry, tmp_path)
+        (tmp_path / "1.json").write_text('{"tasks_total": [[[], 2]]}')
+
+        assert read_snapshots(tmp_path, max_age=60) == [{"tasks_total": [[[], 2]]}]
+        assert read_snapshots(tmp_path, max_age=-1) == []
+
+
+class TestHttpLatency:
+    @pytest.mark.asyncio
+    async def test_recorded_by_route_template(self):
+        """Тест: запросы к /items/1 и /items/2 попадают в одну серию /items/{item_id}"""
+        router = APIRouter(prefix="/api", route_class=TimedRoute)
+
+        @router.get("/items/{item_id}")
+        async def item(item_id: int):
+            return {"id": item_id}
+
+        app = FastAPI()
+        app.include_router(router)
+        app.add_middleware(RequestTimingMiddleware, log_requests=False)
+        key = ("GET", "/api/items/{item_id}", "200")
+
+        def count() -> int:
+            # Buckets and +Inf of the state; the last element is the sum
+            return sum(HTTP_REQUEST_SECONDS.state().get(key, [0.0])[:-1])
+
+        before = count()
+
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            await client.get("/api/items/1")
+            await client.get("/api/items/2")
+            await client.get("/missing")
+
+        assert count() - before == 2
+        assert ("GET", "unmatched", "404") in HTTP_REQUEST_SECONDS.state()
@@ -0,0 +1,111 @@
+"""
+Unit tests for the transactional outbox (outbox.py).
+
+ЧТО МЫ ТЕСТИРУЕМ:
+- Сообщение сохраняется только вместе с транзакцией, в которую добавлено
+- Релей публикует сообщения пачкой и удаляет опубликованные строки
+- Неопубликованные из-за ошибки брокера строки остаются для повтора
+- Сообщения неизвестной задачи отбрасываются
+
+ВХОДНЫЕ ДАННЫЕ: строки outbox в SQLite, брокер taskiq в памяти
+ВЫХОДНЫЕ ДАННЫЕ: вызванные задачи, оставшиеся строки
+
+"""
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from taskiq import InMemoryBroker
+
+from models import OutboxMessage
+from outbox import OutboxRelay, add_message
+
+
+@pytest_asyncio.fixture
+async def session_factory(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'outbox.sqlite'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(OutboxMessage.__table__.create)
+    yield async_sessionmaker(engine, expire_on_commit=False)
+    await engine.dispose()
+
+
+@pytest.fixture
+def broker():
+    broker = InMemoryBroker()
+    broker.received = []
+
+    @broker.task(task_name="render")
+    async def render(project_id: int) -> None:
+        broker.received.append(project_id)
+
+    return broker
+
+
+async def count_rows(session_factory) -> int:
+    async with session_factory() as session:
+        return await session.scalar(select(func.count()).select_from(OutboxMessage))
+
+
+class TestAddMessage:
+    @pytest.mark.asyncio
+    async def test_rolled_back_with_transaction(self, session_factory):
+        """Тест: при откате транзакции сообщение не сохраняется"""
+        async with session_factory() as session:
+            add_message(session, "render", 1)
+            await session.rollback()
+            add_message(session, "render", 2)
+            await session.commit()
+
+        async with session_factory() as session:
+            rows = (await session.scalars(select(OutboxMessage))).all()
+        assert [row.args for row in rows] == [[2]]
+
+
+class TestOutboxRelay:
+    @pytest.mark.asyncio
+    async def test_publishes_batch_and_deletes(self, session_factory, broker):
+        """Тест: релей публикует пачку по порядку и удаляет строки"""
+        async with session_factory() as session:
+            for project_id in (1, 2, 3):
+                add_message(session, "render", project_id)
+            await session.commit()
+        relay = OutboxRelay(broker, session_factory, batch_size=2, poll_interval=1)
+
+        assert await relay.publish_pending() == 2
+        assert await relay.publish_pending() == 1
+        assert await relay.publish_pending() == 0
+        await broker.wait_all()
+
+        assert sorted(broker.received) == [1, 2, 3]
+        assert await count_rows(session_factory) == 0
+
+    @pytest.mark.asyncio
+    async def test_failed_publish_kept(self, session_factory, broker, monkeypatch):
+        """Тест: при ошибке брокера строка остаётся в outbox"""
+        async with session_factory() as session:
+            add_message(session, "render", 1)
+            await session.commit()
+        relay = OutboxRelay(broker, session_factory, batch_size=10, poll_interval=1)
+
+        async def unavailable(message):
+            raise ConnectionError("broker is down")
+
+        monkeypatch.setattr(broker, "kick", unavailable)
+
+        assert await relay.publish_pending() == 0
+        assert await count_rows(session_factory) == 1
+
+    @pytest.mark.asyncio
+    async def test_unknown_task_dropped(self, session_factory, broker):
+        """Тест: сообщение задачи, которой нет в брокере, удаляется"""
+        async with session_factory() as session:
+            add_message(session, "removed_task", 1)
+            await session.commit()
+        relay = OutboxRelay(broker, session_factory, batch_size=10, poll_interval=1)
+
+        await relay.publish_pending()
+
+        assert await count_rows(session_factory) == 0
+        assert broker.received == []
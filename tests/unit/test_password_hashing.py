@@ -0,0 +1,196 @@
+"""
+Unit tests for password hashing off the event loop (authentication/password.py, user_manager.py).
+
+ЧТО МЫ ТЕСТИРУЕМ:
+- Хэширование и проверка пароля в пуле потоков и процессов
+- Одновременно выполняется не больше max_workers вычислений
+- При переполненной очереди запрос сразу получает 503
+- Хэш со старыми параметрами или bcrypt заменяется при входе,
+  выданные токены при этом остаются действительными
+- Смена пароля увеличивает версию токенов
+
+ВХОДНЫЕ ДАННЫЕ: пароли, параметры Argon2 (уменьшенные для скорости)
+ВЫХОДНЫЕ ДАННЫЕ: хэши, результат проверки, статистика очереди, HTTP 503
+
+"""
+
+import asyncio
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+from fastapi.security import OAuth2PasswordRequestForm
+from pwdlib.hashers.bcrypt import BcryptHasher
+
+import authentication.password as password_module
+from authentication.password import HashParams, PasswordHasherPool
+from authentication.strategy import CachedJWTStrategy
+from authentication.user_cache import UserCache
+from authentication.user_manager import UserManager
+from models import User
+
+FAST = HashParams(argon2_time_cost=1, argon2_memory_cost=1024, argon2_parallelism=1, bcrypt_rounds=4)
+
+
+def make_pool(params: HashParams = FAST, **kwargs) -> PasswordHasherPool:
+    options = {"executor": "thread", "max_workers": 2, "max_waiting": 8, **kwargs}
+    return PasswordHasherPool(params, **options)
+
+
+class FakeUserDB:
+    def __init__(self, user):
+        self.user = user
+        self.updates = []
+
+    async def get_by_email(self, email):
+        return self.user if email == self.user.email else None
+
+    async def update(self, user, update_dict):
+        self.updates.append(update_dict)
+        for key, value in update_dict.items():
+            setattr(user, key, value)
+        return user
+
+
+def credentials(email: str, password: str) -> OAuth2PasswordRequestForm:
+    return OAuth2PasswordRequestForm(username=email, password=password)
+
+
+class TestPasswordHasherPool:
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("executor", ["thread", "process"])
+    async def test_hash_and_verify(self, executor):
+        """Тест: хэш из пула проверяется, неверный пароль — нет"""
+        pool = make_pool(executor=executor)
+        try:
+            hashed = await pool.hash("s3cret")
+
+            assert await pool.verify_and_update("s3cret", hashed) == (True, None)
+            assert (await pool.verify_and_update("wrong", hashed))[0] is False
+        finally:
+            pool.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_concurrency_capped(self, monkeypatch):
+        """Тест: одновременно выполняется не больше max_workers хэширований"""
+        running = 0
+        peak = 0
+
+        def slow_hash(params, password):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            time.sleep(0.02)
+            running -= 1
+            return password
+
+        monkeypatch.setattr(password_module, "_hash", slow_hash)
+        pool = make_pool(max_workers=2)
+
+        await asyncio.gather(*(pool.hash(str(idx)) for idx in range(6)))
+        pool.shutdown()
+
+        assert peak == 2
+        assert pool.stats.calls == 6
+        assert pool.stats.queue_seconds_max > 0
+
+    @pytest.mark.asyncio
+    async def test_saturated_pool_sheds(self, monkeypatch):
+        """Тест: при полной очереди новый вызов сразу получает 503"""
+        release = threading.Event()
+
+        def blocked_hash(params, password):
+            release.wait(5)
+            return password
+
+        monkeypatch.setattr(password_module, "_hash", blocked_hash)
+        pool = make_pool(max_workers=1, max_waiting=1)
+
+        running = asyncio.create_task(pool.hash("first"))
+        waiting = asyncio.create_task(pool.hash("second"))
+        await asyncio.sleep(0.05)
+
+        with pytest.raises(HTTPException) as exc_info:
+            await pool.hash("third")
+        release.set()
+        await asyncio.gather(running, waiting)
+        pool.shutdown()
+
+        assert exc_info.value.status_code == 503
+        assert exc_info.value.headers["Retry-After"] == "1"
+        assert pool.stats.rejected == 1
+
+
+class TestRehashOnLogin:
+    @pytest.mark.asyncio
+    async def test_changed_parameters_rehashed(self):
+        """Тест: после смены параметров Argon2 хэш обновляется при входе"""
+        old_hash = await make_pool().hash("s3cret")
+        user = SimpleNamespace(email="a@example.com", hashed_password=old_hash)
+        user_db = FakeUserDB(user)
+        stronger = HashParams(
+            argon2_time_cost=2, argon2_memory_cost=1024, argon2_parallelism=1, bcrypt_rounds=4
+        )
+        manager = UserManager(user_db, hasher=make_pool(stronger))
+
+        assert await manager.authenticate(credentials("a@example.com", "s3cret")) is user
+        assert user.hashed_password != old_hash
+        assert "t=2" in user.hashed_password
+
+    @pytest.mark.asyncio
+    async def test_bcrypt_upgraded_to_argon2(self):
+        """Тест: пароль в bcrypt принимается и перехэшируется в Argon2"""
+        user = SimpleNamespace(
+            email="b@example.com", hashed_password=BcryptHasher(rounds=4).hash("s3cret")
+        )
+        manager = UserManager(FakeUserDB(user), hasher=make_pool())
+
+        assert await manager.authenticate(credentials("b@example.com", "s3cret")) is user
+        assert user.hashed_password.startswith("$argon2id$")
+
+    @pytest.mark.asyncio
+    async def test_wrong_password_and_unknown_email(self):
+        """Тест: неверный пароль и неизвестный email дают None без записи в БД"""
+        user = SimpleNamespace(email="c@example.com", hashed_password=await make_pool().hash("s3cret"))
+        user_db = FakeUserDB(user)
+        manager = UserManager(user_db, hasher=make_pool())
+
+        assert await manager.authenticate(credentials("c@example.com", "wrong")) is None
+        assert await manager.authenticate(credentials("nobody@example.com", "s3cret")) is None
+        assert user_db.updates == []
+
+    @pytest.mark.asyncio
+    async def test_rehash_keeps_tokens(self):
+        """Тест: перехэширование при входе не отзывает токены, выданные раньше"""
+        user = User(
+            id=1, email="d@example.com", hashed_password=BcryptHasher(rounds=4).hash("s3cret"),
+            is_active=True, is_superuser=False, is_verified=True, token_version=0,
+        )
+        manager = UserManager(FakeUserDB(user), hasher=make_pool())
+
+        async def get(user_id):
+            return user
+
+        manager.get = get
+        strategy = CachedJWTStrategy(
+            UserCache(ttl_seconds=60, max_size=10), secret="test-secret-" + "x" * 32, lifetime_seconds=60
+        )
+        token = await strategy.write_token(user)
+
+        assert await manager.authenticate(credentials("d@example.com", "s3cret")) is user
+        assert user.hashed_password.startswith("$argon2id$")
+        assert (await strategy.read_token(token, manager)).id == 1
+
+    @pytest.mark.asyncio
+    async def test_password_change_bumps_version(self):
+        """Тест: смена пароля увеличивает версию токенов"""
+        user = SimpleNamespace(email="e@example.com", hashed_password="old", token_version=3)
+        user_db = FakeUserDB(user)
+        manager = UserManager(user_db, hasher=make_pool())
+
+        await manager._update(user, {"password": "n3w-secret"})
+
+        assert user.token_version == 4
+        assert user_db.updates[0].keys() == {"hashed_password", "token_version"}
@@ -0,0 +1,174 @@
+"""
+Unit tests for query budgets (observability/query_budget.py) and strict loading (queries/loading.py).
+
+ЧТО МЫ ТЕСТИРУЕМ:
+- Бюджет считает запросы блока и падает при превышении со списком SQL
+- Запросы других задач на том же движке не учитываются
+- Чтение рецептов, ингредиентов и видеопроектов укладывается в бюджет
+  и сериализуется без ленивых загрузок
+- В режиме raise_on_lazy_load незагруженная связь вызывает ошибку
+
+ВХОДНЫЕ ДАННЫЕ: файловая SQLite с рецептами и видеопроектами
+ВЫХОДНЫЕ ДАННЫЕ: число запросов, QueryBudgetExceeded, InvalidRequestError
+
+"""
+
+import asyncio
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import select, text
+from sqlalchemy.exc import InvalidRequestError
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from models import (
+    Allergen,
+    Base,
+    Cuisine,
+    Image,
+    Ingredient,
+    Recipe,
+    RecipeIngredient,
+    User,
+    VideoProject,
+)
+from models.video_project import VideoStatus
+from observability import QueryBudgetExceeded
+from queries import IngredientQueries, RecipeQueries, VideoProjectQueries
+from queries.loading import strict_loading as strict_loading_options
+from schemas import RecipeRead
+
+
+@pytest_asyncio.fixture
+async def engine(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'budget.sqlite'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield engine
+    await engine.dispose()
+
+
+@pytest_asyncio.fixture
+async def session_factory(engine):
+    factory = async_sessionmaker(engine, expire_on_commit=False)
+    async with factory() as session:
+        user = User(id=1, email="a@example.com", hashed_password="x")
+        cuisine = Cuisine(name="Italian")
+        allergens = [Allergen(name="Gluten"), Allergen(name="Milk")]
+        ingredients = [Ingredient(name=f"Ingredient {idx}") for idx in range(3)]
+        session.add_all([user, cuisine, *allergens, *ingredients])
+        await session.flush()
+        for idx in range(5):
+            recipe = Recipe(
+                title=f"Recipe {idx}",
+                description="",
+                cooking_time=10,
+                author_id=user.id,
+                cuisine=cuisine,
+                allergens=allergens,
+            )
+            recipe.ingredients = [
+                RecipeIngredient(ingredient=ingredient, quantity=1.0, measurement=1)
+                for ingredient in ingredients
+            ]
+            session.add(recipe)
+        for idx in range(3):
+            project = VideoProject(status=VideoStatus.SUCCESS, transition="none")
+            project.images = [Image(image_path=f"{idx}-{n}.png", order_index=n) for n in range(2)]
+            session.add(project)
+        await session.commit()
+    return factory
+
+
+class TestQueryBudget:
+    @pytest.mark.asyncio
+    async def test_within_budget(self, engine, query_budget):
+        """Тест: запросы блока подсчитываются"""
+        async with engine.connect() as conn:
+            with query_budget(2) as log:
+                await conn.execute(text("SELECT 1"))
+                await conn.execute(text("SELECT 2"))
+
+        assert log.statements == ["SELECT 1", "SELECT 2"]
+
+    @pytest.mark.asyncio
+    async def test_exceeded(self, engine, query_budget):
+        """Тест: превышение бюджета - ошибка со списком запросов"""
+        async with engine.connect() as conn:
+            with pytest.raises(QueryBudgetExceeded, match="2 statements executed, the budget is 1"):
+                with query_budget(1):
+                    await conn.execute(text("SELECT 1"))
+                    await conn.execute(text("SELECT 2"))
+
+    @pytest.mark.asyncio
+    async def test_nested_and_other_tasks(self, engine, query_budget):
+        """Тест: вложенный бюджет учитывается во внешнем, чужие задачи - нет"""
+
+        async def other_task():
+            async with engine.connect() as conn:
+                await conn.execute(text("SELECT 'other'"))
+
+        with query_budget(5) as outer:
+            async with engine.connect() as conn:
+                with query_budget(1) as inner:
+                    await conn.execute(text("SELECT 1"))
+                await asyncio.get_running_loop().create_task(other_task())
+
+        assert len(inner) == 1
+        # The task was created inside the block and inherits its context
+        assert len(outer) == 2
+
+        await other_task()
+        assert len(outer) == 2
+
+
+class TestReadPaths:
+    @pytest.mark.asyncio
+    async def test_recipe(self, session_factory, query_budget, strict_loading):
+        """Тест: рецепт со всеми связями за 6 запросов, сериализация без ленивых загрузок"""
+        async with session_factory() as session:
+            with query_budget(6):
+                recipe = await RecipeQueries(session).get_by_id(1)
+                data = RecipeRead.model_validate(recipe)
+
+        assert len(data.ingredients) == 3
+        assert len(data.allergens) == 2
+
+    @pytest.mark.asyncio
+    async def test_recipes_by_ingredient(self, session_factory, query_budget, strict_loading):
+        """Тест: число запросов не зависит от числа рецептов"""
+        include = {"cuisine", "allergens", "ingredients"}
+        async with session_factory() as session:
+            with query_budget(5):
+                shaped = await IngredientQueries(session).get_recipes_by_ingredient(
+                    1, include, set()
+                )
+
+        assert len(shaped) == 5
+
+    @pytest.mark.asyncio
+    async def test_video_page(self, session_factory, query_budget, strict_loading):
+        """Тест: страница проектов с изображениями - 2 запроса"""
+        async with session_factory() as session:
+            with query_budget(2):
+                projects, _ = await VideoProjectQueries(session).get_page(limit=10)
+                image_counts = [len(project.images) for project in projects]
+
+        assert image_counts == [2, 2, 2]
+
+
+class TestStrictLoading:
+    @pytest.mark.asyncio
+    async def test_missing_option_raises(self, session_factory, strict_loading):
+        """Тест: связь без явной опции загрузки вызывает ошибку, а не запрос"""
+        async with session_factory() as session:
+            recipe = await session.scalar(
+                select(Recipe).options(*strict_loading_options()).where(Recipe.id == 1)
+            )
+
+            with pytest.raises(InvalidRequestError, match="lazy='raise'"):
+                recipe.cuisine
+
+    def test_off_by_default(self):
+        """Тест: без режима отладки опции не добавляются"""
+        assert strict_loading_options() == []
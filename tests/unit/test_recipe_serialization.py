@@ -0,0 +1,157 @@
+"""
+Unit tests for the fast recipe page serialization (utils/recipe_serialization.py).
+
+ЧТО МЫ ТЕСТИРУЕМ:
+- Словарь рецепта кодируется в те же байты, что и RecipeRead
+- Страница GET /receipts в быстром режиме побайтно совпадает с ответом через
+  response_model Page[RecipeRead]: фильтры, сортировка, пустая страница
+- Пограничные значения: нет кухни, пустые имена автора, кириллица,
+  неизвестная единица измерения, дробные количества
+- Оба кодировщика json_dumps: pydantic-core и orjson (если установлен)
+
+ВХОДНЫЕ ДАННЫЕ: объекты рецептов (SimpleNamespace), приложение с роутером рецептов на SQLite
+ВЫХОДНЫЕ ДАННЫЕ: байты JSON ответа
+
+"""
+
+from types import SimpleNamespace
+
+import httpx
+import pytest
+import pytest_asyncio
+from fastapi import FastAPI
+from fastapi_pagination import add_pagination
+from pydantic import TypeAdapter
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+import utils.recipe_serialization as recipe_serialization
+from api.receipts import router as receipts_router
+from config.config import settings
+from models import Allergen, Base, Cuisine, Ingredient, Recipe, RecipeIngredient, User, db_helper
+from schemas import RecipeRead
+from utils.recipe_serialization import json_dumps, recipe_to_read_dict
+
+QUANTITIES = [500.0, 0.1, 1e-7, 12345678.9, 2.5e20, 3.0]
+
+
+def make_recipe(with_cuisine: bool) -> SimpleNamespace:
+    return SimpleNamespace(
+        id=1,
+        title="Борщ \"домашний\"",
+        description="Line one\nline two",
+        cooking_time=90,
+        difficulty=2,
+        author=SimpleNamespace(id=3, first_name="Анна", last_name=None),
+        cuisine=SimpleNamespace(id=2, name="Русская") if with_cuisine else None,
+        allergens=[SimpleNamespace(id=1, name="Celery")],
+        ingredients=[
+            SimpleNamespace(
+                ingredient=SimpleNamespace(id=idx, name=f"Свёкла {idx}"),
+                quantity=quantity,
+                measurement=idx % 4 + 1,
+            )
+            for idx, quantity in enumerate(QUANTITIES)
+        ],
+    )
+
+
+@pytest.fixture(params=["pydantic-core", "orjson"])
+def encoder(request, monkeypatch):
+    """json_dumps with each encoder; orjson only when it is installed."""
+    module = pytest.importorskip("orjson") if request.param == "orjson" else None
+    monkeypatch.setattr(recipe_serialization, "orjson", module)
+    return request.param
+
+
+@pytest_asyncio.fixture
+async def app(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'recipes.sqlite'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    factory = async_sessionmaker(engine, expire_on_commit=False)
+    async with factory() as session:
+        authors = [
+            User(id=1, email="a@example.com", hashed_password="x", first_name="Иван", last_name="Петров"),
+            User(id=2, email="b@example.com", hashed_password="x"),
+        ]
+        cuisines = [Cuisine(name="Italian"), Cuisine(name="Грузинская")]
+        allergens = [Allergen(name="Gluten"), Allergen(name="Молоко")]
+        ingredients = [Ingredient(name=f"Ингредиент {idx}") for idx in range(6)]
+        session.add_all([*authors, *cuisines, *allergens, *ingredients])
+        await session.flush()
+        for idx in range(30):
+            recipe = Recipe(
+                title=f"Рецепт {idx}",
+                description="" if idx % 4 else "Описание с \"кавычками\"",
+                cooking_time=5 + idx,
+                difficulty=idx % 5 + 1,
+                author_id=authors[idx % 2].id,
+                cuisine=cuisines[idx % 2] if idx % 3 else None,
+                allergens=allergens[: idx % 3],
+            )
+            recipe.ingredients = [
+                RecipeIngredient(
+                    ingredient=ingredient,
+                    quantity=QUANTITIES[(idx + n) % len(QUANTITIES)],
+                    measurement=(idx + n) % 4 + 1,
+                )
+                for n, ingredient in enumerate(ingredients[: idx % 6])
+            ]
+            session.add(recipe)
+        await session.commit()
+
+    async def session_getter():
+        async with factory() as session:
+            yield session
+
+    app = FastAPI()
+    app.include_router(receipts_router)
+    app.dependency_overrides[db_helper.session_getter] = session_getter
+    add_pagination(app)
+    yield app
+    await engine.dispose()
+
+
+async def get(app: FastAPI, params: dict) -> httpx.Response:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        response = await client.get(settings.url.receipts, params=params)
+    assert response.status_code == 200
+    return response
+
+
+class TestRecipeToReadDict:
+    @pytest.mark.parametrize("with_cuisine", [True, False])
+    def test_same_bytes_as_schema(self, encoder, with_cuisine):
+        """Тест: байты совпадают с RecipeRead, метка '?' для неизвестной единицы"""
+        recipe = make_recipe(with_cuisine)
+        expected = TypeAdapter(RecipeRead).dump_json(RecipeRead.model_validate(recipe))
+
+        assert json_dumps(recipe_to_read_dict(recipe)) == expected
+        assert recipe_to_read_dict(recipe)["ingredients"][3]["measurement_label"] == "?"
+
+
+class TestFastPage:
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize(
+        "params",
+        [
+            {"size": 100},
+            {"size": 7, "page": 2},
+            {"ingredient_id": "2,4", "order_by": "difficulty"},
+            {"name__like": "Рецепт 1"},
+            {"name__like": "missing"},
+            {"size": 10, "page": 50},
+        ],
+        ids=str,
+    )
+    async def test_byte_for_byte(self, app, encoder, monkeypatch, params):
+        """Тест: быстрый режим отдаёт те же байты и заголовки, что и response_model"""
+        monkeypatch.setattr(settings.api, "fast_serialization", False)
+        expected = await get(app, params)
+        monkeypatch.setattr(settings.api, "fast_serialization", True)
+        fast = await get(app, params)
+
+        assert fast.content == expected.content
+        assert fast.headers["content-type"] == expected.headers["content-type"]
+        assert fast.headers["content-length"] == expected.headers["content-length"]
@@ -0,0 +1,119 @@
+"""
+Unit tests for per-request timing (observability/timing.py).
+
+ЧТО МЫ ТЕСТИРУЕМ:
+- Запросы к БД внутри HTTP-запроса считаются и попадают в Server-Timing
+- Время сериализации измеряется для async и sync эндпоинтов
+- По каждому запросу пишется строка лога с полями
+- Вне HTTP-запроса (воркер) и при ошибке SQL учёт не ломается
+
+ВХОДНЫЕ ДАННЫЕ: приложение FastAPI с TimedRoute, SQLite с инструментированным движком
+ВЫХОДНЫЕ ДАННЫЕ: заголовок Server-Timing, записи лога
+
+"""
+
+import logging
+import re
+
+import httpx
+import pytest
+import pytest_asyncio
+from fastapi import APIRouter, FastAPI
+from pydantic import BaseModel
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from observability import RequestTimingMiddleware, TimedRoute, current_timings, instrument_engine
+
+
+class Item(BaseModel):
+    id: int
+
+
+@pytest_asyncio.fixture
+async def engine(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'timing.sqlite'}")
+    instrument_engine(engine)
+    yield engine
+    await engine.dispose()
+
+
+@pytest.fixture
+def app(engine):
+    router = APIRouter(route_class=TimedRoute)
+
+    @router.get("/items", response_model=list[Item])
+    async def items(n: int = 3):
+        async with engine.connect() as conn:
+            for _ in range(n):
+                await conn.execute(text("SELECT 1"))
+        return [{"id": idx} for idx in range(1000)]
+
+    @router.get("/sync", response_model=list[Item])
+    def sync_items():
+        return [{"id": idx} for idx in range(10)]
+
+    app = FastAPI()
+    app.include_router(router)
+    app.add_middleware(RequestTimingMiddleware)
+    return app
+
+
+def server_timing(response: httpx.Response) -> dict[str, str]:
+    return dict(re.findall(r"(\w+);dur=([\d.]+)", response.headers["server-timing"]))
+
+
+async def get(app: FastAPI, path: str) -> httpx.Response:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        return await client.get(path)
+
+
+class TestServerTiming:
+    @pytest.mark.asyncio
+    async def test_queries_counted(self, app):
+        """Тест: заголовок содержит число запросов и время БД, пула, сериализации"""
+        response = await get(app, "/items?n=4")
+
+        assert response.status_code == 200
+        assert 'desc="4 queries"' in response.headers["server-timing"]
+        assert set(server_timing(response)) == {"db", "pool", "ser", "total"}
+
+    @pytest.mark.asyncio
+    async def test_sync_endpoint(self, app):
+        """Тест: для sync-эндпоинта в пуле потоков сериализация тоже измеряется"""
+        response = await get(app, "/sync")
+
+        assert "ser" in server_timing(response)
+        assert 'desc="0 queries"' in response.headers["server-timing"]
+
+    @pytest.mark.asyncio
+    async def test_request_logged(self, app, caplog):
+        """Тест: по запросу пишется строка с методом, путём, статусом и числом запросов"""
+        with caplog.at_level(logging.INFO, logger="observability.timing"):
+            await get(app, "/items?n=2")
+
+        record = caplog.records[-1]
+        assert record.request_timing["path"] == "/items"
+        assert record.request_timing["status"] == 200
+        assert record.request_timing["queries"] == 2
+        assert "queries=2" in record.getMessage()
+
+
+class TestOutsideRequests:
+    @pytest.mark.asyncio
+    async def test_worker_queries_not_counted(self, engine):
+        """Тест: вне HTTP-запроса контекста нет, запросы выполняются как обычно"""
+        async with engine.connect() as conn:
+            assert (await conn.execute(text("SELECT 1"))).scalar() == 1
+        assert current_timings() is None
+
+    @pytest.mark.asyncio
+    async def test_failed_statement(self, engine):
+        """Тест: после ошибочного SQL следующие запросы того же соединения учитываются"""
+        async with engine.connect() as conn:
+            with pytest.raises(OperationalError):
+                await conn.execute(text("SELECT * FROM missing_table"))
+            await conn.execute(text("SELECT 1"))
+            assert conn.sync_connection.info["request_timing.query_starts"] == []
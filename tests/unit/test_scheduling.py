@@ -0,0 +1,171 @@
+"""
+Unit tests for render scheduling (video/scheduling.py).
+
+ЧТО МЫ ТЕСТИРУЕМ:
+- Оценка стоимости растёт с числом и размером изображений, HLS дороже MP4
+- Проект попадает в малую или большую полосу по стоимости
+- Внутри полосы первым идёт владелец, потративший меньше рендера недавно
+- Число одновременных больших рендеров ограничено, свободный слот берёт работу другой полосы
+
+ВХОДНЫЕ ДАННЫЕ: размеры изображений, проекты в файловой SQLite
+ВЫХОДНЫЕ ДАННЫЕ: стоимость, полоса, id следующего проекта
+
+"""
+
+from datetime import timedelta
+from types import SimpleNamespace
+
+import pytest
+import pytest_asyncio
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from config.config import VideoConfig
+from models import VideoProject
+from models.video_project import VideoStatus
+from video.lease import utcnow
+from video.scheduling import (
+    LARGE_LANE,
+    SMALL_LANE,
+    claim_next,
+    estimate_render_cost,
+    next_project_id,
+    owner_key,
+    schedule_render,
+)
+
+VIDEO = VideoConfig(profile="720p", fps=24, image_duration=2.0)
+
+
+@pytest_asyncio.fixture
+async def session_factory(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'scheduling.sqlite'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(VideoProject.__table__.create)
+    yield async_sessionmaker(engine, expire_on_commit=False)
+    await engine.dispose()
+
+
+async def add_projects(session_factory, *projects: dict) -> list[int]:
+    async with session_factory() as session:
+        rows = [VideoProject(**values) for values in projects]
+        session.add_all(rows)
+        await session.commit()
+        return [row.id for row in rows]
+
+
+def pending(owner: str, lane: str = SMALL_LANE, minutes_ago: int = 0) -> dict:
+    return dict(
+        status=VideoStatus.PENDING,
+        owner_key=owner,
+        lane=lane,
+        render_cost=10.0,
+        queued_at=utcnow() - timedelta(minutes=minutes_ago),
+    )
+
+
+def rendering(owner: str, lane: str = SMALL_LANE, cost: float = 10.0) -> dict:
+    return dict(
+        status=VideoStatus.PROCESSING,
+        owner_key=owner,
+        lane=lane,
+        render_cost=cost,
+        heartbeat_at=utcnow(),
+    )
+
+
+class TestRenderCost:
+    def test_grows_with_images(self):
+        """Тест: больше изображений и пикселей — выше стоимость"""
+        small = estimate_render_cost([(800, 600)] * 3, "mp4", VIDEO)
+        more = estimate_render_cost([(800, 600)] * 30, "mp4", VIDEO)
+        bigger = estimate_render_cost([(8000, 6000)] * 3, "mp4", VIDEO)
+
+        assert small < more
+        assert small < bigger
+
+    def test_hls_costs_more(self):
+        """Тест: HLS кодирует несколько рендишенов и стоит дороже"""
+        sizes = [(800, 600)] * 3
+
+        assert estimate_render_cost(sizes, "hls", VIDEO) > estimate_render_cost(sizes, "mp4", VIDEO)
+
+    @pytest.mark.parametrize("count, lane", [(3, SMALL_LANE), (500, LARGE_LANE)])
+    def test_lane_by_cost(self, count, lane):
+        """Тест: превью из 3 кадров — малая полоса, 500 кадров — большая"""
+        project = SimpleNamespace(output_format="mp4")
+
+        schedule_render(project, [(1024, 768)] * count, VIDEO, small_lane_max_cost=2000)
+
+        assert project.lane == lane
+        assert project.queued_at is not None
+
+    def test_owner_key(self):
+        """Тест: ключ владельца — пользователь или адрес клиента"""
+        assert owner_key(7, "10.0.0.1") == "user:7"
+        assert owner_key(None, "10.0.0.1") == "ip:10.0.0.1"
+
+
+class TestNextProject:
+    @pytest.mark.asyncio
+    async def test_owner_served_recently_waits(self, session_factory):
+        """Тест: новый пользователь обгоняет очередь того, кто уже рендерит"""
+        busy_first, _, newcomer = await add_projects(
+            session_factory,
+            pending("user:1", minutes_ago=10),
+            rendering("user:1"),
+            pending("user:2", minutes_ago=1),
+        )
+
+        async with session_factory() as session:
+            project_id = await next_project_id(session, SMALL_LANE, 1, 600)
+
+        assert project_id == newcomer
+        assert project_id != busy_first
+
+    @pytest.mark.asyncio
+    async def test_oldest_first_between_equal_owners(self, session_factory):
+        """Тест: при равном обслуживании первым идёт самый старый проект"""
+        older, _ = await add_projects(
+            session_factory,
+            pending("user:1", minutes_ago=5),
+            pending("user:2", minutes_ago=1),
+        )
+
+        async with session_factory() as session:
+            assert await next_project_id(session, SMALL_LANE, 1, 600) == older
+
+    @pytest.mark.asyncio
+    async def test_large_slots_capped(self, session_factory):
+        """Тест: при занятых больших слотах сообщение большой полосы берёт малый проект"""
+        _, large, small = await add_projects(
+            session_factory,
+            rendering("user:1", lane=LARGE_LANE, cost=5000),
+            pending("user:2", lane=LARGE_LANE, minutes_ago=5),
+            pending("user:3"),
+        )
+
+        async with session_factory() as session:
+            assert await next_project_id(session, LARGE_LANE, 1, 600) == small
+            assert await next_project_id(session, LARGE_LANE, 2, 600) == large
+
+    @pytest.mark.asyncio
+    async def test_falls_back_to_other_lane(self, session_factory):
+        """Тест: слот малой полосы без работы берёт большой проект"""
+        (large,) = await add_projects(session_factory, pending("user:1", lane=LARGE_LANE))
+
+        async with session_factory() as session:
+            assert await next_project_id(session, SMALL_LANE, 1, 600) == large
+
+
+class TestClaimNext:
+    @pytest.mark.asyncio
+    async def test_claims_until_empty(self, session_factory):
+        """Тест: слот захватывает проекты по одному, пока есть работа"""
+        await add_projects(session_factory, pending("user:1"), pending("user:2"))
+
+        async with session_factory() as session:
+            claimed = []
+            while lease := await claim_next(session, SMALL_LANE, 1, 600, session_factory, 60, 10):
+                claimed.append(lease.project_id)
+
+        assert len(claimed) == 2
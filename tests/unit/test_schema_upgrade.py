@@ -0,0 +1,56 @@
+"""
+Unit tests for the in-place schema upgrade (upgrade_schema).
+
+ЧТО МЫ ТЕСТИРУЕМ:
+- Колонки, добавленные в модели позже, появляются в уже существующей таблице
+- Старые строки получают значения по умолчанию и читаются через ORM
+- Повторный запуск ничего не меняет
+
+ВХОДНЫЕ ДАННЫЕ: SQLite в памяти со старой схемой video_projects/images
+ВЫХОДНЫЕ ДАННЫЕ: список добавленных колонок и индексов
+
+"""
+
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import Session
+
+from models import Base, VideoProject
+from models.schema_upgrade import upgrade_schema
+
+OLD_SCHEMA = [
+    """CREATE TABLE video_projects (
+        id INTEGER NOT NULL PRIMARY KEY,
+        status VARCHAR(20) NOT NULL,
+        video_path VARCHAR(500),
+        error_message VARCHAR(1000),
+        created_at DATETIME DEFAULT CURRENT_TIMESTAMP NOT NULL,
+        updated_at DATETIME DEFAULT CURRENT_TIMESTAMP NOT NULL
+    )""",
+    """CREATE TABLE images (
+        id INTEGER NOT NULL PRIMARY KEY,
+        video_project_id INTEGER NOT NULL REFERENCES video_projects (id) ON DELETE CASCADE,
+        image_path VARCHAR(500) NOT NULL,
+        order_index INTEGER NOT NULL
+    )""",
+    "INSERT INTO video_projects (id, status) VALUES (1, 'success')",
+]
+
+
+def test_old_database_is_upgraded():
+    """Тест: база до появления stage/progress/transition → колонки добавлены"""
+    engine = create_engine("sqlite://")
+    with engine.begin() as conn:
+        for statement in OLD_SCHEMA:
+            conn.exec_driver_sql(statement)
+        Base.metadata.create_all(conn)
+
+        added = upgrade_schema(conn)
+
+        assert "video_projects.stage" in added
+        assert "video_projects.transition" in added
+        assert "images.sha256" in added
+        assert upgrade_schema(conn) == []
+
+    with Session(engine) as session:
+        project = session.scalars(select(VideoProject)).one()
+        assert (project.stage, project.progress, project.transition) == ("queued", 0.0, "none")
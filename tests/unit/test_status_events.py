@@ -0,0 +1,184 @@
+"""
+Unit tests for video status events (StatusHub, ProgressReporter, SSE framing).
+
+ЧТО МЫ ТЕСТИРУЕМ:
+- Раздача событий подписчикам проекта; у медленного клиента теряется самое старое
+- Троттлинг записи прогресса и расчёт ETA
+- Формат событий SSE и завершение потока на финальном статусе
+
+ВХОДНЫЕ ДАННЫЕ: словари событий, номера кадров, поддельное время
+ВЫХОДНЫЕ ДАННЫЕ: содержимое очередей, записанный прогресс, строки SSE
+
+"""
+
+import asyncio
+import json
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+
+import pytest
+
+import api.videos
+import video.progress
+from api.videos import _event_stream, _format_event
+from video.progress import ProgressReporter
+from video.status_bus import StatusHub
+
+BASE_URL = "http://testserver"
+
+
+def event(project_id=1, status="processing", progress=0.0, video_path=None):
+    return {
+        "id": project_id,
+        "status": status,
+        "stage": "encoding",
+        "progress": progress,
+        "eta_seconds": None,
+        "error_message": None,
+        "video_path": video_path,
+    }
+
+
+class TestStatusHub:
+    def test_dispatch_only_to_project_subscribers(self):
+        hub = StatusHub()
+        first = hub.subscribe(1)
+        other = hub.subscribe(2)
+
+        hub.dispatch(event(1))
+
+        assert first.qsize() == 1
+        assert other.empty()
+
+    def test_full_queue_drops_oldest(self):
+        """Тест: очередь на 2 события, пришло 3 → остались два последних"""
+        hub = StatusHub(queue_size=2)
+        queue = hub.subscribe(1)
+
+        for progress in (10.0, 20.0, 30.0):
+            hub.dispatch(event(1, progress=progress))
+
+        assert [queue.get_nowait()["progress"] for _ in range(2)] == [20.0, 30.0]
+
+    def test_unsubscribe(self):
+        hub = StatusHub()
+        queue = hub.subscribe(1)
+        hub.unsubscribe(1, queue)
+
+        hub.dispatch(event(1))
+
+        assert queue.empty()
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def reporter_env(monkeypatch):
+    clock = FakeClock()
+    executed, published = [], []
+
+    class FakeSession:
+        async def execute(self, statement):
+            executed.append(statement.compile().params)
+
+        async def commit(self):
+            pass
+
+    @asynccontextmanager
+    async def session_factory():
+        yield FakeSession()
+
+    async def publish(payload):
+        published.append(payload)
+
+    monkeypatch.setattr(video.progress, "time", clock)
+    monkeypatch.setattr(video.progress, "db_helper", SimpleNamespace(session_factory=session_factory))
+    monkeypatch.setattr(video.progress.status_bus, "publish", publish)
+    return clock, executed, published
+
+
+class TestProgressReporter:
+    @pytest.mark.asyncio
+    async def test_throttled_by_interval(self, reporter_env):
+        clock, executed, _ = reporter_env
+        reporter = ProgressReporter(project_id=1, total_frames=100, interval=1.0)
+
+        clock.now += 0.5
+        await reporter(10)
+        clock.now += 0.5
+        await reporter(20)  # меньше секунды с прошлого отчёта
+        clock.now += 0.6
+        await reporter(30)
+
+        assert [params["progress"] for params in executed] == [10.0, 30.0]
+
+    @pytest.mark.asyncio
+    async def test_eta_and_final_report(self, reporter_env):
+        """Тест: 25% за 10 секунд → осталось 30 секунд; последний кадр пишется всегда"""
+        clock, executed, published = reporter_env
+        reporter = ProgressReporter(project_id=1, total_frames=100, interval=60.0)
+
+        clock.now += 10
+        await reporter(25)
+        clock.now += 1
+        await reporter(100)
+
+        assert executed[0]["eta_seconds"] == 30
+        assert (executed[1]["progress"], executed[1]["eta_seconds"]) == (100.0, 0)
+        assert published[-1]["progress"] == 100.0
+
+
+class TestSse:
+    def test_format_event(self):
+        text = _format_event(event(status="success", video_path="blobs/ab/cd/x.mp4"), BASE_URL)
+
+        assert text.startswith("event: status\ndata: ")
+        assert text.endswith("\n\n")
+        payload = json.loads(text.removeprefix("event: status\ndata: "))
+        assert payload["video_url"] == "http://testserver/media/blobs/ab/cd/x.mp4"
+
+    @pytest.mark.asyncio
+    async def test_stream_ends_on_terminal_status(self, monkeypatch):
+        """Тест: снимок, событие прогресса, success → поток закрыт, подписка снята"""
+        hub = StatusHub()
+        monkeypatch.setattr(api.videos, "status_hub", hub)
+        queue = hub.subscribe(1)
+        queue.put_nowait(event(progress=50.0))
+        queue.put_nowait(event(status="success", progress=100.0))
+
+        chunks = [
+            chunk
+            async for chunk in _event_stream(None, 1, queue, event(progress=0.0), BASE_URL)
+        ]
+
+        assert len(chunks) == 3
+        assert '"status":"success"' in chunks[-1]
+        assert hub._subscribers == {}
+
+    @pytest.mark.asyncio
+    async def test_keepalive_when_idle(self, monkeypatch):
+        hub = StatusHub()
+        monkeypatch.setattr(api.videos, "status_hub", hub)
+        monkeypatch.setattr(api.videos, "SSE_KEEPALIVE_SECONDS", 0.01)
+        queue = hub.subscribe(1)
+
+        class Request:
+            calls = 0
+
+            async def is_disconnected(self):
+                self.calls += 1
+                return self.calls > 1
+
+        chunks = [
+            chunk
+            async for chunk in _event_stream(Request(), 1, queue, event(), BASE_URL)
+        ]
+
+        assert chunks[1] == ": keepalive\n\n"
+        assert len(chunks) == 2
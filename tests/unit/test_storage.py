@@ -0,0 +1,148 @@
+"""
+Unit tests for content-addressed media storage (ContentStore, backends).
+
+ЧТО МЫ ТЕСТИРУЕМ:
+- Ключ blob-а строится по SHA-256 и шардируется по каталогам
+- Одинаковые файлы хранятся один раз, ссылки считаются в stored_blobs
+- Файлы без ссылок удаляются сборщиком мусора
+- Файлы отменённой транзакции удаляются, закоммиченные остаются
+- Заглушка S3-совместимого хранилища пишет метаданные объекта
+
+ВХОДНЫЕ ДАННЫЕ: временные файлы и сессия SQLite в памяти
+ВЫХОДНЫЕ ДАННЫЕ: ключи, счётчики ссылок, файлы в хранилище
+
+"""
+
+import hashlib
+from types import SimpleNamespace
+
+import pytest
+import pytest_asyncio
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from models import StoredBlob
+from storage import ContentStore, LocalObjectStorage, LocalStorage, blob_key
+
+
+@pytest_asyncio.fixture
+async def session():
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(StoredBlob.__table__.create)
+    async with async_sessionmaker(engine, expire_on_commit=False)() as session:
+        yield session
+    await engine.dispose()
+
+
+def make_file(tmp_path, name: str, data: bytes):
+    path = tmp_path / name
+    path.write_bytes(data)
+    return path, hashlib.sha256(data).hexdigest()
+
+
+def test_blob_key_is_sharded():
+    digest = "abcdef" + "0" * 58
+    assert blob_key(digest, ".png") == f"blobs/ab/cd/{digest}.png"
+
+
+class TestContentStore:
+    @pytest.mark.asyncio
+    async def test_same_content_stored_once(self, tmp_path, session):
+        """Тест: два одинаковых файла → один blob со счётчиком 2, исходники удалены"""
+        store = ContentStore(LocalStorage(tmp_path / "media"))
+        first, digest = make_file(tmp_path, "a.png", b"same")
+        second, _ = make_file(tmp_path, "b.png", b"same")
+
+        key1 = await store.add(session, first, digest, ".png")
+        key2 = await store.add(session, second, digest, ".png")
+        await session.commit()
+
+        assert key1 == key2
+        assert (tmp_path / "media" / key1).read_bytes() == b"same"
+        assert not first.exists() and not second.exists()
+        blob = await session.get(StoredBlob, key1)
+        assert blob.refcount == 2
+
+    @pytest.mark.asyncio
+    async def test_garbage_collected_after_last_release(self, tmp_path, session):
+        store = ContentStore(LocalStorage(tmp_path / "media"))
+        src, _ = make_file(tmp_path, "v.mp4", b"video")
+        key = await store.add_file(session, src, ".mp4")
+        await session.commit()
+
+        await store.release(session, key)
+        await session.commit()
+
+        assert await store.collect_garbage(session) == 1
+        assert not (tmp_path / "media" / key).exists()
+        assert await session.get(StoredBlob, key) is None
+
+    @pytest.mark.asyncio
+    async def test_release_project(self, tmp_path, session):
+        """Тест: проект отпускает картинки и видео; общая картинка другого проекта остаётся"""
+        store = ContentStore(LocalStorage(tmp_path / "media"))
+        keys = []
+        for name, data in (("a.png", b"shared"), ("b.png", b"shared"), ("v.mp4", b"video")):
+            src, _ = make_file(tmp_path, name, data)
+            keys.append(await store.add_file(session, src, src.suffix))
+        await session.commit()
+        project = SimpleNamespace(
+            images=[SimpleNamespace(image_path=keys[0], thumbnail_path=None)],
+            video_path=keys[2],
+            poster_path=None,
+            media_keys=None,
+        )
+
+        await store.release_project(session, project)
+        await session.commit()
+
+        assert await store.collect_garbage(session) == 1
+        assert (tmp_path / "media" / keys[0]).exists()
+        assert not (tmp_path / "media" / keys[2]).exists()
+
+    @pytest.mark.asyncio
+    async def test_referenced_blob_survives_gc(self, tmp_path, session):
+        store = ContentStore(LocalStorage(tmp_path / "media"))
+        src, _ = make_file(tmp_path, "v.mp4", b"video")
+        key = await store.add_file(session, src, ".mp4")
+        await session.commit()
+
+        assert await store.collect_garbage(session) == 0
+        assert (tmp_path / "media" / key).exists()
+
+
+    @pytest.mark.asyncio
+    async def test_discard_uncommitted(self, tmp_path, session):
+        """Тест: после отката удаляется только файл без строки в stored_blobs"""
+        store = ContentStore(LocalStorage(tmp_path / "media"))
+        kept, _ = make_file(tmp_path, "kept.mp4", b"kept")
+        kept_key = await store.add_file(session, kept, ".mp4")
+        await session.commit()
+        partial, _ = make_file(tmp_path, "partial.mp4", b"partial")
+        partial_key = await store.add_file(session, partial, ".mp4")
+
+        await session.rollback()
+
+        assert await store.discard_uncommitted(session) == 1
+        assert (tmp_path / "media" / kept_key).exists()
+        assert not (tmp_path / "media" / partial_key).exists()
+        assert await store.discard_uncommitted(session) == 0
+
+
+class TestLocalObjectStorage:
+    @pytest.mark.asyncio
+    async def test_put_head_delete(self, tmp_path):
+        backend = LocalObjectStorage(tmp_path, "bucket")
+        src, _ = make_file(tmp_path, "x.png", b"payload")
+
+        await backend.put_file(src, "blobs/x.png")
+        head = await backend.head("blobs/x.png")
+
+        assert head["ContentLength"] == 7
+        assert head["ETag"] == f'"{hashlib.md5(b"payload").hexdigest()}"'
+        assert head["ContentType"] == "image/png"
+        assert backend.public_path("blobs/x.png") == "/media/bucket/blobs/x.png"
+
+        await backend.delete("blobs/x.png")
+        assert not await backend.exists("blobs/x.png")
+        assert not backend.local_path("blobs/x.png").exists()
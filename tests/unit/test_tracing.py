@@ -0,0 +1,168 @@
+"""
+Unit tests for tracing (observability/tracing.py).
+
+ЧТО МЫ ТЕСТИРУЕМ:
+- Вложенные спаны получают родителя из контекста
+- Трасса продолжается по traceparent: заголовок HTTP, метки сообщения taskiq
+- Спаны экспортируются в JSONL в формате OTLP
+- Без экспортёра трассировка ничего не делает, ошибка экспорта не ломает работу
+
+ВХОДНЫЕ ДАННЫЕ: Tracer с экспортёром в список, приложение FastAPI, сообщения taskiq
+ВЫХОДНЫЕ ДАННЫЕ: экспортированные спаны, метки сообщений
+
+"""
+
+import json
+
+import httpx
+import pytest
+from fastapi import APIRouter, FastAPI
+from taskiq import TaskiqMessage, TaskiqResult
+
+from observability import Span, TaskTracingMiddleware, Tracer, TracingMiddleware
+from observability.tracing import JsonlSpanExporter, SpanExporter, current_traceparent
+
+REMOTE_PARENT = "00-0af7651916cd43dd8448eb211c80319c-b7ad6b7169203331-01"
+
+
+class ListExporter(SpanExporter):
+    def __init__(self):
+        self.spans: list[Span] = []
+
+    def export(self, spans: list[Span]) -> None:
+        self.spans.extend(spans)
+
+
+class FailingExporter(SpanExporter):
+    def export(self, spans: list[Span]) -> None:
+        raise ConnectionRefusedError("collector is down")
+
+
+@pytest.fixture
+def exporter():
+    return ListExporter()
+
+
+@pytest.fixture
+def tracer(exporter):
+    return Tracer(exporter, flush_interval=60)
+
+
+def make_message(labels=None) -> TaskiqMessage:
+    return TaskiqMessage(task_id="t1", task_name="render", labels=labels or {}, args=[7], kwargs={})
+
+
+class TestSpans:
+    def test_nested(self, tracer, exporter):
+        """Тест: дочерний спан в той же трассе, его родитель - внешний спан"""
+        with tracer.span("outer") as outer:
+            with tracer.span("inner", step=1) as inner:
+                assert current_traceparent() == inner.traceparent
+        tracer.flush()
+
+        assert [span.name for span in exporter.spans] == ["inner", "outer"]
+        assert inner.trace_id == outer.trace_id
+        assert inner.parent_id == outer.span_id
+        assert outer.parent_id is None
+        assert current_traceparent() is None
+
+    def test_remote_parent(self, tracer):
+        """Тест: traceparent из другого процесса задаёт трассу и родителя"""
+        with tracer.span("task", REMOTE_PARENT) as span:
+            pass
+
+        assert span.trace_id == "0af7651916cd43dd8448eb211c80319c"
+        assert span.parent_id == "b7ad6b7169203331"
+
+    def test_error_recorded(self, tracer, exporter):
+        """Тест: исключение помечает спан ошибкой и пробрасывается"""
+        with pytest.raises(RuntimeError):
+            with tracer.span("render"):
+                raise RuntimeError("ffmpeg died")
+        tracer.flush()
+
+        assert exporter.spans[0].error == "RuntimeError: ffmpeg died"
+        assert exporter.spans[0].to_otlp()["status"]["code"] == 2
+
+    def test_disabled(self):
+        """Тест: без экспортёра спаны не создаются"""
+        tracer = Tracer(None)
+        with tracer.span("noop") as span:
+            assert span is None
+            assert current_traceparent() is None
+
+    def test_export_failure(self):
+        """Тест: недоступный коллектор не ломает работу, спаны отбрасываются"""
+        tracer = Tracer(FailingExporter(), flush_interval=60)
+        with tracer.span("request"):
+            pass
+        tracer.flush()
+
+
+class TestJsonlExporter:
+    def test_otlp_lines(self, tmp_path, tracer):
+        """Тест: по строке JSON на спан, поля OTLP"""
+        path = tmp_path / "traces.jsonl"
+        with tracer.span("outer"):
+            with tracer.span("inner", images=3):
+                pass
+        tracer.exporter = JsonlSpanExporter(str(path), "video-app")
+        tracer.flush()
+
+        lines = [json.loads(line) for line in path.read_text().splitlines()]
+        assert [line["name"] for line in lines] == ["inner", "outer"]
+        assert lines[0]["parentSpanId"] == lines[1]["spanId"]
+        assert lines[0]["attributes"] == [{"key": "images", "value": {"intValue": "3"}}]
+        assert lines[0]["service"] == "video-app"
+
+
+class TestTaskPropagation:
+    def test_labels_carry_trace(self, tracer, exporter):
+        """Тест: отправка добавляет traceparent в метки, выполнение продолжает трассу"""
+        middleware = TaskTracingMiddleware(tracer)
+        with tracer.span("outbox.publish") as publish:
+            sent = middleware.pre_send(make_message())
+        assert sent.labels["traceparent"] == publish.traceparent
+
+        received = middleware.pre_execute(make_message(sent.labels))
+        result = TaskiqResult(is_err=False, return_value=None, execution_time=0.1)
+        middleware.post_execute(received, result)
+        tracer.flush()
+
+        task_span = exporter.spans[-1]
+        assert task_span.name == "task render"
+        assert task_span.trace_id == publish.trace_id
+        assert task_span.parent_id == publish.span_id
+
+    def test_no_trace_no_label(self, tracer):
+        """Тест: вне трассы метка не добавляется"""
+        middleware = TaskTracingMiddleware(tracer)
+        assert "traceparent" not in middleware.pre_send(make_message()).labels
+
+
+class TestHttpSpans:
+    @pytest.mark.asyncio
+    async def test_request_span(self, tracer, exporter):
+        """Тест: спан запроса продолжает заголовок traceparent и назван по шаблону маршрута"""
+        router = APIRouter(prefix="/api")
+
+        @router.get("/videos/{project_id}")
+        async def show(project_id: int):
+            with tracer.span("load"):
+                return {"id": project_id}
+
+        app = FastAPI()
+        app.include_router(router)
+        app.add_middleware(TracingMiddleware, tracer=tracer)
+
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            response = await client.get("/api/videos/5", headers={"traceparent": REMOTE_PARENT})
+        tracer.flush()
+
+        assert response.status_code == 200
+        load, request = exporter.spans
+        assert request.name == "GET /api/videos/{project_id}"
+        assert request.attributes["http.status_code"] == 200
+        assert request.parent_id == "b7ad6b7169203331"
+        assert load.parent_id == request.span_id
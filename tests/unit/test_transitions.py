@@ -0,0 +1,71 @@
+"""
+Unit tests for slideshow frame generation (SlideshowRenderer).
+
+ЧТО МЫ ТЕСТИРУЕМ:
+- Количество кадров на изображение и в сумме
+- Плавный переход (crossfade) между соседними изображениями
+- Панорамирование/зум (kenburns) не меняет размер кадра
+
+ВХОДНЫЕ ДАННЫЕ: одноцветные numpy-массивы одинакового размера
+ВЫХОДНЫЕ ДАННЫЕ: последовательность кадров (height, width, 3) uint8
+
+"""
+
+import numpy as np
+import pytest
+
+from video.transitions import SlideshowRenderer
+
+
+def solid(value, size=(16, 8)):
+    width, height = size
+    return np.full((height, width, 3), value, dtype=np.uint8)
+
+
+def collect(renderer, slides):
+    # Рендерер переиспользует буферы, поэтому копируем каждый кадр
+    return [frame.copy() for frame in renderer.frames(slides)]
+
+
+class TestSlideshowRenderer:
+    def test_unknown_transition_raises(self):
+        with pytest.raises(ValueError):
+            SlideshowRenderer((16, 8), fps=10, image_duration=1, transition="spin")
+
+    def test_hard_cut(self):
+        """Тест: transition=none → каждое изображение ровно fps * duration кадров"""
+        renderer = SlideshowRenderer((16, 8), fps=10, image_duration=1)
+        frames = collect(renderer, [solid(0), solid(200)])
+
+        assert len(frames) == renderer.total_frames(2) == 20
+        assert all((f == 0).all() for f in frames[:10])
+        assert all((f == 200).all() for f in frames[10:])
+
+    def test_crossfade_blends_monotonically(self):
+        """Тест: crossfade → последние кадры первого слайда плавно идут к второму"""
+        renderer = SlideshowRenderer(
+            (16, 8), fps=10, image_duration=1,
+            transition="crossfade", transition_duration=0.4,
+        )
+        frames = collect(renderer, [solid(0), solid(200)])
+
+        assert len(frames) == 20
+        assert (frames[5] == 0).all()
+        fade = [int(f[0, 0, 0]) for f in frames[6:10]]
+        assert fade == sorted(fade)
+        assert 0 < fade[0] and fade[-1] < 200
+        # Последний слайд переходить некуда
+        assert all((f == 200).all() for f in frames[10:])
+
+    def test_kenburns_first_frame_is_identity(self):
+        """Тест: kenburns → первый кадр без зума совпадает с исходником"""
+        image = np.arange(8 * 16 * 3, dtype=np.uint8).reshape(8, 16, 3)
+        renderer = SlideshowRenderer(
+            (16, 8), fps=10, image_duration=1, transition="kenburns"
+        )
+        frames = collect(renderer, [image])
+
+        assert len(frames) == 10
+        assert np.array_equal(frames[0], image)
+        assert frames[-1].shape == image.shape
+        assert not np.array_equal(frames[-1], image)
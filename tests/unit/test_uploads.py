@@ -0,0 +1,334 @@
+"""
+Unit tests for streaming image uploads (detect_image_type, UploadStaging).
+
+ЧТО МЫ ТЕСТИРУЕМ:
+- Определение формата по сигнатуре (magic bytes), а не по расширению
+- Потоковое сохранение в staging с подсчётом SHA-256 и лимитами размера
+- Разбор multipart прямо из потока запроса: лимиты срабатывают до чтения тела
+- Возобновляемые загрузки: блокировка части, сброс битой части, истечение срока
+- Два одновременных /complete: изображения и рендер сохраняются один раз
+
+ВХОДНЫЕ ДАННЫЕ: UploadFile с байтами изображения
+ВЫХОДНЫЕ ДАННЫЕ: StagedImage или HTTPException
+
+"""
+
+import asyncio
+import hashlib
+import io
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi import HTTPException, UploadFile
+from starlette.requests import Request
+from PIL import Image as PILImage
+
+import pytest_asyncio
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from config.config import settings
+from models import Base, Image, OutboxMessage, VideoProject, VideoStatus
+from services import VideoProjectService
+from services import video_project_service
+from storage import ContentStore, LocalStorage
+from video.uploads import (
+    UploadStaging,
+    append_chunks,
+    detect_image_type,
+    finalize_part,
+    resumable_part_path,
+)
+
+
+def image_bytes(fmt: str, size=(64, 48)) -> bytes:
+    buffer = io.BytesIO()
+    PILImage.new("RGB", size, (10, 20, 30)).save(buffer, format=fmt)
+    return buffer.getvalue()
+
+
+def upload(data: bytes, filename: str) -> UploadFile:
+    return UploadFile(file=io.BytesIO(data), filename=filename)
+
+
+async def body(*chunks: bytes):
+    for chunk in chunks:
+        yield chunk
+
+
+def multipart_request(parts, chunk_size=100, content_length=True):
+    """Request whose body arrives in chunk_size pieces; parts: (name, filename, data)."""
+    boundary = "testboundary"
+    body = b""
+    for name, filename, data in parts:
+        disposition = f'form-data; name="{name}"'
+        if filename is not None:
+            disposition += f'; filename="{filename}"'
+        body += f"--{boundary}\r\nContent-Disposition: {disposition}\r\n\r\n".encode()
+        body += data + b"\r\n"
+    body += f"--{boundary}--\r\n".encode()
+
+    headers = [(b"content-type", f"multipart/form-data; boundary={boundary}".encode())]
+    if content_length:
+        headers.append((b"content-length", str(len(body)).encode()))
+    chunks = [body[i:i + chunk_size] for i in range(0, len(body), chunk_size)]
+    received = []
+
+    async def receive():
+        chunk = chunks[len(received)]
+        received.append(chunk)
+        return {"type": "http.request", "body": chunk, "more_body": len(received) < len(chunks)}
+
+    request = Request({"type": "http", "method": "POST", "headers": headers}, receive)
+    return request, received
+
+
+@pytest.fixture
+def staging_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings.upload, "staging_dir", str(tmp_path / "staging"))
+    return tmp_path / "staging"
+
+
+class TestDetectImageType:
+    @pytest.mark.parametrize("fmt, expected", [("JPEG", "jpg"), ("PNG", "png"), ("WEBP", "webp")])
+    def test_known_formats(self, fmt, expected):
+        assert detect_image_type(image_bytes(fmt)[:16]) == expected
+
+    def test_unknown_format(self):
+        assert detect_image_type(b"GIF89a\x00\x00") is None
+
+
+class TestUploadStaging:
+    @pytest.mark.asyncio
+    async def test_receive_hashes_and_reads_dimensions(self, staging_dir):
+        """Тест: файл с расширением .jpg, но внутри PNG → тип определяется как png"""
+        data = image_bytes("PNG")
+
+        async with UploadStaging() as staging:
+            staged = await staging.receive(upload(data, "photo.jpg"))
+
+            assert staged.image_type == "png"
+            assert staged.sha256 == hashlib.sha256(data).hexdigest()
+            assert staged.size_bytes == len(data)
+            assert (staged.width, staged.height) == (64, 48)
+            assert staged.path.read_bytes() == data
+
+        # После выхода из контекста staging-каталог удаляется
+        assert not any(staging_dir.iterdir())
+
+    @pytest.mark.asyncio
+    async def test_rejects_non_image(self, staging_dir):
+        async with UploadStaging() as staging:
+            with pytest.raises(HTTPException) as exc_info:
+                await staging.receive(upload(b"#!/bin/sh\necho hi\n", "evil.png"))
+        assert exc_info.value.status_code == 400
+
+    @pytest.mark.asyncio
+    async def test_rejects_truncated_image(self, staging_dir):
+        data = image_bytes("PNG")[:40]
+        async with UploadStaging() as staging:
+            with pytest.raises(HTTPException) as exc_info:
+                await staging.receive(upload(data, "broken.png"))
+        assert exc_info.value.status_code == 400
+
+    @pytest.mark.asyncio
+    async def test_file_size_limit(self, staging_dir, monkeypatch):
+        monkeypatch.setattr(settings.upload, "max_file_bytes", 100)
+        monkeypatch.setattr(settings.upload, "chunk_size", 64)
+        async with UploadStaging() as staging:
+            with pytest.raises(HTTPException) as exc_info:
+                await staging.receive(upload(image_bytes("PNG", (200, 200)), "big.png"))
+        assert exc_info.value.status_code == 413
+
+
+class TestReceiveMultipart:
+    @pytest.mark.asyncio
+    async def test_files_and_fields(self, staging_dir):
+        png, jpg = image_bytes("PNG"), image_bytes("JPEG")
+        request, _ = multipart_request(
+            [("images", "a.png", png), ("transition", None, b"crossfade"), ("images", "b.jpg", jpg)]
+        )
+
+        async with UploadStaging() as staging:
+            staged, fields = await staging.receive_multipart(request)
+
+            assert [s.image_type for s in staged] == ["png", "jpg"]
+            assert staged[0].path.read_bytes() == png
+            assert staged[1].sha256 == hashlib.sha256(jpg).hexdigest()
+            assert fields == {"transition": "crossfade"}
+
+    @pytest.mark.asyncio
+    async def test_content_length_checked_before_reading(self, staging_dir, monkeypatch):
+        """Тест: Content-Length больше лимита → 413, тело не читается вовсе"""
+        monkeypatch.setattr(settings.upload, "max_request_bytes", 1000)
+        request, received = multipart_request([("images", "a.png", image_bytes("PNG") + bytes(5000))])
+
+        async with UploadStaging() as staging:
+            with pytest.raises(HTTPException) as exc_info:
+                await staging.receive_multipart(request)
+        assert exc_info.value.status_code == 413
+        assert received == []
+
+    @pytest.mark.asyncio
+    async def test_chunked_body_stops_at_limit(self, staging_dir, monkeypatch):
+        """Тест: без Content-Length чтение обрывается, как только превышен лимит"""
+        monkeypatch.setattr(settings.upload, "max_request_bytes", 1000)
+        request, received = multipart_request(
+            [("images", "a.png", image_bytes("PNG") + bytes(5000))], content_length=False
+        )
+
+        async with UploadStaging() as staging:
+            with pytest.raises(HTTPException) as exc_info:
+                await staging.receive_multipart(request)
+        assert exc_info.value.status_code == 413
+        assert sum(map(len, received)) <= 1100
+
+    @pytest.mark.asyncio
+    async def test_non_image_rejected_on_first_bytes(self, staging_dir):
+        request, received = multipart_request(
+            [("images", "evil.png", b"#!/bin/sh\necho hi\n" * 100)], chunk_size=64
+        )
+
+        async with UploadStaging() as staging:
+            with pytest.raises(HTTPException) as exc_info:
+                await staging.receive_multipart(request)
+        assert exc_info.value.status_code == 400
+        assert len(received) < 5
+
+
+class TestResumableParts:
+    @pytest.mark.asyncio
+    async def test_resume_after_interruption(self, tmp_path):
+        """Тест: файл присылается двумя запросами, второй продолжает с offset"""
+        data = image_bytes("PNG")
+        path = tmp_path / "part_0"
+
+        offset = await append_chunks(path, body(data[:50]), 0, len(data), "a.png")
+        assert offset == 50
+
+        offset = await append_chunks(path, body(data[50:]), offset, len(data), "a.png")
+        assert offset == len(data)
+
+        staged = await finalize_part(path, "a.png")
+        assert staged.sha256 == hashlib.sha256(data).hexdigest()
+        assert (staged.width, staged.height) == (64, 48)
+
+    @pytest.mark.asyncio
+    async def test_offset_mismatch_is_409(self, tmp_path):
+        data = image_bytes("PNG")
+        path = tmp_path / "part_0"
+        await append_chunks(path, body(data[:50]), 0, len(data), "a.png")
+
+        with pytest.raises(HTTPException) as exc_info:
+            await append_chunks(path, body(data), 0, len(data), "a.png")
+        assert exc_info.value.status_code == 409
+
+    @pytest.mark.asyncio
+    async def test_more_than_declared_is_413(self, tmp_path):
+        data = image_bytes("PNG")
+        with pytest.raises(HTTPException) as exc_info:
+            await append_chunks(tmp_path / "part_0", body(data), 0, len(data) - 1, "a.png")
+        assert exc_info.value.status_code == 413
+
+    @pytest.mark.asyncio
+    async def test_concurrent_patch_is_423(self, tmp_path):
+        """Тест: повтор PATCH, пока первый ещё пишет → 423, файл не портится"""
+        data = image_bytes("PNG")
+        path = tmp_path / "part_0"
+        first_chunk_written = asyncio.Event()
+        release = asyncio.Event()
+
+        async def slow_body():
+            yield data[:50]
+            first_chunk_written.set()
+            await release.wait()
+            yield data[50:]
+
+        first = asyncio.create_task(append_chunks(path, slow_body(), 0, len(data), "a.png"))
+        await first_chunk_written.wait()
+
+        with pytest.raises(HTTPException) as exc_info:
+            await append_chunks(path, body(data), 0, len(data), "a.png")
+        assert exc_info.value.status_code == 423
+
+        release.set()
+        assert await first == len(data)
+        assert path.read_bytes() == data
+
+
+@pytest_asyncio.fixture
+async def session(staging_dir):
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with async_sessionmaker(engine, expire_on_commit=False)() as session:
+        yield session
+    await engine.dispose()
+
+
+class TestResumableService:
+    @pytest.mark.asyncio
+    async def test_broken_part_is_reset_on_complete(self, session):
+        """Тест: битый файл при /complete → 400, часть сброшена на offset 0"""
+        service = VideoProjectService(session)
+        data = image_bytes("PNG")[:40] + bytes(10)
+        project, _ = await service.start_resumable("none", [("a.png", len(data))])
+        path = resumable_part_path(project.id, 0)
+        await append_chunks(path, body(data), 0, len(data), "a.png")
+
+        with pytest.raises(HTTPException) as exc_info:
+            await service.complete_resumable(project.id)
+
+        assert exc_info.value.status_code == 400
+        assert not path.exists()
+
+    @pytest.mark.asyncio
+    async def test_expired_uploads_deleted(self, session):
+        service = VideoProjectService(session)
+        old, _ = await service.start_resumable("none", [("a.png", 100)])
+        fresh, _ = await service.start_resumable("none", [("b.png", 100)])
+        await append_chunks(resumable_part_path(old.id, 0), body(b"\x89PNG"), 0, 100, "a.png")
+        await session.execute(
+            update(VideoProject)
+            .where(VideoProject.id == old.id)
+            .values(created_at=datetime.now(timezone.utc) - timedelta(days=2))
+        )
+        await session.commit()
+
+        assert await service.expire_resumable() == 1
+
+        assert await session.get(VideoProject, old.id) is None
+        assert await session.get(VideoProject, fresh.id) is not None
+        assert await service.repository.get_upload_parts(old.id) == []
+        assert not resumable_part_path(old.id, 0).parent.exists()
+
+    @pytest.mark.asyncio
+    async def test_concurrent_complete_claims_once(self, staging_dir, tmp_path, monkeypatch):
+        """Тест: из двух одновременных /complete проходит один, второй → 409"""
+        monkeypatch.setattr(
+            video_project_service, "content_store", ContentStore(LocalStorage(tmp_path / "media"))
+        )
+        # Separate connections, as two requests would have
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'uploads.sqlite'}")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        factory = async_sessionmaker(engine, expire_on_commit=False)
+        data = image_bytes("PNG")
+        async with factory() as session:
+            project, _ = await VideoProjectService(session).start_resumable("none", [("a.png", len(data))])
+        await append_chunks(resumable_part_path(project.id, 0), body(data), 0, len(data), "a.png")
+
+        async def complete():
+            async with factory() as session:
+                return await VideoProjectService(session).complete_resumable(project.id)
+
+        results = await asyncio.gather(complete(), complete(), return_exceptions=True)
+
+        errors = [result for result in results if isinstance(result, BaseException)]
+        assert len(errors) == 1
+        assert isinstance(errors[0], HTTPException) and errors[0].status_code == 409
+        async with factory() as session:
+            assert await session.scalar(select(func.count()).select_from(Image)) == 1
+            assert await session.scalar(select(func.count()).select_from(OutboxMessage)) == 1
+            assert (await session.get(VideoProject, project.id)).status == VideoStatus.PENDING
+        await engine.dispose()
@@ -0,0 +1,141 @@
+"""
+Unit tests for the authenticated-user cache (authentication/user_cache.py, strategy.py).
+
+ЧТО МЫ ТЕСТИРУЕМ:
+- Кэш ограничен по размеру (LRU) и по времени жизни записей
+- Инвалидация удаляет все версии пользователя
+- Повторный запрос с тем же JWT не загружает пользователя из БД
+- Токен, выданный до смены пароля (старой версии), отклоняется
+
+ВХОДНЫЕ ДАННЫЕ: пользователи User, JWT из CachedJWTStrategy, менеджер-заглушка
+ВЫХОДНЫЕ ДАННЫЕ: пользователи из кэша, число обращений к БД
+
+"""
+
+import time
+
+import pytest
+from fastapi_users import exceptions
+from sqlalchemy import inspect
+
+from authentication.strategy import CachedJWTStrategy
+from authentication.user_cache import UserCache, token_version
+from models import User
+
+
+def make_user(user_id: int, version: int = 0) -> User:
+    return User(
+        id=user_id,
+        email=f"user{user_id}@example.com",
+        hashed_password="hash",
+        is_active=True,
+        is_superuser=False,
+        is_verified=True,
+        token_version=version,
+    )
+
+
+class FakeUserManager:
+    def __init__(self, *users: User):
+        self.users = {user.id: user for user in users}
+        self.loads = 0
+
+    def parse_id(self, value) -> int:
+        try:
+            return int(value)
+        except ValueError as e:
+            raise exceptions.InvalidID() from e
+
+    async def get(self, user_id: int) -> User:
+        self.loads += 1
+        if user_id not in self.users:
+            raise exceptions.UserNotExists()
+        return self.users[user_id]
+
+
+def make_strategy(cache: UserCache) -> CachedJWTStrategy:
+    return CachedJWTStrategy(cache, secret="test-secret-" + "x" * 32, lifetime_seconds=60)
+
+
+class TestUserCache:
+    def test_returns_detached_copy(self):
+        """Тест: из кэша возвращается новый отсоединённый экземпляр с теми же полями"""
+        cache = UserCache(ttl_seconds=60, max_size=10)
+        user = make_user(1)
+        cache.put(user)
+
+        cached = cache.get(1, token_version(user))
+
+        assert cached is not user
+        assert cached.email == user.email
+        assert inspect(cached).detached
+
+    def test_lru_eviction(self):
+        """Тест: при переполнении вытесняется давно не использованный пользователь"""
+        cache = UserCache(ttl_seconds=60, max_size=2)
+        first, second, third = make_user(1), make_user(2), make_user(3)
+        cache.put(first)
+        cache.put(second)
+        cache.get(1, token_version(first))
+        cache.put(third)
+
+        assert cache.get(1, token_version(first)) is not None
+        assert cache.get(2, token_version(second)) is None
+        assert len(cache) == 2
+
+    def test_expired(self, monkeypatch):
+        """Тест: запись старше TTL не возвращается"""
+        cache = UserCache(ttl_seconds=30, max_size=10)
+        user = make_user(1)
+        cache.put(user)
+        now = time.monotonic()
+        monkeypatch.setattr(time, "monotonic", lambda: now + 31)
+
+        assert cache.get(1, token_version(user)) is None
+        assert len(cache) == 0
+
+    def test_invalidate_all_versions(self):
+        """Тест: инвалидация удаляет записи пользователя со всеми версиями токена"""
+        cache = UserCache(ttl_seconds=60, max_size=10)
+        cache.put(make_user(1, 0))
+        cache.put(make_user(1, 1))
+        cache.put(make_user(2))
+
+        cache.invalidate(1)
+
+        assert len(cache) == 1
+
+
+class TestCachedJWTStrategy:
+    @pytest.mark.asyncio
+    async def test_user_loaded_once(self):
+        """Тест: повторные запросы с тем же токеном обслуживаются из кэша"""
+        user = make_user(1)
+        manager = FakeUserManager(user)
+        strategy = make_strategy(UserCache(ttl_seconds=60, max_size=10))
+        token = await strategy.write_token(user)
+
+        first = await strategy.read_token(token, manager)
+        second = await strategy.read_token(token, manager)
+
+        assert first.id == second.id == 1
+        assert manager.loads == 1
+
+    @pytest.mark.asyncio
+    async def test_token_of_old_password_rejected(self):
+        """Тест: после смены пароля старый токен не принимается"""
+        cache = UserCache(ttl_seconds=60, max_size=10)
+        strategy = make_strategy(cache)
+        token = await strategy.write_token(make_user(1, 0))
+        manager = FakeUserManager(make_user(1, 1))
+
+        assert await strategy.read_token(token, manager) is None
+
+    @pytest.mark.asyncio
+    async def test_invalid_tokens(self):
+        """Тест: испорченный токен и удалённый пользователь дают None"""
+        strategy = make_strategy(UserCache(ttl_seconds=60, max_size=10))
+        token = await strategy.write_token(make_user(1))
+
+        assert await strategy.read_token("not-a-jwt", FakeUserManager()) is None
+        assert await strategy.read_token(token, FakeUserManager()) is None
@@ -0,0 +1,142 @@
+"""
+Unit tests for the owner checks of the video project endpoints.
+
+ЧТО МЫ ТЕСТИРУЕМ:
+- Отмена и удаление проекта доступны только его владельцу:
+  чужой проект выглядит как несуществующий (404) и не меняется
+- Возобновляемая загрузка (GET, HEAD, PATCH, /complete) доступна только её владельцу
+- Владелец определяется как при загрузке: пользователь или IP анонимного клиента
+
+ВХОДНЫЕ ДАННЫЕ: приложение с роутером видео на SQLite, пользователь из заголовка запроса
+ВЫХОДНЫЕ ДАННЫЕ: HTTP статусы, состояние проекта в БД
+
+"""
+
+from types import SimpleNamespace
+
+import httpx
+import pytest
+import pytest_asyncio
+from fastapi import FastAPI, Request
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from api.video_uploads import router as video_uploads_router
+from api.videos import router as videos_router
+from authentication.fastapi_users import current_optional_user
+from config.config import settings
+from models import Base, VideoProject, VideoStatus, db_helper
+
+
+@pytest_asyncio.fixture
+async def factory(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'videos.sqlite'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield async_sessionmaker(engine, expire_on_commit=False)
+    await engine.dispose()
+
+
+@pytest.fixture
+def app(factory, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings.upload, "staging_dir", str(tmp_path / "uploads"))
+    # PATCH opens its own short session
+    monkeypatch.setattr(db_helper, "session_factory", factory)
+
+    async def session_getter():
+        async with factory() as session:
+            yield session
+
+    def optional_user(request: Request):
+        # X-User: id of the signed-in user; without it the request is anonymous
+        user_id = request.headers.get("X-User")
+        return SimpleNamespace(id=int(user_id)) if user_id else None
+
+    app = FastAPI()
+    app.include_router(video_uploads_router)
+    app.include_router(videos_router)
+    app.dependency_overrides[db_helper.session_getter] = session_getter
+    app.dependency_overrides[current_optional_user] = optional_user
+    return app
+
+
+async def add_project(factory, owner_key: str) -> int:
+    async with factory() as session:
+        project = VideoProject(transition="none", status=VideoStatus.PENDING, owner_key=owner_key)
+        session.add(project)
+        await session.commit()
+        return project.id
+
+
+async def call(app: FastAPI, method: str, url: str, user=None, **kwargs) -> httpx.Response:
+    transport = httpx.ASGITransport(app=app, client=("10.0.0.1", 1234))
+    headers = {"X-User": str(user)} if user is not None else {}
+    headers.update(kwargs.pop("headers", {}))
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        return await client.request(method, url, headers=headers, **kwargs)
+
+
+async def status_of(factory, project_id: int):
+    async with factory() as session:
+        project = await session.get(VideoProject, project_id)
+        return project.status if project else None
+
+
+class TestProjectOwnership:
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize(
+        "owner, caller",
+        [("user:1", 2), ("user:1", None), ("ip:10.0.0.1", 1), ("ip:10.0.0.2", None)],
+        ids=str,
+    )
+    async def test_foreign_project_is_404(self, app, factory, owner, caller):
+        """Тест: чужой проект нельзя отменить или удалить, он не меняется"""
+        project_id = await add_project(factory, owner)
+
+        cancel = await call(app, "POST", f"/videos/{project_id}/cancel", caller)
+        delete = await call(app, "DELETE", f"/videos/{project_id}", caller)
+
+        assert cancel.status_code == 404
+        assert delete.status_code == 404
+        assert await status_of(factory, project_id) == VideoStatus.PENDING
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("owner, caller", [("user:1", 1), ("ip:10.0.0.1", None)], ids=str)
+    async def test_owner_cancels_and_deletes(self, app, factory, owner, caller):
+        """Тест: владелец (пользователь или анонимный клиент с тем же IP) отменяет и удаляет"""
+        project_id = await add_project(factory, owner)
+
+        cancel = await call(app, "POST", f"/videos/{project_id}/cancel", caller)
+        assert cancel.status_code == 200
+        assert cancel.json()["status"] == VideoStatus.CANCELLED.value
+
+        delete = await call(app, "DELETE", f"/videos/{project_id}", caller)
+        assert delete.status_code == 204
+        assert await status_of(factory, project_id) is None
+
+
+class TestUploadOwnership:
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("caller", [2, None], ids=str)
+    async def test_foreign_upload_is_404(self, app, factory, caller):
+        """Тест: чужую загрузку нельзя читать, дописывать и завершать"""
+        created = await call(
+            app, "POST", "/videos/uploads", 1, json={"files": [{"filename": "a.png", "size": 4}]}
+        )
+        assert created.status_code == 201
+        upload_id = created.json()["id"]
+
+        responses = [
+            await call(app, "GET", f"/videos/uploads/{upload_id}", caller),
+            await call(app, "HEAD", f"/videos/uploads/{upload_id}/parts/0", caller),
+            await call(
+                app, "PATCH", f"/videos/uploads/{upload_id}/parts/0", caller,
+                content=b"\x89PNG", headers={"Upload-Offset": "0"},
+            ),
+            await call(app, "POST", f"/videos/uploads/{upload_id}/complete", caller),
+        ]
+
+        assert [response.status_code for response in responses] == [404] * 4
+        owned = await call(app, "GET", f"/videos/uploads/{upload_id}", 1)
+        assert owned.status_code == 200
+        assert owned.json()["parts"][0]["offset"] == 0
+        assert await status_of(factory, upload_id) == VideoStatus.UPLOADING
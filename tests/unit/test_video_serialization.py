@@ -0,0 +1,95 @@
+"""
+Unit tests for video project response building and keyset cursors.
+
+ЧТО МЫ ТЕСТИРУЕМ:
+- Построение словаря ответа VideoProjectRead из загруженного проекта
+- Кодирование/декодирование курсора пагинации
+
+ВХОДНЫЕ ДАННЫЕ: объекты, похожие на VideoProject/Image, и курсоры
+ВЫХОДНЫЕ ДАННЫЕ: словари ответа, id последнего проекта страницы
+
+"""
+
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+
+from queries.video_project_queries import encode_cursor, decode_cursor
+from utils.video_serialization import media_url, video_project_to_dict
+
+BASE_URL = "http://testserver"
+
+
+class TestMediaUrl:
+    def test_none_path(self):
+        assert media_url(BASE_URL, None) is None
+
+    def test_legacy_path_served_as_is(self):
+        url = media_url(BASE_URL, "media/videos/video_1.mp4")
+        assert url == "http://testserver/media/videos/video_1.mp4"
+
+    def test_storage_key(self):
+        url = media_url(BASE_URL, "blobs/ab/cd/abcd.mp4")
+        assert url == "http://testserver/media/blobs/ab/cd/abcd.mp4"
+
+
+class TestVideoProjectToDict:
+    def test_images_sorted_and_urls_built(self):
+        """Тест: изображения сортируются по order_index, пути превращаются в URL"""
+        now = datetime(2025, 1, 1, 12, 0)
+        project = SimpleNamespace(
+            id=7,
+            status="success",
+            stage="done",
+            progress=100.0,
+            eta_seconds=None,
+            transition="none",
+            output_format="mp4",
+            video_path="media/videos/video_7.mp4",
+            poster_path="blobs/ab/cd/poster.webp",
+            error_message=None,
+            created_at=now,
+            updated_at=now,
+            images=[
+                SimpleNamespace(
+                    id=2, image_path="media/images/b.png", thumbnail_path=None, order_index=1
+                ),
+                SimpleNamespace(
+                    id=1,
+                    image_path="media/images/a.png",
+                    thumbnail_path="blobs/ab/cd/a.webp",
+                    order_index=0,
+                ),
+            ],
+        )
+
+        result = video_project_to_dict(project, BASE_URL)
+
+        assert result["video_url"] == "http://testserver/media/videos/video_7.mp4"
+        assert result["poster_url"] == "http://testserver/media/blobs/ab/cd/poster.webp"
+        assert result["images"] == [
+            {
+                "id": 1,
+                "image_url": "http://testserver/media/images/a.png",
+                "thumbnail_url": "http://testserver/media/blobs/ab/cd/a.webp",
+                "order_index": 0,
+            },
+            {
+                "id": 2,
+                "image_url": "http://testserver/media/images/b.png",
+                "thumbnail_url": None,
+                "order_index": 1,
+            },
+        ]
+
+
+class TestCursor:
+    def test_round_trip(self):
+        assert decode_cursor(encode_cursor(42)) == 42
+
+    def test_garbage_raises_400(self):
+        with pytest.raises(HTTPException) as exc_info:
+            decode_cursor("not-a-cursor")
+        assert exc_info.value.status_code == 400